@@ -0,0 +1,100 @@
+"""
+Grouped Investor Activity Summaries
+
+Rolls DealAlerts (investor matches, watchlist hits, rule alerts) up per
+investor x symbol in one groupby:
+
+    investor  symbol  deals  buy_quantity  sell_quantity  net_quantity  gross_value  vwap  priority ...
+
+top_activity() then picks the N most important groups with a partial
+selection (argpartition by value, heapq by priority then value), so
+notifiers stay compact however many deals matched.
+"""
+
+import heapq
+import logging
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+from deal_records import AlertBatch, DealAlert
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLUMNS = [
+    'investor', 'symbol', 'security_name', 'investor_category', 'source', 'deal_type', 'priority',
+    'deals', 'buy_quantity', 'sell_quantity', 'net_quantity', 'gross_value', 'vwap',
+]
+
+# Orders top_activity() can rank by
+RANKINGS = ('value', 'priority')
+
+
+def summarize_activity(alerts: Union[List[DealAlert], AlertBatch]) -> pd.DataFrame:
+    """One row per investor x symbol with counts, quantities, value and VWAP"""
+    if not len(alerts):
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    batch = alerts if isinstance(alerts, AlertBatch) else AlertBatch.from_records(alerts)
+    df = batch.to_frame()
+    quantity = df['quantity']
+    price = df['price']
+    # NSE says BUY/SELL, BSE says B/S
+    buy = df['action'].astype(str).str.strip().str.upper().str[:1].eq('B')
+
+    frame = pd.DataFrame({
+        'investor': df['investor'].astype(str),
+        'symbol': df['symbol'].astype(str),
+        'security_name': df['security_name'].fillna('').astype(str),
+        'investor_category': df['investor_category'].fillna('').astype(str),
+        'source': df['source'].astype(str),
+        'deal_type': df['deal_type'].astype(str),
+        'priority': pd.to_numeric(df['priority'], errors='coerce').fillna(0),
+        'buy_quantity': quantity.where(buy, 0.0),
+        'sell_quantity': quantity.where(~buy, 0.0),
+        'quantity': quantity,
+        'gross_value': quantity * price,
+    })
+
+    summary = frame.groupby(['investor', 'symbol'], sort=False).agg(
+        security_name=('security_name', 'first'),
+        investor_category=('investor_category', 'first'),
+        source=('source', 'first'),
+        deal_type=('deal_type', 'first'),
+        priority=('priority', 'max'),
+        deals=('quantity', 'size'),
+        buy_quantity=('buy_quantity', 'sum'),
+        sell_quantity=('sell_quantity', 'sum'),
+        quantity=('quantity', 'sum'),
+        gross_value=('gross_value', 'sum'),
+    ).reset_index()
+
+    summary['net_quantity'] = summary['buy_quantity'] - summary['sell_quantity']
+    summary['vwap'] = (summary['gross_value'] / summary['quantity'].where(summary['quantity'] > 0)).fillna(0.0)
+    return summary[SUMMARY_COLUMNS]
+
+
+def top_activity(summary: pd.DataFrame, n: int, by: str = 'value') -> pd.DataFrame:
+    """The n most important groups, best first
+
+    by='value' ranks on gross value; by='priority' ranks on priority, then
+    gross value. Only the selected rows are sorted.
+    """
+    if summary.empty or n <= 0:
+        return summary.iloc[:0]
+
+    values = summary['gross_value'].to_numpy()
+    if by == 'priority':
+        priorities = summary['priority'].to_numpy()
+        chosen = heapq.nlargest(n, range(len(summary)), key=lambda i: (priorities[i], values[i]))
+        return summary.iloc[chosen].reset_index(drop=True)
+    if by not in RANKINGS:
+        raise ValueError(f"Unknown ranking {by!r} (use one of {', '.join(RANKINGS)})")
+
+    if n < len(values):
+        chosen = np.argpartition(-values, n - 1)[:n]
+    else:
+        chosen = np.arange(len(values))
+    chosen = chosen[np.argsort(-values[chosen], kind='stable')]
+    return summary.iloc[chosen].reset_index(drop=True)
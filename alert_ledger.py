@@ -0,0 +1,102 @@
+"""
+Alert Ledger
+
+Remembers which alerts each recipient has already been sent, so reruns
+and more frequent schedules only notify about genuinely new deals.
+
+The file is a flat array of 16-byte records (key, expires):
+
+- key is a 64-bit blake2b hash of (DealAlert.fingerprint, recipient)
+- expires is a unix timestamp; records older than ALERT_LEDGER_TTL_DAYS
+  are ignored and dropped when the file is compacted
+
+Records are appended after each successful send, and the whole file is
+loaded into a dict, so each lookup is a single O(1) hash probe.
+"""
+
+import os
+import time
+import hashlib
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from deal_records import DealAlert
+
+logger = logging.getLogger(__name__)
+
+RECORD = np.dtype([('key', '<u8'), ('expires', '<i8')])
+
+
+def report_fingerprint(day) -> str:
+    """Pseudo-alert standing for the daily report itself"""
+    return f"report|{day}"
+
+
+def _key(fingerprint: str, recipient: str) -> int:
+    digest = hashlib.blake2b(f"{fingerprint}\0{recipient.strip().lower()}".encode('utf-8'),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class AlertLedger:
+    """(fingerprint, recipient) -> expiry, persisted to an append-only file"""
+
+    def __init__(self, path: str, ttl_days: float = 7):
+        self.path = path
+        self.ttl = int(ttl_days * 86400)
+        self._expiry: Dict[int, int] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            logger.warning(f"Could not read alert ledger {self.path}: {e}")
+            return
+
+        # A torn final record (crash mid-append) is dropped
+        records = np.frombuffer(data[:len(data) - len(data) % RECORD.itemsize], dtype=RECORD)
+        live = records[records['expires'] > int(time.time())]
+        # Later records win, so re-sent alerts carry their newest expiry
+        self._expiry = dict(zip(live['key'].tolist(), live['expires'].tolist()))
+        if len(self._expiry) < len(records) // 2:
+            self._compact()
+        logger.info(f"✓ Alert ledger: {len(self._expiry)} live entries in {self.path}")
+
+    def _compact(self):
+        records = np.array(list(self._expiry.items()), dtype=RECORD)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(records.tobytes())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not compact alert ledger {self.path}: {e}")
+
+    def seen(self, fingerprint: str, recipient: str) -> bool:
+        return self._expiry.get(_key(fingerprint, recipient), 0) > time.time()
+
+    def new_alerts(self, alerts: List[DealAlert], recipient: str) -> List[DealAlert]:
+        """Alerts this recipient has not been sent yet"""
+        return [alert for alert in alerts or [] if not self.seen(alert.fingerprint, recipient)]
+
+    def record(self, fingerprints: Iterable[str], recipient: str):
+        """Remember fingerprints as sent to recipient"""
+        expires = int(time.time()) + self.ttl
+        keys = [_key(fingerprint, recipient) for fingerprint in fingerprints]
+        if not keys:
+            return
+        for key in keys:
+            self._expiry[key] = expires
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'ab') as f:
+                f.write(np.array([(key, expires) for key in keys], dtype=RECORD).tobytes())
+        except OSError as e:
+            logger.warning(f"Could not update alert ledger {self.path}: {e}")
@@ -0,0 +1,278 @@
+"""
+Vectorized Alert Rules
+
+Desks declare rules in a JSON file (ALERT_RULES_PATH, default
+alert_rules.json). Every key besides name/priority is a predicate and a
+deal must satisfy all of them:
+
+    [
+      {"name": "Deal above 50 Cr", "min_value_cr": 50, "priority": 2},
+      {"name": "Repeat buyer", "side": "BUY", "repeat_within_days": 5},
+      {"name": "Watchlist blocks", "deal_categories": ["BLOCK"], "symbols": ["RELIANCE", "500325"]},
+      {"name": "Promoter selling", "side": "SELL", "investor_categories": ["Promoter"]},
+      {"name": "Heavy share of volume", "min_pct_day_volume": 10}
+    ]
+
+min_pct_day_volume / min_pct_delivery need the bhavcopy columns (see
+bhavcopy.py); deals without them never match.
+
+Rules are evaluated over one combined frame of the day's deals. Derived
+columns (value in crores, side, investor category, repeat counts) are
+computed once, and each distinct predicate becomes one boolean mask that
+is shared by every rule using it, so adding rules mostly costs ANDs.
+"""
+
+import os
+import re
+import json
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from deal_records import AlertBatch, DealAlert
+from deal_schema import concat_deal_frames
+
+logger = logging.getLogger(__name__)
+
+CRORE = 1e7
+
+PREDICATES = {
+    'min_value_cr', 'max_value_cr', 'min_quantity', 'side', 'sources',
+    'deal_categories', 'symbols', 'client_contains', 'investor_categories',
+    'repeat_within_days', 'repeat_min_count', 'min_pct_day_volume', 'min_pct_delivery',
+}
+
+
+class AlertRule:
+    """One named conjunction of predicates"""
+
+    def __init__(self, spec: Dict):
+        unknown = set(spec) - PREDICATES - {'name', 'priority'}
+        if unknown:
+            raise ValueError(f"Unknown rule keys: {sorted(unknown)}")
+        self.name = spec.get('name') or 'Unnamed rule'
+        self.priority = int(spec.get('priority', 0))
+        self.predicates = {k: v for k, v in spec.items() if k in PREDICATES}
+        if not self.predicates:
+            raise ValueError(f"Rule '{self.name}' has no predicates")
+
+    def __repr__(self):
+        return f"AlertRule({self.name!r}, {self.predicates})"
+
+
+def load_rules(path: str) -> List[AlertRule]:
+    """Parse a rules file; invalid rules are logged and skipped"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        specs = json.load(f)
+
+    rules = []
+    for spec in specs:
+        try:
+            rules.append(AlertRule(spec))
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Skipping alert rule {spec!r}: {e}")
+    logger.info(f"✓ Loaded {len(rules)} alert rules from {path}")
+    return rules
+
+
+def _upper_set(values) -> frozenset:
+    if isinstance(values, str):
+        values = [values]
+    return frozenset(str(v).strip().upper() for v in values)
+
+
+def _normalized(column: pd.Series) -> pd.Series:
+    """Stripped upper-case text with nulls as ''"""
+    return column.astype(object).where(column.notna(), '').astype(str).str.strip().str.upper()
+
+
+def _sides(column: pd.Series) -> pd.Series:
+    # NSE says BUY/SELL, BSE says B/S
+    return _normalized(column).str[:1].map({'B': 'BUY', 'S': 'SELL'})
+
+
+class AlertRuleEngine:
+    """Evaluates a list of AlertRule over a day's deal frames"""
+
+    def __init__(self, rules: List[AlertRule], investors: Optional[List[Dict]] = None):
+        self.rules = rules
+        self.investors = investors or []
+
+    @property
+    def repeat_window(self) -> int:
+        """Longest repeat_within_days across rules (0 if none) - history needed"""
+        return max((int(r.predicates.get('repeat_within_days', 0)) for r in self.rules), default=0)
+
+    # ------------------------------------------------------------------
+    # Frame preparation
+    # ------------------------------------------------------------------
+
+    def prepare(self, data: Dict[str, pd.DataFrame], history: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Combine the day's frames and add the derived columns rules use"""
+        df = concat_deal_frames(data.values())
+        if df.empty:
+            return df
+
+        for column in ('symbol', 'scrip_code', 'isin', 'client_name', 'buy_sell', 'source', 'deal_category'):
+            if column not in df.columns:
+                df[column] = pd.Series(pd.NA, index=df.index, dtype='category')
+
+        quantity = pd.to_numeric(df.get('quantity_traded'), errors='coerce').astype('float64')
+        price = pd.to_numeric(df.get('trade_price'), errors='coerce').astype('float64')
+        df['_value_cr'] = (quantity * price / CRORE).to_numpy()
+        for column in ('pct_day_volume', 'pct_delivery'):
+            df[f'_{column}'] = pd.to_numeric(df[column], errors='coerce').astype('float64').to_numpy() \
+                if column in df.columns else np.nan
+        df['_quantity'] = quantity.to_numpy()
+        df['_side'] = _sides(df['buy_sell'])
+        df['_client'] = _normalized(df['client_name'])
+        df['_security'] = _normalized(df['symbol'].astype(object).fillna(df['scrip_code'].astype(object)))
+
+        if self.investors and any('investor_categories' in r.predicates for r in self.rules):
+            df['_investor_category'] = self._investor_categories(df['_client'])
+
+        # Set predicates become a lookup into each column's category codes
+        self._codes = {}
+        for column in ('_security', 'symbol', 'scrip_code', 'isin', 'source', 'deal_category', '_investor_category'):
+            if column in df.columns:
+                values = pd.Categorical(_normalized(df[column]))
+                index = {value: i for i, value in enumerate(values.categories)}
+                self._codes[column] = (values.codes, index)
+        if self.repeat_window:
+            self._index_repeat_buys(df, history)
+        return df
+
+    def _investor_categories(self, clients: pd.Series) -> pd.Series:
+        """Category of the highest-priority monitored investor matching each client"""
+        distinct = pd.Series(pd.unique(clients.dropna().astype(str)))
+        category = pd.Series(pd.NA, index=distinct.index, dtype=object)
+        for investor in sorted(self.investors, key=lambda i: i.get('priority', 0)):
+            hits = distinct.str.contains(investor['name'], case=False, regex=False, na=False)
+            category[hits] = str(investor.get('category', '')).strip().upper()
+        lookup = dict(zip(distinct, category))
+        return clients.astype(str).map(lookup)
+
+    def _index_repeat_buys(self, df: pd.DataFrame, history: Optional[pd.DataFrame]):
+        """Index buys from df and history for repeat_within_days
+
+        Each buy becomes one int64 key, (client, security) code * stride + day,
+        kept sorted. Counting a row's buys in any window is then two
+        searchsorted calls over all rows at once.
+        """
+        self._repeat_cache = {}
+        buys = df[['_client', '_security', 'deal_date', '_side']]
+        if history is not None and not history.empty:
+            security = history['symbol'] if 'symbol' in history.columns else history['scrip_code']
+            buys = pd.concat([buys, pd.DataFrame({
+                '_client': _normalized(history['client_name']),
+                '_security': _normalized(security),
+                'deal_date': history['deal_date'],
+                '_side': _sides(history['buy_sell']),
+            })], ignore_index=True)
+
+        # BSE rows have no client name, so they can never repeat
+        buys = buys[(buys['_side'] == 'BUY') & (buys['_client'] != '') & buys['deal_date'].notna()]
+        codes, pairs = pd.factorize(buys['_client'] + '|' + buys['_security'])
+        days = pd.to_datetime(buys['deal_date'], errors='coerce').to_numpy('datetime64[D]').astype('int64')
+
+        stride = np.int64(1 << 20)  # days since epoch stay far below this
+        self._repeat_keys = np.sort(codes.astype('int64') * stride + days)
+
+        row_codes = (df['_client'] + '|' + df['_security']).map(dict(zip(pairs, range(len(pairs)))))
+        row_days = pd.to_datetime(df['deal_date'], errors='coerce').to_numpy('datetime64[D]').astype('int64')
+        valid = row_codes.notna().to_numpy() & (df['_side'] == 'BUY').to_numpy() & df['deal_date'].notna().to_numpy()
+        self._row_repeat_keys = np.where(valid, row_codes.fillna(0).to_numpy('int64') * stride + row_days, -1)
+        self._row_repeat_valid = valid
+
+    def _repeat_count_within(self, days: int) -> np.ndarray:
+        """Buys by the same client/security in [deal_date - days, deal_date], per row"""
+        if days not in self._repeat_cache:
+            keys, valid = self._row_repeat_keys, self._row_repeat_valid
+            right = np.searchsorted(self._repeat_keys, keys, side='right')
+            left = np.searchsorted(self._repeat_keys, keys - days, side='left')
+            self._repeat_cache[days] = np.where(valid, right - left, 0)
+        return self._repeat_cache[days]
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def _in_set(self, column: str, wanted: frozenset) -> np.ndarray:
+        """column value in wanted, via category codes (code -1 hits the False slot)"""
+        if column not in self._codes:
+            return np.zeros(len(self._codes['_security'][0]), dtype=bool)
+        codes, index = self._codes[column]
+        table = np.zeros(len(index) + 1, dtype=bool)
+        table[[index[v] for v in wanted if v in index]] = True
+        return table[codes]
+
+    def _mask(self, df: pd.DataFrame, name: str, value, rule: AlertRule) -> np.ndarray:
+        if name == 'min_value_cr':
+            return (df['_value_cr'] >= float(value)).to_numpy()
+        if name == 'max_value_cr':
+            return (df['_value_cr'] <= float(value)).to_numpy()
+        if name in ('min_pct_day_volume', 'min_pct_delivery'):
+            return (df[f'_{name[4:]}'] >= float(value)).to_numpy()
+        if name == 'min_quantity':
+            return (df['_quantity'] >= float(value)).to_numpy()
+        if name == 'side':
+            return (df['_side'] == str(value).strip().upper()).to_numpy()
+        if name == 'sources':
+            return self._in_set('source', _upper_set(value))
+        if name == 'deal_categories':
+            return self._in_set('deal_category', _upper_set(value))
+        if name == 'symbols':
+            wanted = _upper_set(value)
+            mask = self._in_set('_security', wanted)
+            for column in ('symbol', 'scrip_code', 'isin'):
+                mask |= self._in_set(column, wanted)
+            return mask
+        if name == 'client_contains':
+            names = sorted(_upper_set(value))
+            return df['_client'].str.contains('|'.join(map(re.escape, names)), na=False).to_numpy()
+        if name == 'investor_categories':
+            return self._in_set('_investor_category', _upper_set(value))
+        if name == 'repeat_within_days':
+            min_count = int(rule.predicates.get('repeat_min_count', 2))
+            return self._repeat_count_within(int(value)) >= min_count
+        if name == 'repeat_min_count':
+            # Consumed together with repeat_within_days
+            return np.ones(len(df), dtype=bool)
+        raise ValueError(f"Unknown predicate {name}")
+
+    def evaluate(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """rule name -> boolean mask over the prepared frame"""
+        cache: Dict[tuple, np.ndarray] = {}
+        results = {}
+        for rule in self.rules:
+            mask = np.ones(len(df), dtype=bool)
+            for name, value in rule.predicates.items():
+                key = (name, json.dumps(value, sort_keys=True),
+                       rule.predicates.get('repeat_min_count') if name == 'repeat_within_days' else None)
+                if key not in cache:
+                    cache[key] = self._mask(df, name, value, rule)
+                mask &= cache[key]
+            results[rule.name] = mask
+        return results
+
+    def find_alerts(self, data: Dict[str, pd.DataFrame], history: Optional[pd.DataFrame] = None) -> List[DealAlert]:
+        """DealAlert records (same shape as InvestorMonitor's) for every rule hit"""
+        df = self.prepare(data, history)
+        if df.empty or not self.rules:
+            return []
+
+        priorities = {rule.name: rule.priority for rule in self.rules}
+        alerts = []
+        for rule_name, mask in self.evaluate(df).items():
+            hits = df[mask]
+            if hits.empty:
+                continue
+            logger.info(f"  ✓ RULE: {rule_name} - {len(hits)} deals")
+            alerts.extend(AlertBatch.from_frame(
+                hits, investor_category=rule_name, priority=priorities[rule_name], rule=rule_name,
+            ).records())
+        return alerts
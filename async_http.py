@@ -0,0 +1,204 @@
+"""
+Shared Asyncio HTTP Client Layer
+
+All network I/O (exchange fetches, Telegram, PostgREST) goes through one
+aiohttp connector:
+
+- connection pooling with HTTP keep-alive
+- a global and a per-host concurrency limit (HTTP_POOL_SIZE, HTTP_PER_HOST_LIMIT)
+- one event loop on a daemon thread, so synchronous code can use it
+
+Async callers use AsyncHTTPClient.request() directly. Everything else uses
+SyncSession, a thin requests.Session look-alike (get/post/headers, cookies,
+stream=True + iter_content) whose calls are run on the shared loop.
+"""
+
+import os
+import json
+import atexit
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterator, Optional, Set
+
+import aiohttp
+import requests
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '20'))
+PER_HOST_LIMIT = int(os.getenv('HTTP_PER_HOST_LIMIT', '4'))
+KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE', '30'))
+
+
+class HTTPResponse:
+    """requests.Response look-alike for a (possibly still streaming) aiohttp response"""
+
+    def __init__(self, client: 'AsyncHTTPClient', method: str, url: str, status_code: int,
+                 headers: Dict[str, str], content: Optional[bytes] = None, raw=None):
+        self._client = client
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self._content = content
+        # Unread aiohttp response when the request was made with stream=True
+        self._raw = raw
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = b''.join(self.iter_content())
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error for {self.method} {self.url}", response=self)
+
+    def iter_content(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        if self._raw is None:
+            if self._content:
+                yield self._content
+            return
+        try:
+            while True:
+                chunk = self._client.run(self._raw.content.read(chunk_size))
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._client.run(_release(raw))
+
+
+async def _release(raw):
+    raw.release()
+
+
+class AsyncHTTPClient:
+    """Owns the event loop thread and the pooled connector"""
+
+    def __init__(self, pool_size: int = POOL_SIZE, per_host_limit: int = PER_HOST_LIMIT,
+                 keepalive_timeout: float = KEEPALIVE_TIMEOUT):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='async-http', daemon=True)
+        self._thread.start()
+
+        async def make_connector():
+            return aiohttp.TCPConnector(limit=pool_size, limit_per_host=per_host_limit,
+                                        keepalive_timeout=keepalive_timeout)
+
+        self.connector = self.run(make_connector())
+        # Every session opened on the connector, closed with the client
+        self._sessions: Set[aiohttp.ClientSession] = set()
+        self._default_session = self.new_session()
+        logger.debug(f"Async HTTP client ready (pool {pool_size}, {per_host_limit} per host)")
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the client loop and wait for its result"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("AsyncHTTPClient.run() called from its own event loop - await instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def new_session(self) -> aiohttp.ClientSession:
+        """ClientSession with its own cookie jar on the shared connector"""
+        async def make_session():
+            # unsafe=True keeps cookies from IP hosts too (local stand-in servers)
+            return aiohttp.ClientSession(connector=self.connector, connector_owner=False,
+                                         cookie_jar=aiohttp.CookieJar(unsafe=True))
+        session = self.run(make_session())
+        self._sessions.add(session)
+        return session
+
+    def close_session(self, session: aiohttp.ClientSession):
+        """Close a session from new_session() before the client itself closes"""
+        self._sessions.discard(session)
+        self.run(session.close())
+
+    async def request(self, method: str, url: str, session: Optional[aiohttp.ClientSession] = None,
+                      headers: Optional[Dict[str, str]] = None, params=None, json=None, data=None,
+                      timeout: Optional[float] = None, stream: bool = False,
+                      allow_redirects: bool = True) -> HTTPResponse:
+        """One HTTP request; the body is read unless stream=True"""
+        session = session or self._default_session
+        raw = await session.request(
+            method, url, headers=headers, params=params, json=json, data=data,
+            timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=allow_redirects,
+        )
+        response = HTTPResponse(self, method, str(raw.url), raw.status, dict(raw.headers))
+        if stream:
+            response._raw = raw
+            return response
+        try:
+            response._content = await raw.read()
+        finally:
+            raw.release()
+        return response
+
+    def close(self):
+        async def shutdown():
+            # Sessions nobody closed (fetchers, notifiers) would log "Unclosed client session"
+            for session in self._sessions:
+                await session.close()
+            self._sessions.clear()
+            await self.connector.close()
+        try:
+            self.run(shutdown(), timeout=5)
+        except Exception as e:
+            logger.debug(f"Async HTTP client shutdown: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_client: Optional[AsyncHTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AsyncHTTPClient:
+    """Process-wide shared client, started on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AsyncHTTPClient()
+            atexit.register(_client.close)
+        return _client
+
+
+class SyncSession:
+    """Blocking requests.Session-style facade over the shared async client"""
+
+    def __init__(self, client: Optional[AsyncHTTPClient] = None):
+        self.client = client or get_client()
+        self.headers: Dict[str, str] = {}
+        # Own cookie jar (NSE needs the cookies from its landing page)
+        self._session = self.client.new_session()
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: Optional[float] = None, **kwargs) -> HTTPResponse:
+        merged = {**self.headers, **(headers or {})}
+        coro = self.client.request(method, url, session=self._session, headers=merged,
+                                   timeout=timeout, **kwargs)
+        return self.client.run(coro)
+
+    def get(self, url: str, **kwargs) -> HTTPResponse:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> HTTPResponse:
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.client.close_session(self._session)
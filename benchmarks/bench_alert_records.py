@@ -0,0 +1,128 @@
+"""
+Alert benchmark: string-keyed dicts vs DealAlert records / AlertBatch
+
+Builds alerts for a synthetic frame of matched deals both ways and compares:
+
+- construction: iterrows() + dict per row vs AlertBatch.from_frame().records()
+- memory per alert (tracemalloc)
+- formatting: rendering each alert for several notifications (email
+  batches + Telegram), re-formatting every time vs memoized fields
+
+Usage:
+    python benchmarks/bench_alert_records.py --alerts 50000 --renders 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deal_records import AlertBatch  # noqa: E402
+from deal_schema import compact_deal_frame  # noqa: E402
+
+
+def build_matches(n: int, seed: int = 42) -> pd.DataFrame:
+    """Compact frame of n matched NSE bulk deals"""
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"SYM{i:04d}" for i in range(2500)])
+    return compact_deal_frame(pd.DataFrame({
+        'deal_date': pd.Timestamp('2025-10-03'),
+        'symbol': symbols[rng.integers(0, len(symbols), n)],
+        'security_name': np.char.add(symbols[rng.integers(0, len(symbols), n)], ' Limited'),
+        'client_name': 'GRAVITON RESEARCH CAPITAL LLP',
+        'buy_sell': rng.choice(['BUY', 'SELL'], n),
+        'quantity_traded': rng.integers(10_000, 10_000_000, n),
+        'trade_price': np.round(rng.uniform(5, 5000, n), 2),
+        'remarks': '-',
+        'source': 'NSE',
+        'deal_category': 'BULK',
+    }))
+
+
+def dict_alerts(df: pd.DataFrame):
+    """The previous find_monitored_deals loop"""
+    alerts = []
+    for _, row in df.iterrows():
+        alerts.append({
+            'investor': 'Graviton', 'investor_category': 'HFT', 'priority': 2,
+            'deal_type': 'BULK', 'source': 'NSE',
+            'date': row.get('deal_date', ''),
+            'symbol': row.get('symbol', ''),
+            'security_name': row.get('security_name', ''),
+            'action': row.get('buy_sell', ''),
+            'quantity': row.get('quantity_traded', 0),
+            'price': row.get('trade_price', 0),
+            'remarks': row.get('remarks', ''),
+        })
+    return alerts
+
+
+def record_alerts(df: pd.DataFrame):
+    return AlertBatch.from_frame(df, investor='Graviton', investor_category='HFT', priority=2,
+                                 deal_type='BULK', source='NSE').records()
+
+
+def render_dicts(alerts) -> int:
+    size = 0
+    for deal in alerts:
+        date_text = deal['date'].strftime('%d-%b') if hasattr(deal['date'], 'strftime') else str(deal['date'])
+        size += len(f"{date_text} {deal['investor']} {deal['action']} {deal['symbol']} "
+                    f"{deal['quantity']:,.0f} ₹{deal['price']:,.2f} {deal['source']} {deal['deal_type']}")
+    return size
+
+
+def render_records(alerts) -> int:
+    size = 0
+    for deal in alerts:
+        size += len(f"{deal.date_text} {deal.investor} {deal.action} {deal.symbol} "
+                    f"{deal.quantity_text} {deal.price_text} {deal.kind_text}")
+    return size
+
+
+def measure(build, df):
+    tracemalloc.start()
+    started = time.perf_counter()
+    alerts = build(df)
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return alerts, elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alert record benchmark')
+    parser.add_argument('--alerts', type=int, default=50_000)
+    parser.add_argument('--renders', type=int, default=4, help='Notifications each alert is rendered into')
+    args = parser.parse_args()
+
+    df = build_matches(args.alerts)
+    dicts, dict_s, dict_mem = measure(dict_alerts, df)
+    records, record_s, record_mem = measure(record_alerts, df)
+
+    started = time.perf_counter()
+    for _ in range(args.renders):
+        render_dicts(dicts)
+    dict_render_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(args.renders):
+        render_records(records)
+    record_render_s = time.perf_counter() - started
+
+    print(f"Alerts: {args.alerts:,}, rendered {args.renders}x")
+    print(f"{'':18}{'dicts':>12}{'records':>12}{'ratio':>8}")
+    print(f"{'build (s)':18}{dict_s:>12.3f}{record_s:>12.3f}{dict_s / record_s:>7.1f}x")
+    print(f"{'bytes / alert':18}{dict_mem / args.alerts:>12,.0f}{record_mem / args.alerts:>12,.0f}"
+          f"{dict_mem / record_mem:>7.1f}x")
+    print(f"{'render (s)':18}{dict_render_s:>12.3f}{record_render_s:>12.3f}"
+          f"{dict_render_s / record_render_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Throughput benchmark: bulk_import on 1..N worker processes
+
+Writes synthetic NSE deal CSVs (raw export headers, comma-grouped
+quantities) to a temp directory and times import_files() per worker count.
+
+Usage:
+    python benchmarks/bench_bulk_import.py --files 32 --rows-per-file 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_import import import_files  # noqa: E402
+
+
+def write_files(directory: str, files: int, rows: int, seed: int = 42):
+    """Synthetic raw NSE CSV exports, one trading day per file"""
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"SYM{i:04d}" for i in range(2500)])
+    clients = np.array([f"CLIENT {i:05d} PRIVATE LIMITED" for i in range(20000)])
+    days = pd.bdate_range('2020-01-01', periods=files)
+
+    paths = []
+    for i, day in enumerate(days):
+        quantities = rng.integers(10_000, 10_000_000, rows)
+        df = pd.DataFrame({
+            'Date': day.strftime('%d-%b-%Y').upper(),
+            'Symbol': symbols[rng.integers(0, len(symbols), rows)],
+            'Security Name': 'SYNTHETIC LIMITED',
+            'Client Name': clients[rng.integers(0, len(clients), rows)],
+            'Buy/Sell': rng.choice(['BUY', 'SELL'], rows),
+            'Quantity Traded': [f"{q:,}" for q in quantities],
+            'Trade Price / Wght. Avg. Price': np.round(rng.uniform(5, 5000, rows), 2),
+            'Remarks': '-',
+        })
+        path = os.path.join(directory, f"nse_bulk_{i:04d}.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='bulk_import scaling benchmark')
+    parser.add_argument('--files', type=int, default=32)
+    parser.add_argument('--rows-per-file', type=int, default=50_000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, args.files, args.rows_per_file)
+        counts = sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+
+        print(f"Files: {args.files} x {args.rows_per_file:,} rows, {os.cpu_count()} core(s)")
+        print(f"{'workers':>8}{'seconds':>10}{'rows/s':>14}{'speedup':>10}")
+        baseline = None
+        for workers in counts:
+            started = time.perf_counter()
+            df = import_files('nse_bulk', paths, workers=workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"{workers:>8}{elapsed:>10.2f}{len(df) / elapsed:>14,.0f}{baseline / elapsed:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
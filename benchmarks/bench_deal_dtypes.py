@@ -0,0 +1,80 @@
+"""
+Memory benchmark: object-dtype deal frames vs the compact deal schema
+
+Builds a synthetic multi-year deal history the way the fetchers used to
+leave it (Python strings and date objects) and compares it with
+compact_deal_frame() output.
+
+Usage:
+    python benchmarks/bench_deal_dtypes.py --years 5 --deals-per-day 150
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deal_schema import compact_deal_frame  # noqa: E402
+
+
+def build_object_frame(years: int, deals_per_day: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic history with the pre-compaction (object) column types"""
+    rng = np.random.default_rng(seed)
+
+    start = date.today() - timedelta(days=365 * years)
+    trading_days = [d for d in (start + timedelta(days=i) for i in range(365 * years)) if d.weekday() < 5]
+    n = len(trading_days) * deals_per_day
+
+    symbols = np.array([f"SYM{i:04d}" for i in range(2500)])
+    clients = np.array([f"CLIENT {i:05d} PRIVATE LIMITED" for i in range(20000)])
+    # Skewed: a few clients (HFTs, prop desks) account for most deals
+    client_idx = np.minimum(rng.zipf(1.3, n) - 1, len(clients) - 1)
+
+    deal_dates = np.repeat(np.array(trading_days, dtype=object), deals_per_day)
+    return pd.DataFrame({
+        'deal_date': deal_dates,
+        'symbol': symbols[rng.integers(0, len(symbols), n)].astype(object),
+        'security_name': np.char.add(symbols[rng.integers(0, len(symbols), n)], ' Limited').astype(object),
+        'client_name': clients[client_idx].astype(object),
+        'buy_sell': rng.choice(np.array(['BUY', 'SELL'], dtype=object), n),
+        'quantity_traded': rng.integers(10_000, 10_000_000, n).astype(float),
+        'trade_price': np.round(rng.uniform(5, 5000, n), 2),
+        'remarks': rng.choice(np.array(['-', 'WEIGHTED AVERAGE PRICE'], dtype=object), n, p=[0.95, 0.05]),
+        'fetch_date': deal_dates,
+        'source': rng.choice(np.array(['NSE', 'BSE'], dtype=object), n),
+        'deal_category': rng.choice(np.array(['BULK', 'BLOCK'], dtype=object), n, p=[0.9, 0.1]),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deal frame memory benchmark')
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--deals-per-day', type=int, default=150)
+    args = parser.parse_args()
+
+    raw = build_object_frame(args.years, args.deals_per_day)
+    raw_bytes = raw.memory_usage(deep=True).sum()
+
+    started = time.perf_counter()
+    compact = compact_deal_frame(raw)
+    elapsed = time.perf_counter() - started
+    compact_bytes = compact.memory_usage(deep=True).sum()
+
+    print(f"Rows: {len(raw):,} ({args.years} years x {args.deals_per_day} deals/day)")
+    print(f"{'column':<18}{'object (MB)':>14}{'compact (MB)':>14}  dtype")
+    raw_cols = raw.memory_usage(deep=True, index=False)
+    compact_cols = compact.memory_usage(deep=True, index=False)
+    for column in raw.columns:
+        print(f"{column:<18}{raw_cols[column] / 1e6:>14.1f}{compact_cols[column] / 1e6:>14.1f}  {compact[column].dtype}")
+    print(f"{'TOTAL':<18}{raw_bytes / 1e6:>14.1f}{compact_bytes / 1e6:>14.1f}")
+    print(f"Reduction: {raw_bytes / compact_bytes:.1f}x  (conversion took {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
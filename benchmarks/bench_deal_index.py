@@ -0,0 +1,89 @@
+"""
+Lookup benchmark: full scan of archived CSVs vs the deal_index postings
+
+Writes a synthetic multi-year archive of daily save_to_csv files, indexes
+it one day at a time (as DealsAutomation does), then times "all deals for
+SYMBOL" and "everything CLIENT did" both ways.
+
+Usage:
+    python benchmarks/bench_deal_index.py --days 750 --deals-per-day 150
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deal_index import DealIndex  # noqa: E402
+from deal_schema import read_deals_csv  # noqa: E402
+
+
+def write_archive(root: str, days: int, per_day: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"SYM{i:04d}" for i in range(3000)])
+    clients = np.array([f"CLIENT {i:05d} CAPITAL LLP" for i in range(20000)])
+    paths = []
+    day = date(2022, 1, 3)
+    for _ in range(days):
+        path = os.path.join(root, f"NSE_Bulk_Deals_{day:%Y%m%d}.csv")
+        pd.DataFrame({
+            'deal_date': day.isoformat(),
+            'symbol': symbols[rng.integers(0, len(symbols), per_day)],
+            'security_name': 'Some Company Limited',
+            'client_name': clients[rng.integers(0, len(clients), per_day)],
+            'buy_sell': rng.choice(['BUY', 'SELL'], per_day),
+            'quantity_traded': rng.integers(10_000, 5_000_000, per_day),
+            'trade_price': np.round(rng.uniform(5, 5000, per_day), 2),
+            'remarks': '-',
+            'source': 'NSE',
+            'deal_category': 'BULK',
+        }).to_csv(path, index=False)
+        paths.append(path)
+        day += timedelta(days=1)
+    return paths
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive index benchmark')
+    parser.add_argument('--days', type=int, default=750)
+    parser.add_argument('--deals-per-day', type=int, default=150)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        paths = write_archive(root, args.days, args.deals_per_day)
+        index = DealIndex(os.path.join(root, 'deal_index'))
+        _, index_s = timed(lambda: [index.add_files([path]) for path in paths])
+
+        queries = [
+            ('symbol SYM0042', lambda df: df['symbol'].astype(str) == 'SYM0042',
+             lambda: index.deals_for_symbol('SYM0042')),
+            ('client CLIENT 00042', lambda df: df['client_name'].astype(str) == 'CLIENT 00042 CAPITAL LLP',
+             lambda: index.deals_for_client('client 00042 capital llp')),
+        ]
+
+        print(f"Archive: {len(paths)} files, {len(index):,} deals, "
+              f"indexed one day at a time in {index_s:.1f}s ({len(index.manifest['segments'])} segments)")
+        print(f"{'':22}{'rows':>6}{'scan (s)':>12}{'index (s)':>12}{'speedup':>9}")
+        for name, predicate, lookup in queries:
+            scanned, scan_s = timed(lambda: (lambda df: df[predicate(df)])(read_deals_csv(paths)))
+            found, index_lookup_s = timed(lookup)
+            assert len(found) == len(scanned), (len(found), len(scanned))
+            print(f"{name:22}{len(found):>6}{scan_s:>12.3f}{index_lookup_s:>12.4f}"
+                  f"{scan_s / index_lookup_s:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
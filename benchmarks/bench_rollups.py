@@ -0,0 +1,102 @@
+"""
+Digest cost from rollups vs re-aggregating raw deals, as history grows
+
+For each history length, synthetic_data.py generates that many months of
+deals, which are stored in a SQLite backend and folded into the rollups.
+Then it times:
+
+- add: folding one more trading day into the rollups (incremental upkeep)
+- week / month digest: build_digest() from the rollups alone
+- raw month: reading the month's deals from all four tables and
+  aggregating them per source x category x symbol, as a report without
+  rollups would
+
+Usage:
+    python benchmarks/bench_rollups.py --months 1,3,12
+    python benchmarks/bench_rollups.py --months 6 --scale 2
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Config  # noqa: E402
+from rollups import DealRollups, build_digest, period_end, period_start  # noqa: E402
+from storage import SQLiteBackend  # noqa: E402
+from synthetic_data import SyntheticDeals, SyntheticSpec  # noqa: E402
+
+TABLES = {'nse_bulk': Config.TABLE_NSE_BULK, 'nse_block': Config.TABLE_NSE_BLOCK,
+          'bse_bulk': Config.TABLE_BSE_BULK, 'bse_block': Config.TABLE_BSE_BLOCK}
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def _json_ready(df: pd.DataFrame) -> list:
+    df = df.assign(deal_date=df['deal_date'].map(date.isoformat))
+    df['fetch_date'] = df['deal_date']
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def run(months: int, scale: float, path: str) -> dict:
+    last_day = date(2025, 10, 31)
+    first_day = (pd.Timestamp(last_day) - pd.DateOffset(months=months) + pd.Timedelta(days=1)).date()
+    deals = SyntheticDeals(SyntheticSpec(start=first_day, end=last_day, scale=scale)).all_deals()
+
+    backend = SQLiteBackend(path)
+    rollups = DealRollups(backend)
+    # Everything but the last day is history
+    history = {TABLES[key]: df[df['deal_date'] < last_day] for key, df in deals.items()}
+    for table, df in history.items():
+        backend.insert_records(table, _json_ready(df))
+    rollups.seed(history)
+
+    timings = {}
+    _, timings['add'] = timed(lambda: [rollups.add(TABLES[key], df[df['deal_date'] == last_day])
+                                       for key, df in deals.items()])
+    _, timings['week digest'] = timed(lambda: build_digest(rollups, 'week', last_day))
+    _, timings['month digest'] = timed(lambda: build_digest(rollups, 'month', last_day))
+
+    def raw_month():
+        start = period_start(last_day, 'month')
+        frames = [backend.query_deals(table, start, period_end(start, 'month')).assign(table=table)
+                  for table in TABLES.values()]
+        frame = pd.concat(frames, ignore_index=True)
+        frame['gross_value'] = frame['quantity_traded'] * frame['trade_price']
+        return frame.groupby(['table', 'symbol', 'scrip_code'], dropna=False).agg(
+            deals=('gross_value', 'size'), gross_value=('gross_value', 'sum'),
+            unique_clients=('client_name', 'nunique'))
+    _, timings['raw month'] = timed(raw_month)
+
+    backend.close()
+    return {'rows': sum(len(df) for df in deals.values()), **timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Digest cost from rollups as history grows')
+    parser.add_argument('--months', default='1,3,12', help='Comma-separated history lengths in months')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiple of one production day per trading day')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    stages = ['add', 'week digest', 'month digest', 'raw month']
+    print(f"{'months':>7}{'rows':>10}" + ''.join(f"{stage:>15}" for stage in stages))
+    with tempfile.TemporaryDirectory() as tmp:
+        for months in [int(m) for m in args.months.split(',')]:
+            result = run(months, args.scale, os.path.join(tmp, f'rollups_{months}.sqlite'))
+            print(f"{months:>7}{result['rows']:>10}" + ''.join(f"{result[stage]:>14.3f}s" for stage in stages))
+
+
+if __name__ == "__main__":
+    main()
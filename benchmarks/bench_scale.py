@@ -0,0 +1,97 @@
+"""
+Pipeline stages at multiples of production volume, on synthetic deals
+
+For each scale, synthetic_data.py generates one trading day of raw NSE
+frames and BSE pages, then times the stages that grow with volume:
+parsing/cleaning (NSE _normalize, BSE read_html + _clean_*), investor and
+watchlist matching, store_data into the SQLite stand-in, and rendering the
+email body and Telegram summary.
+
+Usage:
+    python benchmarks/bench_scale.py --scales 10,100
+    python benchmarks/bench_scale.py --scales 1000 --investor-hit-rate 0.001
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_ledger import AlertLedger  # noqa: E402
+from main import (BSEDataFetcher, Config, DatabaseManager, EmailReporter, InvestorMonitor,  # noqa: E402
+                  NSEDataFetcher, TelegramNotifier)
+from replay import CapturedSMTP, CapturedTelegram, LocalSupabaseClient, ReplaySession  # noqa: E402
+from synthetic_data import SyntheticDeals, SyntheticSpec, to_bse_html, to_nsepython  # noqa: E402
+
+TABLES = {'nse_bulk': Config.TABLE_NSE_BULK, 'nse_block': Config.TABLE_NSE_BLOCK,
+          'bse_bulk': Config.TABLE_BSE_BULK, 'bse_block': Config.TABLE_BSE_BLOCK}
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(scale: float, investor_hit_rate: float, sink: str) -> dict:
+    trade_date = date(2025, 10, 3)
+    generator = SyntheticDeals(SyntheticSpec(start=trade_date, end=trade_date, scale=scale,
+                                             investor_hit_rate=investor_hit_rate))
+    deals = generator.all_deals()
+    raw = {key: to_nsepython(df) for key, df in deals.items() if key.startswith('nse')}
+    pages = {key: to_bse_html(df) for key, df in deals.items() if key.startswith('bse')}
+
+    nse = NSEDataFetcher(bulk_source=lambda: raw['nse_bulk'].copy(), block_source=lambda: raw['nse_block'].copy(),
+                         trade_date=trade_date)
+    bse = BSEDataFetcher(session=ReplaySession(pages), trade_date=trade_date)
+    timings = {}
+    data = {}
+    (data['nse_bulk'], data['nse_block']), timings['nse clean'] = timed(
+        lambda: (nse.fetch_bulk_deals(), nse.fetch_block_deals()))
+    (data['bse_bulk'], data['bse_block']), timings['bse parse+clean'] = timed(
+        lambda: (bse.fetch_bulk_deals(), bse.fetch_block_deals()))
+
+    client = LocalSupabaseClient(':memory:')
+    client.seed_monitored_investors(generator.monitored_investors())
+    client.seed_monitored_symbols(generator.monitored_symbols())
+    db = DatabaseManager(client=client)
+    monitor = InvestorMonitor(db, rules=[])
+    monitor.load_monitored_investors()
+
+    def match():
+        alerts = monitor.find_monitored_deals(data)
+        return alerts + monitor.find_symbol_alerts(data, alerts)
+    alerts, timings['match'] = timed(match)
+    _, timings['store_data'] = timed(lambda: [db.store_data(data[key], table) for key, table in TABLES.items()])
+
+    summary = {key: len(df) for key, df in data.items()}
+    email = EmailReporter(yag=CapturedSMTP(sink), ledger=AlertLedger(''))
+    telegram = TelegramNotifier(http=CapturedTelegram(sink), ledger=AlertLedger(''))
+    _, timings['render'] = timed(lambda: (email._create_email_body(summary, alerts),
+                                          telegram.send_daily_summary(summary, alerts)))
+    return {'rows': sum(summary.values()), 'alerts': len(alerts), **timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline stage timings at scale')
+    parser.add_argument('--scales', default='10,100', help='Comma-separated multiples of one production day')
+    parser.add_argument('--investor-hit-rate', type=float, default=0.01)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    stages = ['nse clean', 'bse parse+clean', 'match', 'store_data', 'render']
+    print(f"{'scale':>7}{'rows':>9}{'alerts':>8}" + ''.join(f"{stage:>17}" for stage in stages))
+    with tempfile.TemporaryDirectory() as sink:
+        for scale in [float(s) for s in args.scales.split(',')]:
+            result = run(scale, args.investor_hit_rate, sink)
+            print(f"{scale:>6.0f}x{result['rows']:>9}{result['alerts']:>8}"
+                  + ''.join(f"{result[stage]:>16.3f}s" for stage in stages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Storage and fetch benchmark against the local stand-ins
+
+Starts the PostgREST and NSE stand-ins with a fixed per-request latency
+(and optionally injected errors / throttling), then times:
+
+- PostgRESTBackend.insert_records: concurrent batches vs one at a time
+- NSEClient.fetch_deals over a multi-window range, with retries
+
+Every run with the same flags sees the same latencies and failures.
+
+Usage:
+    python benchmarks/bench_standins.py --rows 5000 --latency 0.05
+    python benchmarks/bench_standins.py --latency 0.05 --error-rate 0.2 --seed 3
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nse_client import NSEClient  # noqa: E402
+from resilient_http import RetryPolicy, ResilientHTTP  # noqa: E402
+from standins import Behaviour, NSEStandin, PostgRESTStandin  # noqa: E402
+from storage import PostgRESTBackend  # noqa: E402
+
+
+def rows(n: int):
+    return [{'deal_date': '2025-10-03', 'fetch_date': '2025-10-03', 'symbol': f'SYM{i % 500:04d}', 'security_name': 'Some Company Limited',
+             'client_name': f'CLIENT {i % 2000:05d}', 'buy_sell': 'BUY', 'quantity_traded': 1000 + i,
+             'trade_price': 100.5, 'remarks': '-', 'source': 'NSE', 'deal_category': 'BULK'} for i in range(n)]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in storage / fetch benchmark')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    behaviour = Behaviour(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    postgrest = PostgRESTStandin(behaviour=behaviour).start()
+    nse = NSEStandin(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), behaviour=behaviour).start()
+    try:
+        backend = PostgRESTBackend(postgrest.url, 'standin-key', batch_size=args.batch_size)
+        records = rows(args.rows)
+        batches = -(-len(records) // args.batch_size)
+        inserted, concurrent_s = timed(lambda: backend.insert_records('nse_bulk_deals', records))
+        _, sequential_s = timed(lambda: [backend.insert_records('nse_bulk_deals', records[i:i + args.batch_size])
+                                         for i in range(0, len(records), args.batch_size)])
+        print(f"Insert {len(records)} rows in {batches} batches at {args.latency * 1000:.0f}ms/request: "
+              f"concurrent {concurrent_s:.2f}s ({inserted} stored), sequential {sequential_s:.2f}s")
+
+        client = NSEClient(base_url=nse.url)
+        client.http = ResilientHTTP(client.session, RetryPolicy(retries=5, backoff=0.05, hedge=False))
+        deals, fetch_s = timed(lambda: client.fetch_deals('BULK', date(2025, 1, 1), date(2025, 12, 31)))
+        print(f"NSE fetch 2025 in 90-day windows: {len(deals)} deals in {fetch_s:.2f}s")
+        client.session.close()
+        for server in (postgrest, nse):
+            print(f"  {server.name}: {dict(server.stats)}")
+    finally:
+        postgrest.stop()
+        nse.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Bhavcopy Enrichment
+
+Puts each deal in the context of its stock's trading day, using the
+exchange's daily equity bhavcopy from a local directory (BHAVCOPY_DIR):
+
+    deal_value      quantity x price
+    day_volume      shares traded that day (all equity series)
+    day_delivery    shares delivered that day (NSE full bhavdata only)
+    day_close       closing price
+    pct_day_volume  deal quantity as % of day_volume
+    pct_delivery    deal quantity as % of day_delivery
+
+Recognized files (plain or .zip), found by trading date:
+
+    NSE  sec_bhavdata_full_03102025.csv                 OHLC, volume, delivery
+         BhavCopy_NSE_CM_0_0_0_20251003_F_0000.csv      UDiFF
+         cm03OCT2025bhav.csv                            legacy
+    BSE  BhavCopy_BSE_CM_0_0_0_20251003_F_0000.CSV      UDiFF
+         EQ_ISINCODE_031025.CSV                         legacy
+
+Each file is parsed once into a structured numpy array sorted by 64-bit
+identifier hash (symbol, scrip code and ISIN all point at the same row)
+and cached under BHAVCOPY_DIR/.cache as .npy; later loads memory-map it.
+Joining a deal frame is one searchsorted over the hashes of its distinct
+identifiers, so enrichment never loops over deals.
+"""
+
+import os
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from deal_schema import identifier_hash, normalize_identifier
+
+logger = logging.getLogger(__name__)
+
+BHAV_DTYPE = np.dtype([
+    ('key', '<u8'),
+    ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'), ('prev_close', '<f8'),
+    ('volume', '<f8'), ('turnover', '<f8'), ('trades', '<f8'), ('delivery', '<f8'),
+])
+VALUE_FIELDS = [name for name in BHAV_DTYPE.names if name != 'key']
+
+ENRICHED_COLUMNS = ['deal_value', 'day_volume', 'day_delivery', 'day_close', 'pct_day_volume', 'pct_delivery']
+
+# Equity series whose trades count towards a stock's day volume
+EQUITY_SERIES = {'EQ', 'BE', 'BZ', 'SM', 'ST', 'SZ'}
+
+# Deal identifier columns joined per exchange, first match wins
+JOIN_COLUMNS = {
+    'NSE': ('symbol', 'isin'),
+    'BSE': ('scrip_code', 'isin'),
+}
+
+# Source column -> normalized column, per file layout (matched on the header)
+LAYOUTS = {
+    'nse_full': {
+        'SYMBOL': 'symbol', 'SERIES': 'series', 'OPEN_PRICE': 'open', 'HIGH_PRICE': 'high',
+        'LOW_PRICE': 'low', 'CLOSE_PRICE': 'close', 'PREV_CLOSE': 'prev_close', 'TTL_TRD_QNTY': 'volume',
+        'TURNOVER_LACS': 'turnover', 'NO_OF_TRADES': 'trades', 'DELIV_QTY': 'delivery',
+    },
+    'udiff': {
+        'TckrSymb': 'symbol', 'FinInstrmId': 'scrip_code', 'ISIN': 'isin', 'SctySrs': 'series',
+        'FinInstrmTp': 'instrument', 'Src': 'source', 'OpnPric': 'open', 'HghPric': 'high', 'LwPric': 'low',
+        'ClsPric': 'close', 'PrvsClsgPric': 'prev_close', 'TtlTradgVol': 'volume', 'TtlTrfVal': 'turnover',
+        'TtlNbOfTxsExctd': 'trades',
+    },
+    'nse_legacy': {
+        'SYMBOL': 'symbol', 'SERIES': 'series', 'ISIN': 'isin', 'OPEN': 'open', 'HIGH': 'high', 'LOW': 'low',
+        'CLOSE': 'close', 'PREVCLOSE': 'prev_close', 'TOTTRDQTY': 'volume', 'TOTTRDVAL': 'turnover',
+        'TOTALTRADES': 'trades',
+    },
+    'bse_legacy': {
+        'SC_CODE': 'scrip_code', 'ISIN_CODE': 'isin', 'OPEN': 'open', 'HIGH': 'high', 'LOW': 'low',
+        'CLOSE': 'close', 'PREVCLOSE': 'prev_close', 'NO_OF_SHRS': 'volume', 'NET_TURNOV': 'turnover',
+        'NO_TRADES': 'trades',
+    },
+}
+# Header column that identifies each layout
+LAYOUT_MARKERS = {'nse_full': 'DELIV_QTY', 'udiff': 'TckrSymb', 'nse_legacy': 'TOTTRDQTY', 'bse_legacy': 'SC_CODE'}
+
+
+def bhavcopy_names(exchange: str, trade_date: date) -> List[str]:
+    """Candidate file names for a trading date, preferred first"""
+    if exchange == 'NSE':
+        names = [f"sec_bhavdata_full_{trade_date:%d%m%Y}.csv",
+                 f"BhavCopy_NSE_CM_0_0_0_{trade_date:%Y%m%d}_F_0000.csv",
+                 f"cm{trade_date:%d}{trade_date.strftime('%b').upper()}{trade_date:%Y}bhav.csv"]
+    else:
+        names = [f"BhavCopy_BSE_CM_0_0_0_{trade_date:%Y%m%d}_F_0000.csv",
+                 f"EQ_ISINCODE_{trade_date:%d%m%y}.csv"]
+    return [n for name in names for n in (name, name + '.zip')]
+
+
+def parse_bhavcopy(path: str) -> np.ndarray:
+    """Bhavcopy file -> BHAV_DTYPE records sorted by key"""
+    raw = pd.read_csv(path, dtype=str, skipinitialspace=True, keep_default_na=False)
+    raw.columns = [str(c).strip() for c in raw.columns]
+    layout = next((name for name, marker in LAYOUT_MARKERS.items() if marker in raw.columns), None)
+    if layout is None:
+        raise ValueError(f"Unrecognized bhavcopy layout in {path}: {list(raw.columns)[:6]}...")
+
+    mapping = LAYOUTS[layout]
+    df = raw[[c for c in mapping if c in raw.columns]].rename(columns=mapping)
+    df = df.apply(lambda column: column.str.strip())
+    if 'instrument' in df.columns:
+        df = df[df['instrument'].str.upper() == 'STK']
+    if 'series' in df.columns and df['series'].str.upper().isin(EQUITY_SERIES).any():
+        df = df[df['series'].str.upper().isin(EQUITY_SERIES)]
+
+    values = pd.DataFrame({field: pd.to_numeric(df[field].str.replace(',', ''), errors='coerce')
+                           if field in df.columns else np.nan for field in VALUE_FIELDS}, index=df.index)
+    if layout == 'nse_full':
+        values['turnover'] *= 1e5  # lakhs
+    ids = pd.DataFrame({column: df[column].map(normalize_identifier) if column in df.columns else ''
+                        for column in ('symbol', 'scrip_code', 'isin')}, index=df.index)
+
+    # A stock trading in several series: volumes add up, prices come from its busiest series
+    ids['_security'] = ids['isin'].where(ids['isin'] != '', ids['symbol'] + '|' + ids['scrip_code'])
+    values = values.assign(_security=ids['_security'].to_numpy())
+    order = values['volume'].fillna(-1).to_numpy().argsort(kind='stable')[::-1]
+    busiest = values.iloc[order].drop_duplicates('_security')
+    totals = values.groupby('_security')[['volume', 'turnover', 'trades', 'delivery']].sum(min_count=1)
+    merged = busiest.set_index('_security')
+    merged[totals.columns] = totals.loc[merged.index]
+    ids = ids.loc[busiest.index].set_index('_security')
+
+    hashes, rows = [], []
+    for position, security in enumerate(merged.index):
+        for column in ('symbol', 'scrip_code', 'isin'):
+            identifier = ids.at[security, column]
+            if identifier:
+                hashes.append(identifier_hash(column, identifier))
+                rows.append(position)
+
+    records = np.empty(len(hashes), dtype=BHAV_DTYPE)
+    records['key'] = np.array(hashes, dtype='<u8')
+    for field in VALUE_FIELDS:
+        records[field] = merged[field].to_numpy(dtype='float64')[np.array(rows, dtype=np.int64)]
+    records = records[np.argsort(records['key'], kind='stable')]
+    # A hash shared by two securities (e.g. one symbol in two ISINs) keeps the first
+    _, first = np.unique(records['key'], return_index=True)
+    return records[first]
+
+
+class Bhavcopy:
+    """One day's bhavcopy, memory-mapped and searchable by identifier"""
+
+    def __init__(self, records: np.ndarray, path: str = ''):
+        self.records = records
+        self.path = path
+        self.keys = np.ascontiguousarray(records['key'])
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = None) -> 'Bhavcopy':
+        """Parse path, or memory-map the array cached from an earlier parse"""
+        cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), '.cache')
+        cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}.{os.stat(path).st_mtime_ns}.npy")
+        if os.path.exists(cache_path):
+            return cls(np.load(cache_path, mmap_mode='r'), path)
+
+        records = parse_bhavcopy(path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(cache_path + '.tmp.npy', records)
+            os.replace(cache_path + '.tmp.npy', cache_path)
+            records = np.load(cache_path, mmap_mode='r')
+        except OSError as e:
+            logger.warning(f"Could not cache bhavcopy {path}: {e}")
+        logger.info(f"✓ Loaded bhavcopy {os.path.basename(path)} ({len(records)} identifiers)")
+        return cls(records, path)
+
+    def positions(self, df: pd.DataFrame, columns: Iterable[str]) -> np.ndarray:
+        """Record position per deal row (-1 where no identifier matches)"""
+        found = np.full(len(df), -1, dtype=np.int64)
+        if not len(self.keys):
+            return found
+        for column in columns:
+            if column not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[column])
+            names = [normalize_identifier(value) for value in uniques]
+            hashes = np.array([identifier_hash(column, name) if name else 0 for name in names], dtype='<u8')
+            at = np.minimum(np.searchsorted(self.keys, hashes), len(self.keys) - 1)
+            hit = (self.keys[at] == hashes) & (hashes != 0)
+            unique_positions = np.append(np.where(hit, at, -1), -1)  # code -1 (missing) lands last
+            row_positions = unique_positions[codes]
+            found = np.where(found < 0, row_positions, found)
+        return found
+
+
+class BhavcopyStore:
+    """Finds and caches bhavcopies in a directory by exchange and trading date"""
+
+    def __init__(self, directory: str, cache_dir: Optional[str] = None):
+        self.directory = directory
+        self.cache_dir = cache_dir or os.path.join(directory, '.cache')
+        self._loaded: Dict[Tuple[str, date], Optional[Bhavcopy]] = {}
+        self._files: Optional[Dict[str, str]] = None
+
+    def _find(self, exchange: str, trade_date: date) -> Optional[str]:
+        if self._files is None:
+            # Exchanges mix .csv / .CSV, so names are matched case-insensitively
+            try:
+                self._files = {name.lower(): os.path.join(self.directory, name) for name in os.listdir(self.directory)}
+            except OSError as e:
+                logger.warning(f"Cannot list bhavcopy directory {self.directory}: {e}")
+                self._files = {}
+        for name in bhavcopy_names(exchange, trade_date):
+            if name.lower() in self._files:
+                return self._files[name.lower()]
+        return None
+
+    def get(self, exchange: str, trade_date: date) -> Optional[Bhavcopy]:
+        key = (exchange, trade_date)
+        if key not in self._loaded:
+            path = self._find(exchange, trade_date)
+            bhavcopy = None
+            if path is None:
+                logger.warning(f"No {exchange} bhavcopy for {trade_date} in {self.directory}")
+            else:
+                try:
+                    bhavcopy = Bhavcopy.load(path, self.cache_dir)
+                except Exception as e:
+                    logger.error(f"Failed to load bhavcopy {path}: {e}")
+            self._loaded[key] = bhavcopy
+        return self._loaded[key]
+
+
+def enrich_deals(df: pd.DataFrame, store: Optional[BhavcopyStore], exchange: str) -> pd.DataFrame:
+    """df with ENRICHED_COLUMNS added (NaN where no bhavcopy row matches)"""
+    if df is None or df.empty:
+        return df
+
+    quantity = pd.to_numeric(df.get('quantity_traded'), errors='coerce').astype('float64').to_numpy()
+    price = pd.to_numeric(df.get('trade_price'), errors='coerce').astype('float64').to_numpy()
+    day = {field: np.full(len(df), np.nan) for field in ('volume', 'delivery', 'close')}
+
+    if store is not None and 'deal_date' in df.columns:
+        days = pd.to_datetime(df['deal_date'], errors='coerce').dt.normalize()
+        for trade_date in days.dropna().unique():
+            bhavcopy = store.get(exchange, pd.Timestamp(trade_date).date())
+            if bhavcopy is None:
+                continue
+            rows = np.flatnonzero((days == trade_date).to_numpy())
+            at = bhavcopy.positions(df.iloc[rows], JOIN_COLUMNS.get(exchange, ('symbol', 'isin')))
+            matched = at >= 0
+            for field in day:
+                day[field][rows[matched]] = bhavcopy.records[field][at[matched]]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume = np.where(day['volume'] > 0, day['volume'], np.nan)
+        delivery = np.where(day['delivery'] > 0, day['delivery'], np.nan)
+        return df.assign(
+            deal_value=quantity * price,
+            day_volume=day['volume'],
+            day_delivery=day['delivery'],
+            day_close=day['close'],
+            pct_day_volume=quantity / volume * 100,
+            pct_delivery=quantity / delivery * 100,
+        )
+
+
+def enrich_all(data: Dict[str, pd.DataFrame], store: Optional[BhavcopyStore]) -> Dict[str, pd.DataFrame]:
+    """enrich_deals for every fetched frame ('nse_bulk', 'bse_block', ...)"""
+    enriched = {}
+    for key, df in data.items():
+        exchange = key.split('_')[0].upper()
+        enriched[key] = enrich_deals(df, store, exchange)
+        if df is not None and not df.empty:
+            matched = int(enriched[key]['day_volume'].notna().sum())
+            logger.info(f"✓ Bhavcopy context for {matched}/{len(df)} {key} deals")
+    return enriched
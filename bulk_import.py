@@ -0,0 +1,216 @@
+"""
+Parallel Bulk Import of Saved Deal Pages and CSVs
+
+Parses years of saved BSE deal pages (HTML) or NSE deal CSVs on every core:
+
+- each file, or each newline-aligned byte range of a large CSV, is one task
+- tasks run in a ProcessPoolExecutor through the same cleaning code as the
+  daily fetchers (BSEDataFetcher._clean_*, NSEDataFetcher._normalize)
+- workers return Arrow IPC buffers, not pickled DataFrames
+- results are merged in input order and deduplicated in one pass
+
+Requires pyarrow.
+
+Usage:
+    python bulk_import.py bse_bulk saved/bse_bulk_*.html --store
+    python bulk_import.py nse_bulk history/*.csv --chunk-mb 16 --output nse_bulk.parquet
+"""
+
+import io
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from deal_schema import compact_deal_frame, deal_keys, drop_stored_deals
+
+logger = logging.getLogger(__name__)
+
+# kind -> (source, category)
+KINDS = {
+    'nse_bulk': ('NSE', 'BULK'),
+    'nse_block': ('NSE', 'BLOCK'),
+    'bse_bulk': ('BSE', 'BULK'),
+    'bse_block': ('BSE', 'BLOCK'),
+}
+
+# Imports keep every date found in the files
+ALL_DATES = (date(1990, 1, 1), date(2099, 12, 31))
+
+# (kind, path, offset, length); length None means the whole file
+Task = Tuple[str, str, int, Optional[int]]
+
+
+def plan_tasks(kind: str, paths: List[str], chunk_bytes: int) -> List[Task]:
+    """One task per file, large CSVs split into newline-aligned byte ranges"""
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if not path.lower().endswith('.csv') or size <= chunk_bytes:
+            tasks.append((kind, path, 0, None))
+            continue
+
+        with open(path, 'rb') as f:
+            f.readline()  # header goes with every range
+            offset = f.tell()
+            while offset < size:
+                f.seek(min(offset + chunk_bytes, size))
+                f.readline()
+                end = f.tell()
+                tasks.append((kind, path, offset, end - offset))
+                offset = end
+    return tasks
+
+
+def _read_raw(path: str, offset: int, length: Optional[int]) -> pd.DataFrame:
+    if path.lower().endswith(('.html', '.htm')):
+        for table in pd.read_html(path):
+            if len(table.columns) >= 3:
+                return table
+        return pd.DataFrame()
+
+    if length is None:
+        return pd.read_csv(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        body = f.read(length)
+    return pd.read_csv(io.BytesIO(header + body))
+
+
+def _to_arrow(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _init_worker():
+    # Per-file cleaning logs are noise across thousands of files
+    logging.getLogger('main').setLevel(logging.ERROR)
+
+
+def parse_task(task: Task) -> bytes:
+    """Worker: raw file (range) -> cleaned compact frame -> Arrow IPC bytes"""
+    from main import BSEDataFetcher, NSEDataFetcher
+
+    kind, path, offset, length = task
+    source, category = KINDS[kind]
+    raw = _read_raw(path, offset, length)
+    if raw.empty:
+        return _to_arrow(pd.DataFrame())
+
+    start, end = ALL_DATES
+    if source == 'BSE':
+        fetcher = BSEDataFetcher()
+        clean = fetcher._clean_bulk_deals_data if category == 'BULK' else fetcher._clean_block_deals_data
+        df = clean(raw, start, end)
+    else:
+        df = NSEDataFetcher()._normalize(raw, category, start, end, f"NSE {category.lower()} deals")
+    return _to_arrow(df)
+
+
+def merge_results(buffers: List[bytes], security_column: str) -> pd.DataFrame:
+    """Concatenate worker buffers in order and drop duplicate deals once"""
+    import pyarrow as pa
+    tables = [pa.ipc.open_stream(buffer).read_all() for buffer in buffers]
+    tables = [t for t in tables if t.num_rows]
+    if not tables:
+        return pd.DataFrame()
+
+    df = compact_deal_frame(pa.concat_tables(tables, promote_options='default').to_pandas())
+    keys = deal_keys(df, security_column)
+    duplicates = keys.duplicated()
+    if duplicates.any():
+        logger.info(f"Dropped {int(duplicates.sum())} duplicate deals across files")
+    return df[~duplicates.to_numpy()].reset_index(drop=True)
+
+
+def import_files(kind: str, paths: List[str], workers: Optional[int] = None,
+                 chunk_bytes: int = 16 * 1024 * 1024) -> pd.DataFrame:
+    """Parse paths on a process pool and return one deduplicated compact frame"""
+    tasks = plan_tasks(kind, paths, chunk_bytes)
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Importing {len(paths)} file(s) as {len(tasks)} task(s) on {workers} worker(s)")
+
+    started = time.perf_counter()
+    if workers == 1:
+        _init_worker()
+        buffers = [parse_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            # map() yields in task order, which keeps the merge deterministic
+            buffers = list(pool.map(parse_task, tasks))
+    parsed = time.perf_counter() - started
+
+    from storage import symbol_column
+    df = merge_results(buffers, symbol_column(kind))
+    logger.info(f"✓ Parsed {len(df)} {kind} deals in {parsed:.1f}s "
+                f"({len(tasks) / parsed if parsed else 0:.1f} tasks/s)")
+    return df
+
+
+def store(df: pd.DataFrame, kind: str) -> int:
+    """Write deals not already stored into the configured backend"""
+    from main import Config, DatabaseManager
+    from storage import symbol_column
+
+    table_name = {
+        'nse_bulk': Config.TABLE_NSE_BULK,
+        'nse_block': Config.TABLE_NSE_BLOCK,
+        'bse_bulk': Config.TABLE_BSE_BULK,
+        'bse_block': Config.TABLE_BSE_BLOCK,
+    }[kind]
+    db_manager = DatabaseManager()
+    dates = df['deal_date'].dropna()
+    if not dates.empty:
+        stored = db_manager.query_deals(table_name, dates.min().date(), dates.max().date())
+        df = drop_stored_deals(df, stored, symbol_column(table_name))
+    if df.empty:
+        logger.info(f"All imported deals are already in {table_name}")
+        return 0
+    return len(df) if db_manager.store_data(df, table_name) else 0
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Parallel import of saved BSE pages / NSE CSVs')
+    parser.add_argument('kind', choices=sorted(KINDS), help='What the files contain')
+    parser.add_argument('paths', nargs='+', help='Files or glob patterns')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--chunk-mb', type=float, default=16, help='Split CSVs larger than this many MB')
+    parser.add_argument('--output', help='Write the merged deals to this .csv or .parquet file')
+    parser.add_argument('--store', action='store_true', help='Store new deals in the configured database')
+    args = parser.parse_args()
+
+    # Importing main sets up the shared console/file logging, and importing
+    # it before the pool starts means forked workers inherit it
+    import main as automation  # noqa: F401
+    paths = sorted({p for pattern in args.paths for p in (glob.glob(pattern) or [pattern])})
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        logger.error(f"Files not found: {missing}")
+        sys.exit(1)
+
+    df = import_files(args.kind, paths, args.workers, int(args.chunk_mb * 1024 * 1024))
+    if args.output:
+        if args.output.endswith('.parquet'):
+            df.to_parquet(args.output, index=False)
+        else:
+            df.to_csv(args.output, index=False)
+        logger.info(f"✓ Wrote {len(df)} deals to {args.output}")
+    if args.store:
+        logger.info(f"✓ Stored {store(df, args.kind)} new {args.kind} deals")
+
+
+if __name__ == "__main__":
+    main()
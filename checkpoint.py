@@ -0,0 +1,88 @@
+"""
+Run Checkpoints
+
+DealsAutomation.run() persists each finished step to a run directory keyed
+by trading date (RUN_DIR/2025-10-03, or 2025-10-03-catch-up):
+
+    manifest.json     finished steps and sent notifications, with timestamps
+    fetch.pkl         the fetched frames (pickled, so compact dtypes survive)
+    match.pkl         monitored-investor and rule alerts
+    ...
+
+`python main.py --resume` loads finished steps instead of redoing them and
+never resends a notification recorded as sent. A run without --resume
+starts the trading date over.
+"""
+
+import os
+import json
+import pickle
+import shutil
+import logging
+from datetime import date, datetime
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class RunCheckpoint:
+    """Step outputs and sent notifications for one trading date"""
+
+    def __init__(self, root: str, trade_date: date, resume: bool = False, suffix: str = ''):
+        self.trade_date = trade_date
+        self.path = os.path.join(root, f"{trade_date.isoformat()}{suffix}")
+        self.manifest_path = os.path.join(self.path, 'manifest.json')
+
+        if not resume and os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path, exist_ok=True)
+
+        self.manifest: Dict[str, Any] = {'trade_date': trade_date.isoformat(), 'steps': {}, 'sent': {}}
+        if resume and os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, encoding='utf-8') as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Unreadable checkpoint manifest {self.manifest_path}, starting over: {e}")
+        if resume and self.manifest['steps']:
+            logger.info(f"↺ Resuming run {self.path}: finished steps {list(self.manifest['steps'])}")
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+
+    def done(self, step: str) -> bool:
+        return step in self.manifest['steps']
+
+    def mark_done(self, step: str):
+        self.manifest['steps'][step] = datetime.now().isoformat(timespec='seconds')
+        self._save_manifest()
+
+    def save(self, step: str, value: Any):
+        """Persist a step's output, then mark the step finished"""
+        path = os.path.join(self.path, f"{step}.pkl")
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        self.mark_done(step)
+
+    def load(self, step: str) -> Any:
+        with open(os.path.join(self.path, f"{step}.pkl"), 'rb') as f:
+            return pickle.load(f)
+
+    # ------------------------------------------------------------------
+    # Notifications
+    # ------------------------------------------------------------------
+
+    def sent(self, channel: str) -> bool:
+        return channel in self.manifest['sent']
+
+    def mark_sent(self, channel: str):
+        self.manifest['sent'][channel] = datetime.now().isoformat(timespec='seconds')
+        self._save_manifest()
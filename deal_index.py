@@ -0,0 +1,423 @@
+"""
+Inverted Index over Archived Deal Files
+
+Looks up "all deals for SYMBOL" or "everything CLIENT ever did" in the
+CSV output of save_to_csv (and Parquet exports from bulk_import) without
+scanning every file:
+
+    DEAL_INDEX_DIR/
+        index.json              indexed files (path, size, mtime, live) and segments
+        seg_000001/
+            hashes.npy          sorted 64-bit key hashes        (uint64)
+            ranges.npy          [start, count] into postings    (uint64, n x 2)
+            postings.npy        (file, row, byte offset) per key, grouped by key
+
+Keys are blake2b hashes of (field, value) for the symbol, scrip_code and
+isin columns, the normalized client name and each word of it. Each
+ingest writes one new segment; once there are more than MAX_SEGMENTS
+they are merged into one, dropping postings of files that were
+re-indexed or replaced.
+
+Segments are opened with np.load(mmap_mode='r'): a lookup is a binary
+search of each segment's hashes plus a slice of its postings, and rows
+are read back by seeking to their CSV byte offsets (Parquet: only the
+row groups that hold them), so the cost follows the size of the result
+rather than the size of the archive.
+
+Usage:
+    python deal_index.py add NSE_Bulk_Deals_*.csv archive/*.csv
+    python deal_index.py symbol RELIANCE
+    python deal_index.py client "GRAVITON RESEARCH CAPITAL LLP"
+    python deal_index.py client HRTI --partial --output hrti.csv
+"""
+
+import io
+import os
+import re
+import sys
+import glob
+import json
+import shutil
+import logging
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from deal_schema import (MISSING_IDENTIFIERS, compact_deal_frame, concat_deal_frames, csv_dtypes,
+                         identifier_hash, normalize_identifier)
+
+logger = logging.getLogger(__name__)
+
+POSTING = np.dtype([('file', '<u4'), ('row', '<u4'), ('offset', '<u8')])
+
+# field -> source column
+FIELDS = {
+    'symbol': 'symbol',
+    'scrip_code': 'scrip_code',
+    'isin': 'isin',
+    'client': 'client_name',
+    'client_token': 'client_name',
+}
+ID_COLUMNS = sorted(set(FIELDS.values()))
+
+MAX_SEGMENTS = 8
+
+_NON_WORD = re.compile(r'[^A-Z0-9&]+')
+
+
+def normalize_client(value) -> str:
+    """Upper-case words only: 'Graviton Research Capital, LLP.' -> 'GRAVITON RESEARCH CAPITAL LLP'"""
+    text = ' '.join(_NON_WORD.sub(' ', str(value).upper()).split())
+    return '' if text in MISSING_IDENTIFIERS else text
+
+
+def _keys(field: str, values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """(row, key hash) pairs for one field, hashing each distinct value once"""
+    codes, uniques = pd.factorize(values)
+    normalize = normalize_client if FIELDS[field] == 'client_name' else normalize_identifier
+    names = [normalize(value) for value in uniques]
+
+    if field == 'client_token':
+        tokens = [sorted(set(name.split())) for name in names]
+    else:
+        tokens = [[name] if name else [] for name in names]
+    lengths = np.array([len(t) for t in tokens] + [0], dtype=np.int64)
+    flat = np.array([identifier_hash(field, token) for t in tokens for token in t], dtype='<u8')
+    starts = np.concatenate([[0], np.cumsum(lengths[:-1])])
+
+    # codes of -1 (missing) index the trailing zero length
+    per_row = lengths[codes]
+    rows = np.repeat(np.arange(len(values), dtype='<u4'), per_row)
+    within = np.arange(per_row.sum()) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+    return rows, flat[np.repeat(starts[codes], per_row) + within]
+
+
+def _csv_row_offsets(path: str) -> np.ndarray:
+    """Byte offset of every data record (quoted newlines stay in their record)"""
+    offsets = []
+    with open(path, 'rb') as f:
+        position = len(f.readline())
+        record_start, quotes = None, 0
+        for line in f:
+            if record_start is None:
+                record_start, quotes = position, 0
+            quotes += line.count(b'"')
+            position += len(line)
+            if quotes % 2 == 0:
+                if line.strip():
+                    offsets.append(record_start)
+                record_start = None
+    return np.array(offsets, dtype='<u8')
+
+
+def _read_csv_records(f, offsets: Iterable[int]) -> bytes:
+    records = []
+    for offset in offsets:
+        f.seek(int(offset))
+        record = f.readline()
+        while record.count(b'"') % 2:
+            line = f.readline()
+            if not line:
+                break
+            record += line
+        records.append(record if record.endswith(b'\n') else record + b'\n')
+    return b''.join(records)
+
+
+def _is_parquet(path: str) -> bool:
+    return path.endswith('.parquet')
+
+
+class DealIndex:
+    """Symbol / client postings over archived deal files"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'index.json')
+        self.manifest: Dict = {'files': [], 'segments': [], 'next_segment': 1}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, encoding='utf-8') as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Unreadable deal index manifest {self.manifest_path}, starting empty: {e}")
+        self._opened: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._live: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return sum(entry['rows'] for entry in self.manifest['files'] if entry['live'])
+
+    def _live_files(self) -> np.ndarray:
+        """live flag per file id"""
+        if self._live is None:
+            self._live = np.array([entry['live'] for entry in self.manifest['files']], dtype=bool)
+        return self._live
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def add_files(self, paths: Iterable[str]) -> int:
+        """Index new or changed files; returns the number of rows indexed"""
+        os.makedirs(self.root, exist_ok=True)
+        by_path = {entry['path']: file_id for file_id, entry in enumerate(self.manifest['files'])
+                   if entry['live']}
+
+        hashes, postings, files = [], [], []
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                logger.warning(f"Cannot index {path}: {e}")
+                continue
+            previous = by_path.get(path)
+            if previous is not None:
+                entry = self.manifest['files'][previous]
+                if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    continue
+                # Rewritten (e.g. a same-day rerun of save_to_csv): its old postings die
+                entry['live'] = False
+                self._live = None
+
+            try:
+                ids, row_offsets = self._read_ids(path)
+            except Exception as e:
+                logger.error(f"Failed to index {path}: {e}")
+                continue
+
+            file_id = len(self.manifest['files']) + len(files)
+            for field, column in FIELDS.items():
+                if column not in ids.columns:
+                    continue
+                rows, keys = _keys(field, ids[column])
+                part = np.empty(len(rows), dtype=POSTING)
+                part['file'] = file_id
+                part['row'] = rows
+                part['offset'] = row_offsets[rows] if row_offsets is not None else 0
+                hashes.append(keys)
+                postings.append(part)
+            files.append({'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                          'rows': len(ids), 'live': True})
+
+        if not files:
+            self._save_manifest()
+            return 0
+
+        self.manifest['files'].extend(files)
+        self._live = None
+        self._write_segment(np.concatenate(hashes) if hashes else np.array([], dtype='<u8'),
+                            np.concatenate(postings) if postings else np.empty(0, dtype=POSTING))
+        if len(self.manifest['segments']) > MAX_SEGMENTS:
+            self.compact()
+        indexed = sum(entry['rows'] for entry in files)
+        logger.info(f"✓ Indexed {indexed} deals from {len(files)} file(s) into {self.root}")
+        return indexed
+
+    @staticmethod
+    def _read_ids(path: str) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+        """Identifier columns as text, plus CSV record offsets (None for Parquet)"""
+        if _is_parquet(path):
+            import pyarrow.parquet as pq
+            columns = [c for c in pq.read_schema(path).names if c in ID_COLUMNS]
+            return pd.read_parquet(path, columns=columns).astype(object), None
+
+        ids = pd.read_csv(path, usecols=lambda c: c in ID_COLUMNS, dtype=str,
+                          keep_default_na=False, skip_blank_lines=True)
+        row_offsets = _csv_row_offsets(path)
+        if len(row_offsets) != len(ids):
+            raise ValueError(f"found {len(row_offsets)} records but pandas read {len(ids)} rows")
+        return ids, row_offsets
+
+    def _write_segment(self, hashes: np.ndarray, postings: np.ndarray):
+        order = np.argsort(hashes, kind='stable')
+        hashes, postings = hashes[order], postings[order]
+        keys, starts, counts = np.unique(hashes, return_index=True, return_counts=True)
+
+        name = f"seg_{self.manifest['next_segment']:06d}"
+        path = os.path.join(self.root, name)
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, 'hashes.npy'), keys.astype('<u8'))
+        np.save(os.path.join(tmp_path, 'ranges.npy'), np.stack([starts, counts], axis=1).astype('<u8'))
+        np.save(os.path.join(tmp_path, 'postings.npy'), postings)
+        os.replace(tmp_path, path)
+
+        self.manifest['segments'].append(name)
+        self.manifest['next_segment'] += 1
+        self._save_manifest()
+
+    def compact(self):
+        """Merge all segments into one, dropping postings of dead files"""
+        live = self._live_files()
+        hashes, postings = [], []
+        for name in self.manifest['segments']:
+            segment_hashes, ranges, segment_postings = self._segment(name)
+            expanded = np.repeat(np.asarray(segment_hashes), np.asarray(ranges[:, 1]).astype(np.int64))
+            keep = live[segment_postings['file']]
+            hashes.append(expanded[keep])
+            postings.append(np.asarray(segment_postings)[keep])
+
+        old = list(self.manifest['segments'])
+        self.manifest['segments'] = []
+        self._opened.clear()
+        self._write_segment(np.concatenate(hashes) if hashes else np.array([], dtype='<u8'),
+                            np.concatenate(postings) if postings else np.empty(0, dtype=POSTING))
+        for name in old:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        logger.info(f"✓ Compacted {len(old)} index segments into {self.manifest['segments'][-1]}")
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _segment(self, name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if name not in self._opened:
+            path = os.path.join(self.root, name)
+            self._opened[name] = tuple(np.load(os.path.join(path, f'{part}.npy'), mmap_mode='r')
+                                       for part in ('hashes', 'ranges', 'postings'))
+        return self._opened[name]
+
+    def lookup(self, field: str, value: str) -> np.ndarray:
+        """Postings of live files for one (field, normalized value)"""
+        key = np.uint64(identifier_hash(field, value))
+        parts = []
+        for name in self.manifest['segments']:
+            hashes, ranges, postings = self._segment(name)
+            i = int(np.searchsorted(hashes, key))
+            if i < len(hashes) and hashes[i] == key:
+                start, count = int(ranges[i, 0]), int(ranges[i, 1])
+                parts.append(np.asarray(postings[start:start + count]))
+        if not parts:
+            return np.empty(0, dtype=POSTING)
+        found = np.concatenate(parts)
+        return found[self._live_files()[found['file']]]
+
+    @staticmethod
+    def _row_ids(postings: np.ndarray) -> np.ndarray:
+        return (postings['file'].astype(np.uint64) << np.uint64(32)) | postings['row'].astype(np.uint64)
+
+    def _union(self, parts: List[np.ndarray]) -> np.ndarray:
+        found = np.concatenate(parts)
+        _, first = np.unique(self._row_ids(found), return_index=True)
+        return found[first]
+
+    def symbol_postings(self, identifier: str) -> np.ndarray:
+        """Rows whose symbol, scrip code or ISIN is identifier"""
+        identifier = normalize_identifier(identifier)
+        return self._union([self.lookup(field, identifier) for field in ('symbol', 'scrip_code', 'isin')])
+
+    def client_postings(self, name: str, partial: bool = False) -> np.ndarray:
+        """Rows for a client: the exact normalized name, or with partial=True every word of it"""
+        name = normalize_client(name)
+        if not partial:
+            return self.lookup('client', name)
+        found = None
+        for token in sorted(set(name.split())):
+            postings = self.lookup('client_token', token)
+            if found is not None:
+                postings = postings[np.isin(self._row_ids(postings), self._row_ids(found))]
+            found = postings
+            if not len(found):
+                break
+        return found if found is not None else np.empty(0, dtype=POSTING)
+
+    def read(self, postings: np.ndarray) -> pd.DataFrame:
+        """Deal rows for postings, reading only those rows"""
+        frames = []
+        # CSV records from files with the same header are parsed together
+        csv_records: Dict[bytes, List[bytes]] = {}
+        for file_id in np.unique(postings['file']):
+            path = self.manifest['files'][int(file_id)]['path']
+            rows = np.sort(postings[postings['file'] == file_id], order='row')
+            try:
+                if _is_parquet(path):
+                    frames.append(self._read_parquet_rows(path, rows['row']))
+                else:
+                    with open(path, 'rb') as f:
+                        header = f.readline()
+                        csv_records.setdefault(header, []).append(_read_csv_records(f, rows['offset']))
+            except OSError as e:
+                logger.warning(f"Indexed file {path} is unreadable: {e}")
+
+        for header, records in csv_records.items():
+            columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+            frames.append(compact_deal_frame(pd.read_csv(io.BytesIO(header + b''.join(records)),
+                                                         dtype=csv_dtypes(columns))))
+        return concat_deal_frames(frames)
+
+    @staticmethod
+    def _read_parquet_rows(path: str, rows: np.ndarray) -> pd.DataFrame:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        bounds = np.cumsum([0] + [parquet.metadata.row_group(i).num_rows
+                                  for i in range(parquet.num_row_groups)])
+        wanted = rows.astype(np.int64)
+        groups = np.unique(np.searchsorted(bounds, wanted, side='right') - 1)
+        table = parquet.read_row_groups(groups.tolist())
+        # Row numbers within the row groups that were read
+        local = np.concatenate([np.arange(bounds[g], bounds[g + 1]) for g in groups])
+        return compact_deal_frame(table.take(pa.array(np.searchsorted(local, wanted))).to_pandas())
+
+    def deals_for_symbol(self, identifier: str) -> pd.DataFrame:
+        return self.read(self.symbol_postings(identifier))
+
+    def deals_for_client(self, name: str, partial: bool = False) -> pd.DataFrame:
+        return self.read(self.client_postings(name, partial))
+
+
+def main():
+    """Command line entry point"""
+    from main import Config
+
+    parser = argparse.ArgumentParser(description='Inverted symbol / client index over archived deal files')
+    parser.add_argument('--index-dir', default=Config.DEAL_INDEX_DIR or 'deal_index')
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='Index CSV / Parquet files (new or changed only)')
+    add.add_argument('paths', nargs='+', help='Files or glob patterns')
+    symbol = commands.add_parser('symbol', help='Deals for an NSE symbol, BSE scrip code or ISIN')
+    symbol.add_argument('identifier')
+    client = commands.add_parser('client', help='Deals by a client')
+    client.add_argument('name')
+    client.add_argument('--partial', action='store_true', help='Match names containing every word given')
+    commands.add_parser('compact', help='Merge index segments')
+    for command in (symbol, client):
+        command.add_argument('--output', help='Write the deals to this CSV instead of printing them')
+    args = parser.parse_args()
+
+    index = DealIndex(args.index_dir)
+    if args.command == 'add':
+        paths = sorted({p for pattern in args.paths for p in (glob.glob(pattern) or [pattern])})
+        index.add_files(paths)
+        return
+    if args.command == 'compact':
+        index.compact()
+        return
+
+    if args.command == 'symbol':
+        df = index.deals_for_symbol(args.identifier)
+    else:
+        df = index.deals_for_client(args.name, args.partial)
+    logger.info(f"✓ {len(df)} deals found in {len(index)} indexed")
+    if args.output:
+        df.to_csv(args.output, index=False)
+        logger.info(f"✓ Wrote {args.output}")
+    elif not df.empty:
+        with pd.option_context('display.max_rows', 200, 'display.width', 200):
+            print(df.to_string(index=False))
+    else:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
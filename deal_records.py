@@ -0,0 +1,215 @@
+"""
+Typed Alert Records
+
+Alerts (monitored investors, watchlist hits, rule matches) travel from
+InvestorMonitor to EmailReporter and TelegramNotifier as DealAlert
+records instead of string-keyed dicts:
+
+- DealAlert is a slotted dataclass: fixed fields, no per-instance dict
+- display strings (quantity, price, date, ...) are formatted on first
+  use and memoized on the record, so every recipient and notifier
+  reuses them
+- AlertBatch keeps many alerts as column arrays. It is built straight
+  from a frame of matched deals, with no row-by-row iteration, and
+  turned back into a frame for grouping (activity_summary.py)
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(slots=True)
+class DealAlert:
+    """One deal that triggered an alert"""
+
+    investor: str
+    investor_category: str
+    priority: int
+    deal_type: str
+    source: str
+    date: Any
+    symbol: str
+    security_name: str
+    action: str
+    quantity: float
+    price: float
+    remarks: str = ''
+    rule: str = ''
+    watchlist: str = ''
+    # Client name on the deal (investor may be a monitored display name)
+    client: str = ''
+    # Market context from the bhavcopy (NaN when unknown, see bhavcopy.py)
+    pct_day_volume: float = float('nan')
+    pct_delivery: float = float('nan')
+    # Memoized display values, filled on first use
+    _date_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _quantity_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _price_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _kind_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _volume_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _fingerprint: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def is_buy(self) -> bool:
+        # NSE says BUY/SELL, BSE says B/S
+        return self.action.strip().upper()[:1] == 'B'
+
+    @property
+    def date_text(self) -> str:
+        if self._date_text is None:
+            self._date_text = self.date.strftime('%d-%b') if hasattr(self.date, 'strftime') else str(self.date)
+        return self._date_text
+
+    @property
+    def quantity_text(self) -> str:
+        if self._quantity_text is None:
+            # Missing quantities / prices are NaN, shown as '-'
+            self._quantity_text = f"{self.quantity:,.0f}" if self.quantity == self.quantity else '-'
+        return self._quantity_text
+
+    @property
+    def price_text(self) -> str:
+        if self._price_text is None:
+            self._price_text = f"₹{self.price:,.2f}" if self.price == self.price else '-'
+        return self._price_text
+
+    @property
+    def kind_text(self) -> str:
+        if self._kind_text is None:
+            self._kind_text = f"{self.source} {self.deal_type}"
+        return self._kind_text
+
+    @property
+    def volume_text(self) -> str:
+        """'3.2% of day vol, 8.1% of delivery', or '' without a bhavcopy"""
+        if self._volume_text is None:
+            parts = []
+            if self.pct_day_volume == self.pct_day_volume:
+                parts.append(f"{self.pct_day_volume:.1f}% of day vol")
+            if self.pct_delivery == self.pct_delivery:
+                parts.append(f"{self.pct_delivery:.1f}% of delivery")
+            self._volume_text = ', '.join(parts)
+        return self._volume_text
+
+    @property
+    def key(self) -> tuple:
+        """Deal identity used to drop the same deal alerted by several matchers"""
+        if self._key is None:
+            self._key = (self.source, self.deal_type, str(self.date), self.symbol, self.client,
+                         self.action, self.quantity, self.price)
+        return self._key
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable text identity of the deal (alert ledger key)"""
+        if self._fingerprint is None:
+            self._fingerprint = '|'.join((
+                self.source, self.deal_type, self.symbol, self.investor, self.action,
+                f"{self.quantity:.0f}", str(self.price), str(self.date)[:10],
+            ))
+        return self._fingerprint
+
+
+# Record fields in constructor order (memo slots are not data)
+ALERT_FIELDS = tuple(f.name for f in fields(DealAlert) if f.init)
+
+
+def _shared(column: pd.Series, convert) -> np.ndarray:
+    """convert(value) per row, computed once per distinct value
+
+    Rows holding the same value share one Python object, which is what
+    keeps thousands of alerts on the same symbol or date small.
+    """
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    converted = np.array([convert(value) for value in uniques] + [convert(None)], dtype=object)
+    return converted[codes]
+
+
+def _text(df: pd.DataFrame, *columns: str) -> np.ndarray:
+    """First non-empty value across columns, '' where all are missing"""
+    result = np.full(len(df), '', dtype=object)
+    for column in reversed(columns):
+        if column in df.columns:
+            values = _shared(df[column], lambda v: '' if v is None or pd.isna(v) else str(v))
+            result = np.where(values != '', values, result)
+    return result
+
+
+def _number(df: pd.DataFrame, column: str, default: float = 0.0) -> np.ndarray:
+    """Column as float64: default when the column is absent, NaN where a value is missing"""
+    if column not in df.columns:
+        return np.full(len(df), default)
+    return pd.to_numeric(df[column], errors='coerce').astype('float64').to_numpy()
+
+
+class AlertBatch:
+    """Column-oriented container for many DealAlert records"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self._records: Optional[List[DealAlert]] = None
+
+    def __len__(self) -> int:
+        return len(self.columns['investor'])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **overrides) -> 'AlertBatch':
+        """Alerts for every row of a matched deal frame
+
+        Fields default to the deal columns (client_name, symbol / scrip_code,
+        buy_sell, ...). overrides set a field to a constant or to an
+        array with one value per row.
+        """
+        n = len(df)
+        columns = {
+            'investor': _text(df, 'client_name', 'scrip_name'),
+            'investor_category': np.full(n, '', dtype=object),
+            'priority': np.zeros(n, dtype=np.int64),
+            'deal_type': _text(df, 'deal_category'),
+            'source': _text(df, 'source'),
+            'date': _shared(df['deal_date'], lambda v: pd.NaT if v is None else v) if 'deal_date' in df.columns
+                    else np.full(n, '', dtype=object),
+            'symbol': _text(df, 'symbol', 'scrip_code'),
+            'security_name': _text(df, 'security_name', 'scrip_name'),
+            'action': _text(df, 'buy_sell'),
+            'quantity': _number(df, 'quantity_traded'),
+            'price': _number(df, 'trade_price'),
+            'remarks': _text(df, 'remarks'),
+            'rule': np.full(n, '', dtype=object),
+            'watchlist': np.full(n, '', dtype=object),
+            'client': _text(df, 'client_name'),
+            'pct_day_volume': _number(df, 'pct_day_volume', np.nan),
+            'pct_delivery': _number(df, 'pct_delivery', np.nan),
+        }
+        for name, value in overrides.items():
+            if name not in columns:
+                raise ValueError(f"Unknown alert field {name}")
+            if np.ndim(value) == 0:
+                value = np.full(n, value, dtype=columns[name].dtype)
+            columns[name] = np.asarray(value, dtype=columns[name].dtype)
+        return cls(columns)
+
+    @classmethod
+    def from_records(cls, records: Iterable[DealAlert]) -> 'AlertBatch':
+        records = list(records)
+        columns = {name: np.array([getattr(r, name) for r in records], dtype=object) for name in ALERT_FIELDS}
+        for name in ('quantity', 'price', 'pct_day_volume', 'pct_delivery'):
+            columns[name] = columns[name].astype('float64')
+        columns['priority'] = columns['priority'].astype(np.int64)
+        batch = cls(columns)
+        batch._records = records
+        return batch
+
+    def records(self) -> List[DealAlert]:
+        """DealAlert per row, built once"""
+        if self._records is None:
+            values = [self.columns[name].tolist() for name in ALERT_FIELDS]
+            self._records = [DealAlert(*row) for row in zip(*values)]
+        return self._records
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: self.columns[name] for name in ALERT_FIELDS})
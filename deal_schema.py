@@ -0,0 +1,167 @@
+"""
+Compact In-Memory Schema for Deal Frames
+
+Every normalized deal frame (fetchers, history loaders) is converted to
+the dtypes below instead of Python objects:
+
+- categoricals for repeated strings (source, category, side, symbol, client)
+- nullable int64 for quantities, float64 for prices
+- datetime64 for deal_date / fetch_date
+
+It also holds the identifier normalization and hashing shared by the
+archive index (deal_index.py) and the bhavcopy cache (bhavcopy.py).
+"""
+
+import hashlib
+import logging
+from typing import Iterable, Union
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype, union_categoricals
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DTYPE = CategoricalDtype(['NSE', 'BSE'])
+DEAL_CATEGORY_DTYPE = CategoricalDtype(['BULK', 'BLOCK'])
+
+DEAL_DTYPES = {
+    'deal_date': 'datetime64[ns]',
+    'fetch_date': 'datetime64[ns]',
+    'source': SOURCE_DTYPE,
+    'deal_category': DEAL_CATEGORY_DTYPE,
+    'buy_sell': 'category',
+    'symbol': 'category',
+    'security_name': 'category',
+    'scrip_code': 'category',
+    'scrip_name': 'category',
+    'client_name': 'category',
+    'remarks': 'category',
+    'isin': 'category',
+    'quantity_traded': 'Int64',
+    'trade_price': 'float64',
+}
+
+DATE_COLUMNS = [col for col, dtype in DEAL_DTYPES.items() if dtype == 'datetime64[ns]']
+
+# Columns that identify one deal, besides the security itself
+DEAL_KEY_COLUMNS = ['deal_date', 'client_name', 'buy_sell', 'quantity_traded', 'trade_price']
+
+# Identifier text that means "no value"
+MISSING_IDENTIFIERS = frozenset({'', 'NAN', 'NONE', 'NULL', '-'})
+
+
+def normalize_identifier(value) -> str:
+    """Symbol / scrip code / ISIN as indexed: upper-case, '' when missing"""
+    text = str(value).strip().upper()
+    # Numeric scrip codes may have been written from a float column
+    if text.endswith('.0') and text[:-2].isdigit():
+        text = text[:-2]
+    return '' if text in MISSING_IDENTIFIERS else text
+
+
+def identifier_hash(field: str, value: str) -> int:
+    """64-bit key of a normalized identifier within a field"""
+    digest = hashlib.blake2b(f"{field}\0{value}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def compact_deal_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the known deal columns of df to the compact schema"""
+    if df is None:
+        return df
+
+    df = df.copy()
+    for column, dtype in DEAL_DTYPES.items():
+        if column not in df.columns:
+            continue
+        try:
+            if column in DATE_COLUMNS:
+                df[column] = pd.to_datetime(df[column], errors='coerce')
+            elif dtype == 'Int64':
+                values = pd.to_numeric(df[column], errors='coerce')
+                df[column] = values.round().astype('Int64')
+            elif dtype == 'float64':
+                df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+            elif isinstance(dtype, CategoricalDtype):
+                df[column] = df[column].astype(dtype)
+            else:
+                values = df[column]
+                if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+                        or isinstance(values.dtype, CategoricalDtype)):
+                    # e.g. BSE scrip codes parsed as ints - keep them as text
+                    values = values.astype('string')
+                df[column] = values.astype('category')
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Could not compact column {column}: {e}")
+    return df
+
+
+def deal_keys(df: pd.DataFrame, security_column: str = 'symbol') -> pd.Series:
+    """One string key per deal, comparable between fetched and stored frames
+
+    security_column is 'symbol' for NSE tables and 'scrip_code' for BSE.
+    """
+    if df is None or df.empty:
+        return pd.Series([], dtype=str)
+
+    key = pd.Series('', index=df.index)
+    for column in [security_column] + DEAL_KEY_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if column == 'deal_date':
+            values = pd.to_datetime(values, errors='coerce').dt.strftime('%Y-%m-%d')
+        elif column == 'quantity_traded':
+            values = pd.to_numeric(values, errors='coerce').round().astype('Int64')
+        elif column == 'trade_price':
+            values = pd.to_numeric(values, errors='coerce').round(4)
+        else:
+            values = values.astype(object).where(values.notna(), '')
+        key = key + '|' + values.astype(str).str.strip().str.upper()
+    return key
+
+
+def drop_stored_deals(df: pd.DataFrame, stored: pd.DataFrame, security_column: str = 'symbol') -> pd.DataFrame:
+    """Anti-join: rows of df whose deal key is not already in stored"""
+    if df is None or df.empty or stored is None or stored.empty:
+        return df
+    stored_keys = set(deal_keys(stored, security_column))
+    return df[~deal_keys(df, security_column).isin(stored_keys)]
+
+
+def concat_deal_frames(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compact frames without falling back to object columns
+
+    pd.concat only keeps a categorical when every input has identical
+    categories, so the categories are unioned first.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    for column in frames[0].columns:
+        if all(column in f.columns and isinstance(f[column].dtype, CategoricalDtype) for f in frames):
+            merged = union_categoricals([f[column] for f in frames]).categories
+            frames = [f.assign(**{column: f[column].cat.set_categories(merged)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def csv_dtypes(header: Iterable[str]) -> dict:
+    """read_csv dtypes that parse string columns as categories directly,
+    so object columns never materialize"""
+    return {col: 'category' for col, kind in DEAL_DTYPES.items()
+            if col in header and (kind == 'category' or isinstance(kind, CategoricalDtype))}
+
+
+def read_deals_csv(paths: Union[str, Iterable[str]]) -> pd.DataFrame:
+    """Load archived deal CSVs (save_to_csv output) straight into the compact schema"""
+    if isinstance(paths, str):
+        paths = [paths]
+
+    frames = []
+    for path in paths:
+        header = pd.read_csv(path, nrows=0).columns
+        frames.append(compact_deal_frame(pd.read_csv(path, dtype=csv_dtypes(header))))
+    return concat_deal_frames(frames)
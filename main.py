@@ -12,18 +12,39 @@ CRITICAL FIXES:
 Repository: https://github.com/kinggerald2007-png/bulk-deal-tracker-cloud
 """
 
+import io
 import os
 import sys
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import argparse
+from datetime import datetime, date, timedelta
+from typing import Callable, Dict, List, Optional
 import traceback
 
 import pandas as pd
-from nsepython import get_bulkdeals, get_blockdeals
 from supabase import create_client, Client
 import yagmail
-import requests
+
+from alert_ledger import AlertLedger, report_fingerprint
+from activity_summary import RANKINGS, summarize_activity, top_activity
+from alert_rules import AlertRule, AlertRuleEngine, load_rules
+from async_http import SyncSession
+from bhavcopy import ENRICHED_COLUMNS, BhavcopyStore, enrich_all
+from checkpoint import RunCheckpoint
+from deal_index import DealIndex
+from deal_records import AlertBatch, DealAlert
+from deal_schema import compact_deal_frame, concat_deal_frames, drop_stored_deals
+from nse_client import NSEClient
+from rate_limiter import get_limiter
+from resilient_http import ResilientHTTP, CircuitOpenError, endpoint_of
+from rollups import (DealRollups, build_digest, digest_fingerprint, digest_title, format_digest_html,
+                     format_digest_text, load_history)
+from security_master import SecurityMaster, load_security_master
+from storage import (StorageBackend, PostgRESTBackend, SupabaseBackend, DualWriteBackend,
+                     create_embedded_backend, symbol_column)
+from streak_detector import StreakDetector, StreakState
+from trading_calendar import TradingCalendar, get_calendar
+from watchlist import SymbolWatchlist
 
 # ============================================================================
 # CONFIGURATION
@@ -45,12 +66,87 @@ class Config:
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '8272854685:AAEYFdXp0TRXpiMLaE1-7AYoyTNjE_vuvOI')
     TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '1524238363')
     
+    # Service base URLs; point them at local stand-ins (python -m standins) for offline runs
+    NSE_BASE_URL = os.getenv('NSE_BASE_URL', 'https://www.nseindia.com').rstrip('/')
+    NSE_ARCHIVE_URL = os.getenv('NSE_ARCHIVE_URL', 'https://archives.nseindia.com').rstrip('/')
+    BSE_BASE_URL = os.getenv('BSE_BASE_URL', 'https://www.bseindia.com').rstrip('/')
+    TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+    
     # Database Table Names
     TABLE_NSE_BULK = "nse_bulk_deals"
     TABLE_NSE_BLOCK = "nse_block_deals"
     TABLE_BSE_BULK = "bse_bulk_deals"
     TABLE_BSE_BLOCK = "bse_block_deals"
     TABLE_MONITORED = "monitored_investors"
+    TABLE_MONITORED_SYMBOLS = "monitored_symbols"
+    
+    # Storage backend: supabase | supabase-sdk | sqlite | duckdb
+    # (supabase talks PostgREST over the shared async HTTP client)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'supabase').lower()
+    LOCAL_DB_PATH = os.getenv('LOCAL_DB_PATH', '')
+    # Mirror Supabase writes into a local engine (sqlite | duckdb) for analytics
+    DUAL_WRITE_LOCAL = os.getenv('DUAL_WRITE_LOCAL', '').lower()
+    
+    # Security master (ISIN <-> NSE symbol <-> BSE scrip code)
+    SECURITY_MASTER_PATH = os.getenv('SECURITY_MASTER_PATH', 'security_master.json')
+    # Comma-separated local equity list files (NSE EQUITY_L.csv, BSE Equity.csv)
+    SECURITY_MASTER_SOURCES = [p for p in os.getenv('SECURITY_MASTER_SOURCES', '').split(',') if p]
+    
+    # Declarative alert rules (see alert_rules.py)
+    ALERT_RULES_PATH = os.getenv('ALERT_RULES_PATH', 'alert_rules.json')
+    
+    # Alerts already sent per recipient (see alert_ledger.py); empty path disables it
+    ALERT_LEDGER_PATH = os.getenv('ALERT_LEDGER_PATH', 'alert_ledger.bin')
+    ALERT_LEDGER_TTL_DAYS = float(os.getenv('ALERT_LEDGER_TTL_DAYS', '7'))
+    
+    # Above this many alerts, notifications show the top investor x symbol groups instead
+    # of individual deals, ranked by 'value' (gross traded value) or 'priority'
+    ALERT_SUMMARY_TOP_N = int(os.getenv('ALERT_SUMMARY_TOP_N', '10'))
+    ALERT_SUMMARY_BY = os.getenv('ALERT_SUMMARY_BY', 'value').lower()
+    if ALERT_SUMMARY_BY not in RANKINGS:
+        # Fail at startup rather than halfway through sending notifications
+        raise ValueError(f"ALERT_SUMMARY_BY={ALERT_SUMMARY_BY!r} is not one of {', '.join(RANKINGS)}")
+    
+    # Streak / first-appearance pattern events (see streak_detector.py); the state path is
+    # relative to the output dir, empty disables the detector
+    PATTERN_STATE_PATH = os.getenv('PATTERN_STATE_PATH', 'pattern_state.npy')
+    PATTERN_MIN_STREAK = int(os.getenv('PATTERN_MIN_STREAK', '3'))
+    # A never-seen client trading at least this much (crores) in a day
+    PATTERN_LARGE_CLIENT_CR = float(os.getenv('PATTERN_LARGE_CLIENT_CR', '25'))
+    # History folded into a new (empty) state before its first run
+    PATTERN_SEED_DAYS = int(os.getenv('PATTERN_SEED_DAYS', '365'))
+    PATTERN_ALERT_PRIORITY = int(os.getenv('PATTERN_ALERT_PRIORITY', '1'))
+    
+    # Trading calendar (see trading_calendar.py): extra holidays file, and whether
+    # scheduled runs on weekends / exchange holidays exit without fetching
+    TRADING_HOLIDAYS_PATH = os.getenv('TRADING_HOLIDAYS_PATH', '')
+    SKIP_NON_TRADING_DAYS = os.getenv('SKIP_NON_TRADING_DAYS', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Day / week / month rollups kept up to date by every store (see rollups.py); empty
+    # rollups are first seeded with this many days of stored deals
+    ROLLUPS_ENABLED = os.getenv('ROLLUPS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    ROLLUP_SEED_DAYS = int(os.getenv('ROLLUP_SEED_DAYS', '400'))
+    # Securities listed in the periodic digest (--digest)
+    DIGEST_TOP_N = int(os.getenv('DIGEST_TOP_N', '10'))
+    
+    # Catch-up mode: fetch everything since the last stored deal_date
+    CATCH_UP = os.getenv('CATCH_UP', '').lower() in ('1', 'true', 'yes')
+    
+    # Per-trading-date step checkpoints for --resume (relative to the output dir)
+    RUN_DIR = os.getenv('RUN_DIR', 'runs')
+    
+    # Directory of daily bhavcopy files for deal size vs day volume / delivery (see bhavcopy.py);
+    # empty disables the enrichment
+    BHAVCOPY_DIR = os.getenv('BHAVCOPY_DIR', '')
+    
+    # Symbol / client index over the saved CSVs (relative to the output dir); empty disables it
+    DEAL_INDEX_DIR = os.getenv('DEAL_INDEX_DIR', 'deal_index')
+    
+    # Local deal query service (see query_service.py)
+    QUERY_SERVICE_PORT = int(os.getenv('QUERY_SERVICE_PORT', '8765'))
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+    # How often the service checks for deals stored by other processes
+    QUERY_REFRESH_SECONDS = float(os.getenv('QUERY_REFRESH_SECONDS', '30'))
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -74,17 +170,37 @@ def setup_logging():
     stream_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
     
-    # Get logger and add handlers
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
-    logger.addHandler(stream_handler)
-    logger.addHandler(file_handler)
+    # Attach handlers to the root logger so helper modules
+    # (replay, storage, ...) log to the same console and file
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(stream_handler)
+    root_logger.addHandler(file_handler)
+    
+    # Keep HTTP client libraries quiet
+    for noisy in ('httpx', 'httpcore', 'urllib3', 'hpack'):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
     
-    return logger
+    return logging.getLogger(__name__)
 
 logger = setup_logging()
 
 
+def filter_deal_dates(df: pd.DataFrame, start: date, end: date, label: str) -> pd.DataFrame:
+    """Keep deals with start <= deal_date <= end, logging what was dropped"""
+    unique_dates = df['deal_date'].unique()
+    logger.info(f"  {label} data dates: {unique_dates}")
+    
+    # Unparseable dates become NaT and fall outside the window
+    deal_dates = pd.to_datetime(df['deal_date'], errors='coerce')
+    in_window = (deal_dates >= pd.Timestamp(start)) & (deal_dates <= pd.Timestamp(end))
+    dropped = int((~in_window).sum())
+    if dropped > 0:
+        window = f"{start}" if start == end else f"{start} to {end}"
+        logger.warning(f"  ⚠️  Found {dropped} {label} from other dates - keeping {window} only")
+    return df[in_window].copy()
+
+
 # ============================================================================
 # BSE DATA FETCHER
 # ============================================================================
@@ -96,22 +212,49 @@ class BSEDataFetcher:
     We fetch the data for completeness but cannot monitor specific investors.
     """
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        })
-    
-    def fetch_bulk_deals(self) -> Optional[pd.DataFrame]:
-        """Fetch bulk deals from BSE"""
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    }
+    
+    def __init__(self, session=None, trade_date: Optional[date] = None,
+                 security_master: Optional[SecurityMaster] = None):
+        # session can be swapped for a recorded/replay session
+        self._session = session
+        if session is not None:
+            session.headers.update(self.HEADERS)
+        self._http = None
+        self.trade_date = trade_date
+        self.security_master = security_master
+    
+    @property
+    def session(self):
+        # Created on first use, so parse-only users (bulk_import) never open one
+        if self._session is None:
+            self._session = SyncSession()
+            self._session.headers.update(self.HEADERS)
+        return self._session
+    
+    @property
+    def http(self) -> ResilientHTTP:
+        """Retries, hedging and the bseindia.com circuit breaker"""
+        if self._http is None:
+            self._http = ResilientHTTP(self.session)
+        return self._http
+    
+    def fetch_bulk_deals(self, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """Fetch bulk deals from BSE
+
+        The page lists the last few sessions, so catch-up mode (start/end)
+        keeps every row in the window instead of only today's.
+        """
         try:
             logger.info("Fetching BSE bulk deals...")
-            url = "https://www.bseindia.com/markets/equity/EQReports/bulk_deals.aspx?expandable=3"
-            response = self.session.get(url, timeout=30)
+            url = f"{Config.BSE_BASE_URL}/markets/equity/EQReports/bulk_deals.aspx?expandable=3"
+            response = self.http.get(url, timeout=30)
             response.raise_for_status()
             tables = pd.read_html(response.content)
             
@@ -131,7 +274,7 @@ class BSEDataFetcher:
                 logger.warning("No valid BSE bulk deals table found")
                 return None
             
-            df = self._clean_bulk_deals_data(df)
+            df = self._clean_bulk_deals_data(df, start, end)
             
             if df is not None and not df.empty:
                 logger.info(f"✓ Fetched {len(df)} BSE bulk deals")
@@ -141,17 +284,24 @@ class BSEDataFetcher:
             
             return df
             
+        except CircuitOpenError as e:
+            logger.error(f"Skipping BSE bulk deals: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error fetching BSE bulk deals: {e}")
             logger.error(traceback.format_exc())
             return None
     
-    def fetch_block_deals(self) -> Optional[pd.DataFrame]:
-        """Fetch block deals from BSE"""
+    def fetch_block_deals(self, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """Fetch block deals from BSE
+
+        The page lists the last few sessions, so catch-up mode (start/end)
+        keeps every row in the window instead of only today's.
+        """
         try:
             logger.info("Fetching BSE block deals...")
-            url = "https://www.bseindia.com/markets/equity/EQReports/block_deals.aspx?expandable=3"
-            response = self.session.get(url, timeout=30)
+            url = f"{Config.BSE_BASE_URL}/markets/equity/EQReports/block_deals.aspx?expandable=3"
+            response = self.http.get(url, timeout=30)
             response.raise_for_status()
             tables = pd.read_html(response.content)
             
@@ -171,7 +321,7 @@ class BSEDataFetcher:
                 logger.warning("No valid BSE block deals table found")
                 return None
             
-            df = self._clean_block_deals_data(df)
+            df = self._clean_block_deals_data(df, start, end)
             
             if df is not None and not df.empty:
                 logger.info(f"✓ Fetched {len(df)} BSE block deals")
@@ -181,12 +331,16 @@ class BSEDataFetcher:
             
             return df
             
+        except CircuitOpenError as e:
+            logger.error(f"Skipping BSE block deals: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error fetching BSE block deals: {e}")
             logger.error(traceback.format_exc())
             return None
     
-    def _clean_bulk_deals_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _clean_bulk_deals_data(self, df: pd.DataFrame, start: Optional[date] = None,
+                              end: Optional[date] = None) -> pd.DataFrame:
         """Clean and standardize bulk deals data"""
         logger.debug(f"BSE bulk deals raw columns: {df.columns.tolist()}")
         
@@ -218,23 +372,18 @@ class BSEDataFetcher:
             logger.warning("    Investor monitoring will only work for NSE data")
             df['client_name'] = ''
         
-        # Parse date and filter to today only
+        # Parse date and filter to today (or the catch-up window)
+        today = self.trade_date or datetime.now().date()
+        start, end = start or today, end or today
         if 'deal_date' in df.columns:
             df['deal_date'] = pd.to_datetime(df['deal_date'], format='%d/%m/%Y', errors='coerce').dt.date
+            df = filter_deal_dates(df, start, end, "BSE bulk deals")
             
-            # Verify and filter to today's data
-            unique_dates = df['deal_date'].unique()
-            logger.info(f"  BSE bulk data dates: {unique_dates}")
-            
-            today = datetime.now().date()
-            today_deals = df[df['deal_date'] == today]
-            old_deals = df[df['deal_date'] != today]
-            
-            if len(old_deals) > 0:
-                logger.warning(f"  ⚠️  Found {len(old_deals)} BSE bulk deals from other dates - filtering to today only")
-                df = today_deals
+            oldest = df['deal_date'].min() if len(df) else None
+            if oldest and oldest > start:
+                logger.warning(f"  ⚠️  BSE bulk page starts at {oldest} - deals before that are not recoverable here")
         else:
-            df['deal_date'] = datetime.now().date()
+            df['deal_date'] = self.trade_date or datetime.now().date()
         
         # Add metadata
         df['fetch_date'] = datetime.now().date()
@@ -256,10 +405,14 @@ class BSEDataFetcher:
             df['trade_price'] = df['trade_price'].astype(str).str.replace(',', '').str.replace(' ', '')
             df['trade_price'] = pd.to_numeric(df['trade_price'], errors='coerce')
         
-        logger.info(f"✓ Processed {len(df)} BSE bulk deals for TODAY")
+        df = compact_deal_frame(df)
+        if self.security_master:
+            df = self.security_master.enrich(df, 'BSE')
+        logger.info(f"✓ Processed {len(df)} BSE bulk deals for {start}" + (f" to {end}" if end != start else ""))
         return df
     
-    def _clean_block_deals_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _clean_block_deals_data(self, df: pd.DataFrame, start: Optional[date] = None,
+                              end: Optional[date] = None) -> pd.DataFrame:
         """Clean and standardize block deals data"""
         logger.debug(f"BSE block deals raw columns: {df.columns.tolist()}")
         
@@ -289,23 +442,18 @@ class BSEDataFetcher:
             logger.warning("    Investor monitoring will only work for NSE data")
             df['client_name'] = ''
         
-        # Parse date and filter to today only
+        # Parse date and filter to today (or the catch-up window)
+        today = self.trade_date or datetime.now().date()
+        start, end = start or today, end or today
         if 'deal_date' in df.columns:
             df['deal_date'] = pd.to_datetime(df['deal_date'], format='%d/%m/%Y', errors='coerce').dt.date
+            df = filter_deal_dates(df, start, end, "BSE block deals")
             
-            # Verify and filter to today's data
-            unique_dates = df['deal_date'].unique()
-            logger.info(f"  BSE block data dates: {unique_dates}")
-            
-            today = datetime.now().date()
-            today_deals = df[df['deal_date'] == today]
-            old_deals = df[df['deal_date'] != today]
-            
-            if len(old_deals) > 0:
-                logger.warning(f"  ⚠️  Found {len(old_deals)} BSE block deals from other dates - filtering to today only")
-                df = today_deals
+            oldest = df['deal_date'].min() if len(df) else None
+            if oldest and oldest > start:
+                logger.warning(f"  ⚠️  BSE block page starts at {oldest} - deals before that are not recoverable here")
         else:
-            df['deal_date'] = datetime.now().date()
+            df['deal_date'] = self.trade_date or datetime.now().date()
         
         df['fetch_date'] = datetime.now().date()
         df['source'] = 'BSE'
@@ -323,7 +471,10 @@ class BSEDataFetcher:
             df['trade_price'] = df['trade_price'].astype(str).str.replace(',', '').str.replace(' ', '')
             df['trade_price'] = pd.to_numeric(df['trade_price'], errors='coerce')
         
-        logger.info(f"✓ Processed {len(df)} BSE block deals for TODAY")
+        df = compact_deal_frame(df)
+        if self.security_master:
+            df = self.security_master.enrich(df, 'BSE')
+        logger.info(f"✓ Processed {len(df)} BSE block deals for {start}" + (f" to {end}" if end != start else ""))
         return df
 
 
@@ -332,125 +483,192 @@ class BSEDataFetcher:
 # ============================================================================
 
 class NSEDataFetcher:
-    """Fetch NSE data using nsepython library
+    """Fetch NSE data through the first-party JSON client (nse_client.py)
     
-    NOTE: NSE API returns only TODAY's deals by default.
+    Today's deals and date ranges (catch-up mode) both come from NSE's
+    historical JSON API. If that fails, today's deals fall back to
+    nsepython (imported only then) and ranges to the historical CSV.
     """
     
-    def fetch_bulk_deals(self) -> Optional[pd.DataFrame]:
-        """Fetch bulk deals from NSE (today's data only)"""
+    COLUMN_MAPPING = {
+        'Date': 'deal_date',
+        'Symbol': 'symbol',
+        'Security Name': 'security_name',
+        'Client Name': 'client_name',
+        'Buy/Sell': 'buy_sell',
+        'Buy / Sell': 'buy_sell',
+        'Quantity Traded': 'quantity_traded',
+        'Trade Price / Wght. Avg. Price': 'trade_price',
+        'Remarks': 'remarks'
+    }
+    
+    # Today's deals as published in NSE's archive CSVs (what nsepython reads)
+    ARCHIVE_PATHS = {
+        'BULK': '/content/equities/bulk.csv',
+        'BLOCK': '/content/equities/block.csv',
+    }
+    
+    def __init__(self, bulk_source=None, block_source=None, trade_date: Optional[date] = None,
+                 security_master: Optional[SecurityMaster] = None, range_source=None,
+                 range_stream=None, client: Optional[NSEClient] = None):
+        # Sources return a raw or already-decoded deals frame; replay mode swaps them
+        self.bulk_source = bulk_source or (lambda: self._fetch_today('BULK'))
+        self.block_source = block_source or (lambda: self._fetch_today('BLOCK'))
+        # range_source(category, start, end) returns deals for a date range
+        self.range_source = range_source or self._fetch_range
+        # range_stream(category, start, end) yields raw CSV chunks for a range
+        self.range_stream = range_stream or self._stream_historical_csv
+        self.trade_date = trade_date
+        self.security_master = security_master
+        self._client = client
+        self._http = None
+        self._csv_fetcher = None
+    
+    def fetch_bulk_deals(self, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """Fetch bulk deals from NSE (today's data, or start..end in catch-up mode)"""
+        return self._fetch('BULK', self.bulk_source, start, end)
+    
+    def fetch_block_deals(self, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """Fetch block deals from NSE (today's data, or start..end in catch-up mode)"""
+        return self._fetch('BLOCK', self.block_source, start, end)
+    
+    @property
+    def client(self) -> NSEClient:
+        if self._client is None:
+            self._client = NSEClient(base_url=Config.NSE_BASE_URL)
+        return self._client
+    
+    @property
+    def http(self) -> ResilientHTTP:
+        """Retries and circuit breaker for the NSE archive host (nsepython and archive CSVs)"""
+        if self._http is None:
+            self._http = ResilientHTTP(SyncSession())
+        return self._http
+    
+    def _fetch_today(self, category: str) -> pd.DataFrame:
+        """Today's deals from the JSON API, falling back to nsepython"""
+        today = self.trade_date or datetime.now().date()
         try:
-            logger.info("Fetching NSE bulk deals...")
-            df = get_bulkdeals()
-            
-            if isinstance(df, pd.DataFrame) and not df.empty:
-                # Strip spaces from column names
-                df.columns = df.columns.str.strip()
-                
-                column_mapping = {
-                    'Date': 'deal_date',
-                    'Symbol': 'symbol',
-                    'Security Name': 'security_name',
-                    'Client Name': 'client_name',
-                    'Buy/Sell': 'buy_sell',
-                    'Quantity Traded': 'quantity_traded',
-                    'Trade Price / Wght. Avg. Price': 'trade_price',
-                    'Remarks': 'remarks'
-                }
-                
-                df = df.rename(columns=column_mapping)
-                
-                # Parse deal_date to verify it's today's data
-                if 'deal_date' in df.columns:
-                    df['deal_date'] = pd.to_datetime(df['deal_date'], format='%d-%b-%Y', errors='coerce').dt.date
-                    
-                    # Log date range for verification
-                    unique_dates = df['deal_date'].unique()
-                    logger.info(f"  Data dates: {unique_dates}")
-                    
-                    today = datetime.now().date()
-                    today_deals = df[df['deal_date'] == today]
-                    old_deals = df[df['deal_date'] != today]
-                    
-                    if len(old_deals) > 0:
-                        logger.warning(f"  ⚠️  Found {len(old_deals)} deals from other dates - filtering to today only")
-                        df = today_deals
-                
-                df['fetch_date'] = datetime.now().date()
-                df['source'] = 'NSE'
-                df['deal_category'] = 'BULK'
-                
-                # Normalize client names for matching
-                if 'client_name' in df.columns:
-                    df['client_name'] = df['client_name'].astype(str).str.strip().str.upper()
-                
-                logger.info(f"✓ Fetched {len(df)} NSE bulk deals for TODAY")
-                if 'client_name' in df.columns and len(df) > 0:
-                    logger.info(f"  Sample clients: {df['client_name'].head(3).tolist()}")
-                return df
-            else:
-                logger.warning("No NSE bulk deals data available for today")
-                return None
-                
+            return self.client.fetch_deals(category, today, today)
         except Exception as e:
-            logger.error(f"Error fetching NSE bulk deals: {e}")
-            logger.error(traceback.format_exc())
-            return None
+            logger.warning(f"NSE JSON API failed for {category.lower()} deals ({e}) - falling back to nsepython")
+        
+        try:
+            import nsepython  # heavy import, only paid on the fallback path
+        except ImportError:
+            return self._read_archive(category)
+        # nsepython reads the archive CSV itself; retry/hedge/break it like any other fetch
+        fetch = nsepython.get_bulkdeals if category == 'BULK' else nsepython.get_blockdeals
+        return self.http.call(endpoint_of(Config.NSE_ARCHIVE_URL + self.ARCHIVE_PATHS[category]), fetch)
     
-    def fetch_block_deals(self) -> Optional[pd.DataFrame]:
-        """Fetch block deals from NSE (today's data only)"""
+    def _fetch_range(self, category: str, start: date, end: date) -> Optional[pd.DataFrame]:
+        """A date range from the JSON API, falling back to the historical CSV"""
         try:
-            logger.info("Fetching NSE block deals...")
-            df = get_blockdeals()
+            return self.client.fetch_deals(category, start, end)
+        except Exception as e:
+            logger.warning(f"NSE JSON API failed for {category.lower()} deals ({e}) - falling back to CSV download")
+            return self._fetch_historical_csv(category, start, end)
+    
+    def _read_archive(self, category: str) -> pd.DataFrame:
+        """Today's archive CSV, downloaded through the shared async HTTP client"""
+        response = self.http.get(Config.NSE_ARCHIVE_URL + self.ARCHIVE_PATHS[category], timeout=30)
+        response.raise_for_status()
+        return pd.read_csv(io.BytesIO(response.content))
+    
+    def _fetch_historical_csv(self, category: str, start: date, end: date) -> Optional[pd.DataFrame]:
+        """One historical CSV request covering the whole range"""
+        if self._csv_fetcher is None:
+            from nse_csv_fetcher import NSECSVFetcher
+            self._csv_fetcher = NSECSVFetcher(base_url=Config.NSE_BASE_URL)
+        fetch = self._csv_fetcher.fetch_bulk_deals_csv if category == 'BULK' \
+            else self._csv_fetcher.fetch_block_deals_csv
+        return fetch(start.strftime('%d-%m-%Y'), end.strftime('%d-%m-%Y'))
+    
+    def _stream_historical_csv(self, category: str, start: date, end: date):
+        """Historical CSV for the range, parsed chunk by chunk as it downloads"""
+        if self._csv_fetcher is None:
+            from nse_csv_fetcher import NSECSVFetcher
+            self._csv_fetcher = NSECSVFetcher(base_url=Config.NSE_BASE_URL)
+        return self._csv_fetcher.stream_deals_csv(category, start.strftime('%d-%m-%Y'), end.strftime('%d-%m-%Y'))
+    
+    def stream_range(self, category: str, start: date, end: date, sink) -> int:
+        """Normalize a historical range chunk by chunk and hand each chunk to sink(df)
+        
+        Only one chunk is in memory at a time. Returns the number of rows
+        passed to the sink.
+        """
+        label = f"NSE {category.lower()} deals"
+        logger.info(f"Streaming {label} for {start} to {end}...")
+        rows = 0
+        for raw in self.range_stream(category, start, end):
+            df = self._normalize(raw, category, start, end, label)
+            if df is not None and not df.empty:
+                sink(df)
+                rows += len(df)
+        logger.info(f"✓ Streamed {rows} {label} for {start} to {end}")
+        return rows
+    
+    def _normalize(self, df: pd.DataFrame, category: str, start: date, end: date, label: str) -> pd.DataFrame:
+        """Raw NSE frame -> compact schema, limited to start..end"""
+        # Strip spaces from column names
+        df.columns = df.columns.str.strip()
+        df = df.rename(columns=self.COLUMN_MAPPING)
+        if category == 'BLOCK' and 'remarks' in df.columns:
+            df = df.drop(columns=['remarks'])
+        
+        # Parse deal_date (unless the JSON client already did) and keep only the requested window
+        if 'deal_date' in df.columns:
+            if not pd.api.types.is_datetime64_any_dtype(df['deal_date']):
+                df['deal_date'] = pd.to_datetime(df['deal_date'], format='%d-%b-%Y', errors='coerce')
+            df['deal_date'] = df['deal_date'].dt.date
+            df = filter_deal_dates(df, start, end, label)
+        
+        df['fetch_date'] = datetime.now().date()
+        df['source'] = 'NSE'
+        df['deal_category'] = category
+        
+        # Historical CSVs format numbers with thousands separators
+        for column in ('quantity_traded', 'trade_price'):
+            if column in df.columns and df[column].dtype == object:
+                df[column] = pd.to_numeric(df[column].str.replace(',', ''), errors='coerce')
+        
+        # Normalize client names for matching
+        if 'client_name' in df.columns:
+            df['client_name'] = df['client_name'].astype(str).str.strip().str.upper()
+        
+        df = compact_deal_frame(df)
+        if self.security_master:
+            df = self.security_master.enrich(df, 'NSE')
+        return df
+    
+    def _fetch(self, category: str, source, start: Optional[date], end: Optional[date]) -> Optional[pd.DataFrame]:
+        label = f"NSE {category.lower()} deals"
+        try:
+            today = self.trade_date or datetime.now().date()
+            if start is not None:
+                end = end or today
+                logger.info(f"Fetching {label} for {start} to {end} (catch-up)...")
+                df = self.range_source(category, start, end)
+            else:
+                logger.info(f"Fetching {label}...")
+                start = end = today
+                df = source()
             
             if isinstance(df, pd.DataFrame) and not df.empty:
-                df.columns = df.columns.str.strip()
-                
-                column_mapping = {
-                    'Date': 'deal_date',
-                    'Symbol': 'symbol',
-                    'Security Name': 'security_name',
-                    'Client Name': 'client_name',
-                    'Buy/Sell': 'buy_sell',
-                    'Quantity Traded': 'quantity_traded',
-                    'Trade Price / Wght. Avg. Price': 'trade_price'
-                }
-                
-                df = df.rename(columns=column_mapping)
-                
-                # Parse deal_date to verify it's today's data
-                if 'deal_date' in df.columns:
-                    df['deal_date'] = pd.to_datetime(df['deal_date'], format='%d-%b-%Y', errors='coerce').dt.date
-                    
-                    # Log date range for verification
-                    unique_dates = df['deal_date'].unique()
-                    logger.info(f"  Data dates: {unique_dates}")
-                    
-                    today = datetime.now().date()
-                    today_deals = df[df['deal_date'] == today]
-                    old_deals = df[df['deal_date'] != today]
-                    
-                    if len(old_deals) > 0:
-                        logger.warning(f"  ⚠️  Found {len(old_deals)} deals from other dates - filtering to today only")
-                        df = today_deals
-                
-                df['fetch_date'] = datetime.now().date()
-                df['source'] = 'NSE'
-                df['deal_category'] = 'BLOCK'
-                
-                if 'client_name' in df.columns:
-                    df['client_name'] = df['client_name'].astype(str).str.strip().str.upper()
-                
-                logger.info(f"✓ Fetched {len(df)} NSE block deals for TODAY")
+                df = self._normalize(df, category, start, end, label)
+                logger.info(f"✓ Fetched {len(df)} {label} for {start}" + (f" to {end}" if end != start else ""))
                 if 'client_name' in df.columns and len(df) > 0:
                     logger.info(f"  Sample clients: {df['client_name'].head(3).tolist()}")
                 return df
             else:
-                logger.warning("No NSE block deals data available for today")
+                logger.warning(f"No {label} data available for {start}" + (f" to {end}" if end != start else ""))
                 return None
                 
+        except CircuitOpenError as e:
+            logger.error(f"Skipping {label}: {e}")
+            return None
         except Exception as e:
-            logger.error(f"Error fetching NSE block deals: {e}")
+            logger.error(f"Error fetching {label}: {e}")
             logger.error(traceback.format_exc())
             return None
 
@@ -460,15 +678,49 @@ class NSEDataFetcher:
 # ============================================================================
 
 class DatabaseManager:
-    """Handles Supabase database operations"""
+    """Handles database operations through a pluggable storage backend"""
+    
+    def __init__(self, client: Optional[Client] = None, backend: Optional[StorageBackend] = None):
+        if backend is not None:
+            self.backend = backend
+        elif client is not None:
+            # Pre-built client (e.g. the local replay stand-in)
+            logger.info(f"Using injected database client: {type(client).__name__}")
+            self.backend = SupabaseBackend(client)
+        elif Config.STORAGE_BACKEND == 'supabase':
+            if not Config.SUPABASE_URL or not Config.SUPABASE_KEY:
+                raise ValueError("Supabase credentials not configured")
+            self.backend = PostgRESTBackend(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+        elif Config.STORAGE_BACKEND == 'supabase-sdk':
+            self.backend = SupabaseBackend(self._create_supabase_client())
+        else:
+            self.backend = create_embedded_backend(Config.STORAGE_BACKEND, Config.LOCAL_DB_PATH or None)
+        
+        if Config.DUAL_WRITE_LOCAL and backend is None and client is None:
+            mirror = create_embedded_backend(Config.DUAL_WRITE_LOCAL, Config.LOCAL_DB_PATH or None)
+            self.backend = DualWriteBackend(self.backend, [mirror])
+            logger.info(f"Dual-writing to Supabase and local {mirror.name}")
+        
+        # Called as listener(table_name, df) after all of df is stored (e.g. cache invalidation)
+        self.store_listeners: List[Callable[[str, pd.DataFrame], None]] = []
+        
+        logger.info(f"Storage backend: {self.backend.name}")
+    
+    @property
+    def client(self):
+        """Underlying Supabase client, when there is one"""
+        backend = self.backend.primary if isinstance(self.backend, DualWriteBackend) else self.backend
+        return getattr(backend, 'client', None)
     
-    def __init__(self):
+    @staticmethod
+    def _create_supabase_client() -> Client:
         if not Config.SUPABASE_URL or not Config.SUPABASE_KEY:
             raise ValueError("Supabase credentials not configured")
         
         try:
-            self.client: Client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+            client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
             logger.info("Supabase client initialized successfully")
+            return client
         except Exception as e:
             logger.error(f"Failed to initialize Supabase client: {e}")
             raise
@@ -476,13 +728,12 @@ class DatabaseManager:
     def get_monitored_investors(self) -> List[Dict[str, str]]:
         """Get list of monitored investors with their details"""
         try:
-            response = self.client.table(Config.TABLE_MONITORED)\
-                .select("investor_name, display_name, category, priority")\
-                .eq("is_active", True)\
-                .execute()
+            rows = self.backend.select(Config.TABLE_MONITORED,
+                                       "investor_name, display_name, category, priority",
+                                       eq={"is_active": True})
             
             investors = []
-            for row in response.data:
+            for row in rows:
                 investors.append({
                     'name': row['investor_name'].strip().upper(),
                     'display_name': row.get('display_name', row['investor_name']),
@@ -501,6 +752,30 @@ class DatabaseManager:
             logger.error(traceback.format_exc())
             return []
     
+    def get_monitored_symbols(self) -> List[Dict]:
+        """Get the symbol watchlist (NSE symbols, BSE scrip codes or ISINs)"""
+        try:
+            rows = self.backend.select(Config.TABLE_MONITORED_SYMBOLS,
+                                       "symbol, display_name, category, priority",
+                                       eq={"is_active": True})
+            
+            symbols = []
+            for row in rows:
+                symbols.append({
+                    'symbol': str(row['symbol']).strip().upper(),
+                    'display_name': row.get('display_name') or row['symbol'],
+                    'category': row.get('category') or 'Watchlist',
+                    'priority': row.get('priority') or 0
+                })
+            
+            logger.info(f"✓ Loaded {len(symbols)} watched symbols")
+            return symbols
+            
+        except Exception as e:
+            logger.error(f"Error fetching monitored symbols: {e}")
+            logger.error(traceback.format_exc())
+            return []
+    
     def store_data(self, df: pd.DataFrame, table_name: str) -> bool:
         """Store DataFrame to Supabase table"""
         try:
@@ -521,19 +796,20 @@ class DatabaseManager:
                     elif hasattr(value, 'isoformat'):
                         record[key] = value.isoformat()
             
-            batch_size = 100
-            total_inserted = 0
-            
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                try:
-                    self.client.table(table_name).insert(batch).execute()
-                    total_inserted += len(batch)
-                    logger.debug(f"Inserted batch of {len(batch)} records into {table_name}")
-                except Exception as e:
-                    logger.error(f"Error inserting batch into {table_name}: {e}")
+            total_inserted = self.backend.insert_records(table_name, records)
             
             logger.info(f"✓ Stored {total_inserted}/{len(records)} records in {table_name}")
+            if 0 < total_inserted < len(records):
+                # The backends do not say which batches failed, so listeners would
+                # count deals that are not stored. The query service still sees the
+                # new row count on its next check; the rollups miss these deals.
+                logger.warning(f"Partial insert into {table_name}, skipped rollup and cache updates")
+            elif total_inserted > 0:
+                for listener in self.store_listeners:
+                    try:
+                        listener(table_name, df)
+                    except Exception as e:
+                        logger.warning(f"Store listener failed for {table_name}: {e}")
             return total_inserted > 0
             
         except Exception as e:
@@ -541,6 +817,14 @@ class DatabaseManager:
             logger.error(traceback.format_exc())
             return False
     
+    def get_last_deal_date(self, table_name: str) -> Optional[date]:
+        """Latest deal_date stored in a table (None if empty or unreachable)"""
+        try:
+            return self.backend.last_deal_date(table_name)
+        except Exception as e:
+            logger.error(f"Error reading last deal date from {table_name}: {e}")
+            return None
+    
     def get_today_summary(self) -> Dict[str, int]:
         """Get summary of today's deals from database"""
         summary = {}
@@ -551,16 +835,27 @@ class DatabaseManager:
         
         for table in tables:
             try:
-                response = self.client.table(table)\
-                    .select("*", count="exact")\
-                    .eq("fetch_date", today)\
-                    .execute()
-                summary[table] = response.count if hasattr(response, 'count') else len(response.data)
+                summary[table] = self.backend.count(table, eq={"fetch_date": today})
             except Exception as e:
                 logger.error(f"Error getting summary for {table}: {e}")
                 summary[table] = 0
         
         return summary
+    
+    def query_deals(self, table_name: str, start: Optional[date] = None, end: Optional[date] = None,
+                    symbol: Optional[str] = None, analytics: bool = False) -> pd.DataFrame:
+        """Deals for a date range (and optional symbol / scrip code)
+        
+        analytics=True may read a dual-write mirror instead of the system of
+        record; only for reporting, never to decide what is already stored.
+        """
+        backend = self.backend.analytics_reader() if analytics else self.backend
+        try:
+            return compact_deal_frame(backend.query_deals(table_name, start, end, symbol))
+        except Exception as e:
+            logger.error(f"Error querying {table_name}: {e}")
+            logger.error(traceback.format_exc())
+            return pd.DataFrame()
 
 
 # ============================================================================
@@ -570,16 +865,105 @@ class DatabaseManager:
 class InvestorMonitor:
     """Monitor deals for specific investors"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, rules: Optional[List[AlertRule]] = None,
+                 detector: Optional[StreakDetector] = None):
         self.db_manager = db_manager
         self.monitored_investors = []
+        self.watchlist = SymbolWatchlist([])
+        self.rules = rules
+        self.detector = detector
     
     def load_monitored_investors(self):
-        """Load list of monitored investors"""
+        """Load list of monitored investors and the symbol watchlist"""
         self.monitored_investors = self.db_manager.get_monitored_investors()
         logger.info(f"Loaded {len(self.monitored_investors)} active monitored investors")
+        self.watchlist = SymbolWatchlist(self.db_manager.get_monitored_symbols())
+        if self.rules is None:
+            try:
+                self.rules = load_rules(Config.ALERT_RULES_PATH)
+            except Exception as e:
+                logger.error(f"Error loading alert rules: {e}")
+                self.rules = []
+    
+    def find_symbol_alerts(self, data: Dict[str, pd.DataFrame],
+                           existing: List[DealAlert] = None) -> List[DealAlert]:
+        """Deals (NSE and BSE) in watched securities; deals already in existing are skipped"""
+        if not len(self.watchlist):
+            return []
+        
+        try:
+            alerts = self.watchlist.find_alerts(data)
+            seen = {deal.key for deal in existing or []}
+            alerts = [deal for deal in alerts if deal.key not in seen]
+            logger.info(f"✓ {len(alerts)} deals in {len(self.watchlist)} watched symbols")
+            return alerts
+        except Exception as e:
+            logger.error(f"Error matching symbol watchlist: {e}")
+            logger.error(traceback.format_exc())
+            return []
+    
+    def find_rule_alerts(self, data: Dict[str, pd.DataFrame],
+                         existing: List[DealAlert] = None) -> List[DealAlert]:
+        """Evaluate the declarative alert rules; deals already in existing are skipped"""
+        if not self.rules:
+            return []
+        
+        try:
+            engine = AlertRuleEngine(self.rules, self.monitored_investors)
+            history = None
+            if engine.repeat_window:
+                history = self._load_rule_history(data, engine.repeat_window)
+            
+            alerts = engine.find_alerts(data, history)
+            seen = {deal.key for deal in existing or []}
+            alerts = [deal for deal in alerts if deal.key not in seen]
+            logger.info(f"✓ {len(alerts)} deals matched {len(self.rules)} alert rules")
+            return alerts
+        except Exception as e:
+            logger.error(f"Error evaluating alert rules: {e}")
+            logger.error(traceback.format_exc())
+            return []
     
-    def find_monitored_deals(self, data: Dict[str, pd.DataFrame]) -> List[Dict]:
+    def find_pattern_alerts(self, data: Dict[str, pd.DataFrame]) -> List[DealAlert]:
+        """Fold the fetched deals into the streak state; streak / first-appearance events"""
+        if self.detector is None:
+            return []
+        
+        try:
+            if self.detector.is_empty():
+                history = self._load_rule_history(data, Config.PATTERN_SEED_DAYS)
+                if history is not None and not history.empty:
+                    self.detector.ingest({'history': history}, emit=False)
+                    logger.info(f"↺ Seeded pattern state from {len(history)} stored deals")
+                else:
+                    # Nothing stored before these deals (fresh database): every client
+                    # would look new, so they only seed the state
+                    self.detector.ingest(data, emit=False)
+                    logger.info("↺ No stored history, seeded pattern state from the fetched deals")
+                    return []
+            
+            alerts = self.detector.ingest(data)
+            logger.info(f"✓ {len(alerts)} streak / first-appearance events")
+            return alerts
+        except Exception as e:
+            logger.error(f"Error detecting deal patterns: {e}")
+            logger.error(traceback.format_exc())
+            return []
+    
+    def _load_rule_history(self, data: Dict[str, pd.DataFrame], days: int) -> Optional[pd.DataFrame]:
+        """Stored deals from the repeat window before the earliest fetched deal"""
+        dates = [df['deal_date'].min() for df in data.values()
+                 if df is not None and not df.empty and 'deal_date' in df.columns]
+        if not dates:
+            return None
+        first = pd.Timestamp(min(dates)).date()
+        tables = [Config.TABLE_NSE_BULK, Config.TABLE_NSE_BLOCK, Config.TABLE_BSE_BULK, Config.TABLE_BSE_BLOCK]
+        return concat_deal_frames(
+            self.db_manager.query_deals(table, first - timedelta(days=days), first - timedelta(days=1))
+            for table in tables
+        )
+    
+    def find_monitored_deals(self, data: Dict[str, pd.DataFrame]) -> List[DealAlert]:
         """Find deals involving monitored investors"""
         monitored_deals = []
         
@@ -603,21 +987,14 @@ class InvestorMonitor:
                     matches = df[df['client_name'].str.contains(investor['name'], na=False, case=False)]
                     if len(matches) > 0:
                         logger.info(f"  ✓ MATCH: {investor['display_name']} - {len(matches)} deals")
-                        for _, row in matches.iterrows():
-                            monitored_deals.append({
-                                'investor': investor['display_name'],
-                                'investor_category': investor['category'],
-                                'priority': investor['priority'],
-                                'deal_type': 'BULK',
-                                'source': 'NSE',
-                                'date': row.get('deal_date', ''),
-                                'symbol': row.get('symbol', ''),
-                                'security_name': row.get('security_name', ''),
-                                'action': row.get('buy_sell', ''),
-                                'quantity': row.get('quantity_traded', 0),
-                                'price': row.get('trade_price', 0),
-                                'remarks': row.get('remarks', '')
-                            })
+                        monitored_deals.extend(AlertBatch.from_frame(
+                            matches,
+                            investor=investor['display_name'],
+                            investor_category=investor['category'] or '',
+                            priority=investor['priority'] or 0,
+                            deal_type='BULK',
+                            source='NSE',
+                        ).records())
         
         # Check NSE block deals
         if data.get('nse_block') is not None and not data['nse_block'].empty:
@@ -631,27 +1008,21 @@ class InvestorMonitor:
                     matches = df[df['client_name'].str.contains(investor['name'], na=False, case=False)]
                     if len(matches) > 0:
                         logger.info(f"  ✓ MATCH: {investor['display_name']} - {len(matches)} deals")
-                        for _, row in matches.iterrows():
-                            monitored_deals.append({
-                                'investor': investor['display_name'],
-                                'investor_category': investor['category'],
-                                'priority': investor['priority'],
-                                'deal_type': 'BLOCK',
-                                'source': 'NSE',
-                                'date': row.get('deal_date', ''),
-                                'symbol': row.get('symbol', ''),
-                                'security_name': row.get('security_name', ''),
-                                'action': row.get('buy_sell', ''),
-                                'quantity': row.get('quantity_traded', 0),
-                                'price': row.get('trade_price', 0),
-                                'remarks': ''
-                            })
+                        monitored_deals.extend(AlertBatch.from_frame(
+                            matches,
+                            investor=investor['display_name'],
+                            investor_category=investor['category'] or '',
+                            priority=investor['priority'] or 0,
+                            deal_type='BLOCK',
+                            source='NSE',
+                            remarks='',
+                        ).records())
         
         # BSE deals are skipped for monitoring
         if data.get('bse_bulk') is not None or data.get('bse_block') is not None:
             logger.warning("\n⚠️  BSE deals cannot be monitored (no client names in public data)")
         
-        monitored_deals.sort(key=lambda x: x['priority'], reverse=True)
+        monitored_deals.sort(key=lambda x: x.priority, reverse=True)
         
         logger.info("\n" + "=" * 70)
         if monitored_deals:
@@ -670,7 +1041,13 @@ class InvestorMonitor:
 class EmailReporter:
     """Handles email report generation and sending"""
     
-    def __init__(self):
+    def __init__(self, yag=None, ledger: Optional[AlertLedger] = None):
+        self.ledger = ledger or AlertLedger(Config.ALERT_LEDGER_PATH, Config.ALERT_LEDGER_TTL_DAYS)
+        if yag is not None:
+            # Anything with a yagmail-compatible send() (e.g. a captured sink)
+            self.yag = yag
+            return
+        
         if not Config.EMAIL_USER or not Config.EMAIL_PASSWORD:
             raise ValueError("Email credentials not configured")
         
@@ -681,20 +1058,40 @@ class EmailReporter:
             logger.error(f"Failed to initialize email client: {e}")
             raise
     
-    def send_report(self, summary: Dict[str, int], csv_files: List[str], monitored_deals: List[Dict] = None):
-        """Send daily email report with investor alerts"""
+    def send_report(self, summary: Dict[str, int], csv_files: List[str], monitored_deals: List[DealAlert] = None):
+        """Send daily email report with investor alerts
+        
+        Each recipient gets the day's report once and each alert once (per
+        the alert ledger); recipients with the same new alerts share an email.
+        """
         try:
             today_str = datetime.now().strftime('%d %B %Y')
+            report = report_fingerprint(datetime.now().date())
             
-            if monitored_deals:
-                subject = f"🚨 ALERT: Monitored Investor Activity - {today_str}"
-            else:
-                subject = f"Daily Bulk & Block Deals Report - {today_str}"
+            batches = {}
+            for recipient in Config.EMAIL_TO:
+                new_deals = self.ledger.new_alerts(monitored_deals, recipient)
+                if not new_deals and self.ledger.seen(report, recipient):
+                    continue
+                fingerprints = tuple(deal.fingerprint for deal in new_deals)
+                batches.setdefault(fingerprints, ([], new_deals))[0].append(recipient)
             
-            body = self._create_email_body(summary, monitored_deals)
+            if not batches:
+                logger.info("No new alerts since the last email report - skipping")
+                return True
             
-            self.yag.send(to=Config.EMAIL_TO, subject=subject, contents=body)
-            logger.info(f"✓ Email report sent successfully to {Config.EMAIL_TO}")
+            for fingerprints, (recipients, new_deals) in batches.items():
+                if new_deals:
+                    subject = f"🚨 ALERT: Monitored Investor Activity - {today_str}"
+                else:
+                    subject = f"Daily Bulk & Block Deals Report - {today_str}"
+                
+                body = self._create_email_body(summary, new_deals)
+                
+                self.yag.send(to=recipients, subject=subject, contents=body)
+                logger.info(f"✓ Email report sent successfully to {recipients}")
+                for recipient in recipients:
+                    self.ledger.record(fingerprints + (report,), recipient)
             return True
             
         except Exception as e:
@@ -702,10 +1099,32 @@ class EmailReporter:
             logger.error(traceback.format_exc())
             return False
     
-    def _create_monitored_deals_html(self, monitored_deals: List[Dict]) -> str:
+    def send_digest(self, digest: Dict) -> bool:
+        """Send a periodic digest (see rollups.py) to recipients that have not had it"""
+        try:
+            fingerprint = digest_fingerprint(digest)
+            recipients = [r for r in Config.EMAIL_TO if not self.ledger.seen(fingerprint, r)]
+            if not recipients:
+                logger.info("Digest already emailed - skipping")
+                return True
+            
+            self.yag.send(to=recipients, subject=digest_title(digest), contents=format_digest_html(digest))
+            logger.info(f"✓ Digest email sent successfully to {recipients}")
+            for recipient in recipients:
+                self.ledger.record([fingerprint], recipient)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error sending digest email: {e}")
+            logger.error(traceback.format_exc())
+            return False
+    
+    def _create_monitored_deals_html(self, monitored_deals: List[DealAlert]) -> str:
         """Create HTML for monitored investor deals"""
         if not monitored_deals:
             return ""
+        if len(monitored_deals) > Config.ALERT_SUMMARY_TOP_N:
+            return self._create_activity_summary_html(monitored_deals)
         
         deal_date_str = datetime.now().strftime('%d %B %Y')
         
@@ -731,22 +1150,20 @@ class EmailReporter:
         """
         
         for deal in monitored_deals:
-            action_color = "#4caf50" if deal['action'].upper() == 'BUY' else "#f44336"
-            category_badge = f"<br><small style='color: #999; font-size: 11px;'>{deal['investor_category']}</small>" if deal['investor_category'] else ""
-            
-            # Format date
-            deal_date_formatted = deal['date'].strftime('%d-%b') if hasattr(deal['date'], 'strftime') else str(deal['date'])
+            action_color = "#4caf50" if deal.is_buy else "#f44336"
+            category_badge = f"<br><small style='color: #999; font-size: 11px;'>{deal.investor_category}</small>" if deal.investor_category else ""
+            volume_note = f"<br><small style='color: #999; font-size: 11px;'>{deal.volume_text}</small>" if deal.volume_text else ""
             
             html += f"""
                 <tr style="border-bottom: 1px solid #e0e0e0;">
-                    <td style="padding: 8px; font-size: 12px; color: #666;">{deal_date_formatted}</td>
-                    <td style="padding: 8px; font-size: 13px;"><strong>{deal['investor']}</strong>{category_badge}</td>
-                    <td style="padding: 8px; font-size: 13px;">{deal['symbol']}<br><small style="color: #666; font-size: 11px;">{deal['security_name'][:40]}...</small></td>
-                    <td style="padding: 8px; color: {action_color}; font-weight: bold; font-size: 13px;">{deal['action']}</td>
-                    <td style="padding: 8px; text-align: right; font-size: 13px;">{deal['quantity']:,.0f}</td>
-                    <td style="padding: 8px; text-align: right; font-size: 13px;">₹{deal['price']:,.2f}</td>
+                    <td style="padding: 8px; font-size: 12px; color: #666;">{deal.date_text}</td>
+                    <td style="padding: 8px; font-size: 13px;"><strong>{deal.investor}</strong>{category_badge}</td>
+                    <td style="padding: 8px; font-size: 13px;">{deal.symbol}<br><small style="color: #666; font-size: 11px;">{deal.security_name[:40]}...</small></td>
+                    <td style="padding: 8px; color: {action_color}; font-weight: bold; font-size: 13px;">{deal.action}</td>
+                    <td style="padding: 8px; text-align: right; font-size: 13px;">{deal.quantity_text}{volume_note}</td>
+                    <td style="padding: 8px; text-align: right; font-size: 13px;">{deal.price_text}</td>
                     <td style="padding: 8px; text-align: center; font-size: 11px;">
-                        <span style="background-color: #e3f2fd; padding: 3px 6px; border-radius: 3px;">{deal['source']} {deal['deal_type']}</span>
+                        <span style="background-color: #e3f2fd; padding: 3px 6px; border-radius: 3px;">{deal.kind_text}</span>
                     </td>
                 </tr>
             """
@@ -758,7 +1175,62 @@ class EmailReporter:
         """
         return html
     
-    def _create_email_body(self, summary: Dict[str, int], monitored_deals: List[Dict] = None) -> str:
+    def _create_activity_summary_html(self, monitored_deals: List[DealAlert]) -> str:
+        """Create HTML for the top investor x stock groups when there are many alerts"""
+        groups = summarize_activity(monitored_deals)
+        top = top_activity(groups, Config.ALERT_SUMMARY_TOP_N, Config.ALERT_SUMMARY_BY)
+        deal_date_str = datetime.now().strftime('%d %B %Y')
+        
+        html = f"""
+        <div style="background-color: #fff3cd; border-left: 5px solid #ff6b6b; padding: 15px; margin: 0 0 15px 0; border-radius: 5px;">
+            <h2 style="color: #d32f2f; margin: 0 0 5px 0; font-size: 18px;">🚨 INVESTOR ALERT!</h2>
+            <p style="font-size: 13px; color: #666; margin: 0 0 10px 0;">
+                Your monitored investors made <strong>{len(monitored_deals)} trades</strong> in <strong>{len(groups)} investor/stock groups</strong> on <strong>{deal_date_str}</strong>. Top {len(top)} by {Config.ALERT_SUMMARY_BY}:
+            </p>
+            <table style="width: 100%; border-collapse: collapse; background-color: white; margin: 0;">
+                <thead>
+                    <tr style="background-color: #d32f2f; color: white;">
+                        <th style="padding: 8px; text-align: left; font-size: 13px;">Investor</th>
+                        <th style="padding: 8px; text-align: left; font-size: 13px;">Stock</th>
+                        <th style="padding: 8px; text-align: right; font-size: 13px;">Deals</th>
+                        <th style="padding: 8px; text-align: right; font-size: 13px;">Net Qty</th>
+                        <th style="padding: 8px; text-align: right; font-size: 13px;">VWAP</th>
+                        <th style="padding: 8px; text-align: right; font-size: 13px;">Value (Cr)</th>
+                        <th style="padding: 8px; text-align: center; font-size: 13px;">Type</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """
+        
+        for group in top.itertuples():
+            net_color = "#4caf50" if group.net_quantity >= 0 else "#f44336"
+            category_badge = f"<br><small style='color: #999; font-size: 11px;'>{group.investor_category}</small>" if group.investor_category else ""
+            
+            html += f"""
+                <tr style="border-bottom: 1px solid #e0e0e0;">
+                    <td style="padding: 8px; font-size: 13px;"><strong>{group.investor}</strong>{category_badge}</td>
+                    <td style="padding: 8px; font-size: 13px;">{group.symbol}<br><small style="color: #666; font-size: 11px;">{group.security_name[:40]}</small></td>
+                    <td style="padding: 8px; text-align: right; font-size: 13px;">{group.deals}</td>
+                    <td style="padding: 8px; text-align: right; color: {net_color}; font-weight: bold; font-size: 13px;">{group.net_quantity:+,.0f}</td>
+                    <td style="padding: 8px; text-align: right; font-size: 13px;">₹{group.vwap:,.2f}</td>
+                    <td style="padding: 8px; text-align: right; font-size: 13px;">{group.gross_value / 1e7:,.2f}</td>
+                    <td style="padding: 8px; text-align: center; font-size: 11px;">
+                        <span style="background-color: #e3f2fd; padding: 3px 6px; border-radius: 3px;">{group.source} {group.deal_type}</span>
+                    </td>
+                </tr>
+            """
+        
+        more = len(groups) - len(top)
+        more_html = f'<p style="font-size: 12px; color: #666; margin: 8px 0 0 0;">...and {more} more groups - every deal is in the attached CSVs</p>' if more > 0 else ''
+        html += f"""
+                </tbody>
+            </table>
+            {more_html}
+        </div>
+        """
+        return html
+    
+    def _create_email_body(self, summary: Dict[str, int], monitored_deals: List[DealAlert] = None) -> str:
         """Create HTML email body"""
         today_str = datetime.now().strftime('%d %B %Y, %I:%M %p IST')
         deal_date_str = datetime.now().strftime('%d %B %Y')
@@ -847,7 +1319,10 @@ class EmailReporter:
 class TelegramNotifier:
     """Handles Telegram notifications"""
     
-    def __init__(self):
+    def __init__(self, http=None, ledger: Optional[AlertLedger] = None):
+        # http must provide a requests-compatible post(); defaults to the shared async client
+        self.http = http or SyncSession()
+        self.ledger = ledger or AlertLedger(Config.ALERT_LEDGER_PATH, Config.ALERT_LEDGER_TTL_DAYS)
         self.bot_token = Config.TELEGRAM_BOT_TOKEN
         self.chat_id = Config.TELEGRAM_CHAT_ID
         
@@ -865,9 +1340,9 @@ class TelegramNotifier:
             return False
         
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+            url = f"{Config.TELEGRAM_API_URL}/bot{self.bot_token}/sendMessage"
             
-            response = requests.post(url, json={
+            response = self.http.post(url, json={
                 'chat_id': self.chat_id,
                 'text': message,
                 'parse_mode': 'Markdown',
@@ -885,8 +1360,31 @@ class TelegramNotifier:
             logger.error(f"Error sending Telegram message: {e}")
             return False
     
-    def send_daily_summary(self, summary: Dict[str, int], monitored_deals: List[Dict] = None):
-        """Send daily summary via Telegram"""
+    def _activity_summary_lines(self, monitored_deals: List[DealAlert]) -> str:
+        """Top investor x stock groups, one block per group"""
+        groups = summarize_activity(monitored_deals)
+        top = top_activity(groups, Config.ALERT_SUMMARY_TOP_N, Config.ALERT_SUMMARY_BY)
+        
+        lines = ""
+        for group in top.itertuples():
+            net_emoji = "🟢" if group.net_quantity >= 0 else "🔴"
+            lines += f"{net_emoji} *{group.investor}* - {group.symbol}\n"
+            lines += f"   {group.deals} deals, net {group.net_quantity:+,.0f} @ VWAP ₹{group.vwap:,.2f}\n"
+            lines += f"   Value: ₹{group.gross_value / 1e7:,.2f} Cr | {group.source} {group.deal_type}\n\n"
+        
+        if len(groups) > len(top):
+            lines += f"_...and {len(groups) - len(top)} more investor/stock groups_\n\n"
+        return lines
+    
+    def send_daily_summary(self, summary: Dict[str, int], monitored_deals: List[DealAlert] = None):
+        """Send daily summary via Telegram (only alerts the chat has not seen yet)"""
+        recipient = f"telegram:{self.chat_id}"
+        report = report_fingerprint(datetime.now().date())
+        monitored_deals = self.ledger.new_alerts(monitored_deals, recipient)
+        if not monitored_deals and self.ledger.seen(report, recipient):
+            logger.info("No new alerts since the last Telegram summary - skipping")
+            return True
+        
         today_str = datetime.now().strftime('%d %B %Y, %I:%M %p IST')
         
         message = f"*📊 Daily Bulk & Block Deals Report*\n"
@@ -896,15 +1394,17 @@ class TelegramNotifier:
             message += f"*🚨 INVESTOR ALERT!*\n"
             message += f"Found {len(monitored_deals)} deals from monitored investors\n\n"
             
-            for deal in monitored_deals[:5]:
-                action_emoji = "🟢" if deal['action'].upper() == 'BUY' else "🔴"
-                message += f"{action_emoji} *{deal['investor']}*\n"
-                message += f"   {deal['action']} {deal['symbol']}\n"
-                message += f"   Qty: {deal['quantity']:,.0f} @ ₹{deal['price']:,.2f}\n"
-                message += f"   Type: {deal['source']} {deal['deal_type']}\n\n"
-            
-            if len(monitored_deals) > 5:
-                message += f"_...and {len(monitored_deals) - 5} more deals_\n\n"
+            if len(monitored_deals) > Config.ALERT_SUMMARY_TOP_N:
+                message += self._activity_summary_lines(monitored_deals)
+            else:
+                for deal in monitored_deals:
+                    action_emoji = "🟢" if deal.is_buy else "🔴"
+                    message += f"{action_emoji} *{deal.investor}*\n"
+                    message += f"   {deal.action} {deal.symbol}\n"
+                    message += f"   Qty: {deal.quantity_text} @ {deal.price_text}\n"
+                    if deal.volume_text:
+                        message += f"   Size: {deal.volume_text}\n"
+                    message += f"   Type: {deal.kind_text}\n\n"
         else:
             message += "✓ No monitored investor activity today\n\n"
         
@@ -914,7 +1414,23 @@ class TelegramNotifier:
         message += f"BSE Bulk: {summary.get(Config.TABLE_BSE_BULK, 0)}\n"
         message += f"BSE Block: {summary.get(Config.TABLE_BSE_BLOCK, 0)}\n"
         
-        self.send_message(message)
+        sent = self.send_message(message)
+        if sent:
+            self.ledger.record([deal.fingerprint for deal in monitored_deals] + [report], recipient)
+        return sent
+    
+    def send_digest(self, digest: Dict) -> bool:
+        """Send a periodic digest (see rollups.py) unless the chat already has it"""
+        recipient = f"telegram:{self.chat_id}"
+        fingerprint = digest_fingerprint(digest)
+        if self.ledger.seen(fingerprint, recipient):
+            logger.info("Digest already sent to Telegram - skipping")
+            return True
+        
+        sent = self.send_message(format_digest_text(digest))
+        if sent:
+            self.ledger.record([fingerprint], recipient)
+        return sent
 
 
 # ============================================================================
@@ -924,18 +1440,41 @@ class TelegramNotifier:
 class DealsAutomation:
     """Main orchestrator with investor monitoring and notifications"""
     
-    def __init__(self):
-        self.nse_fetcher = NSEDataFetcher()
-        self.bse_fetcher = BSEDataFetcher()
-        self.db_manager = DatabaseManager()
-        self.investor_monitor = InvestorMonitor(self.db_manager)
-        self.email_reporter = EmailReporter()
-        self.telegram_notifier = TelegramNotifier()
+    def __init__(self, nse_fetcher: Optional[NSEDataFetcher] = None,
+                 bse_fetcher: Optional[BSEDataFetcher] = None,
+                 db_manager: Optional[DatabaseManager] = None,
+                 email_reporter: Optional[EmailReporter] = None,
+                 telegram_notifier: Optional[TelegramNotifier] = None,
+                 output_dir: str = '.', calendar: Optional[TradingCalendar] = None):
+        # Every external service can be injected (see replay.py)
+        if nse_fetcher is None or bse_fetcher is None:
+            security_master = load_security_master(Config.SECURITY_MASTER_PATH,
+                                                   Config.SECURITY_MASTER_SOURCES)
+        self.nse_fetcher = nse_fetcher or NSEDataFetcher(security_master=security_master)
+        self.bse_fetcher = bse_fetcher or BSEDataFetcher(security_master=security_master)
+        self.db_manager = db_manager or DatabaseManager()
+        self.output_dir = output_dir
+        self.calendar = calendar or get_calendar(Config.TRADING_HOLIDAYS_PATH)
+        detector = None
+        if Config.PATTERN_STATE_PATH:
+            detector = StreakDetector(StreakState(os.path.join(output_dir, Config.PATTERN_STATE_PATH)),
+                                      Config.PATTERN_MIN_STREAK, Config.PATTERN_LARGE_CLIENT_CR,
+                                      Config.PATTERN_ALERT_PRIORITY, holidays=self.calendar.holidays)
+        self.investor_monitor = InvestorMonitor(self.db_manager, detector=detector)
+        self.email_reporter = email_reporter or EmailReporter()
+        self.telegram_notifier = telegram_notifier or TelegramNotifier()
+        self.bhavcopies = BhavcopyStore(Config.BHAVCOPY_DIR) if Config.BHAVCOPY_DIR else None
+        self.rollups = DealRollups(self.db_manager.backend)
+        if Config.ROLLUPS_ENABLED:
+            self.db_manager.store_listeners.append(self.update_rollups)
         self.csv_files = []
         self.monitored_deals = []
     
-    def fetch_all_data(self) -> Dict[str, pd.DataFrame]:
+    def fetch_all_data(self, catch_up: bool = False) -> Dict[str, pd.DataFrame]:
         """Fetch all deals data"""
+        if catch_up:
+            return self.fetch_catch_up_data()
+        
         data = {}
         logger.info("\nFetching data from NSE...")
         data['nse_bulk'] = self.nse_fetcher.fetch_bulk_deals()
@@ -947,6 +1486,73 @@ class DealsAutomation:
         
         return data
     
+    def fetch_catch_up_data(self) -> Dict[str, pd.DataFrame]:
+        """Fetch every deal since the last stored deal_date, per table
+        
+        One date-range request per source covers the whole gap, starting at
+        the first trading day after the last stored deal; rows that are
+        already stored are dropped so the range is written once. Trading
+        days in the gap that come back without deals are logged.
+        """
+        today = self.nse_fetcher.trade_date or datetime.now().date()
+        sources = {
+            'nse_bulk': (Config.TABLE_NSE_BULK, self.nse_fetcher.fetch_bulk_deals),
+            'nse_block': (Config.TABLE_NSE_BLOCK, self.nse_fetcher.fetch_block_deals),
+            'bse_bulk': (Config.TABLE_BSE_BULK, self.bse_fetcher.fetch_bulk_deals),
+            'bse_block': (Config.TABLE_BSE_BLOCK, self.bse_fetcher.fetch_block_deals),
+        }
+        
+        data = {}
+        for key, (table_name, fetch) in sources.items():
+            last_date = self.db_manager.get_last_deal_date(table_name)
+            start = min(self.calendar.next_trading_day(last_date), today) if last_date else today
+            logger.info(f"\nCatch-up {table_name}: last stored deal {last_date or 'none'}, fetching {start} to {today}")
+            
+            df = fetch(start, today)
+            fetched_dates = set(pd.to_datetime(df['deal_date']).dt.date) \
+                if df is not None and 'deal_date' in df.columns else set()
+            missing = [d for d in self.calendar.trading_days(start, today) if d not in fetched_dates]
+            if missing:
+                logger.info(f"  No {table_name} returned for trading days: {', '.join(map(str, missing))}")
+            if df is not None and not df.empty:
+                stored = self.db_manager.query_deals(table_name, start, today)
+                before = len(df)
+                df = drop_stored_deals(df, stored, symbol_column(table_name))
+                if len(df) < before:
+                    logger.info(f"  Skipped {before - len(df)} deals already stored in {table_name}")
+            data[key] = df
+        
+        return data
+    
+    def backfill(self, start: date, end: date) -> Dict[str, int]:
+        """Stream NSE history for start..end straight into storage
+        
+        Each chunk is deduplicated against what is already stored for its
+        dates and written immediately, so memory stays flat for any range.
+        BSE publishes no history endpoint and is not backfilled.
+        """
+        written = {}
+        for category, table_name in (('BULK', Config.TABLE_NSE_BULK), ('BLOCK', Config.TABLE_NSE_BLOCK)):
+            written[table_name] = 0
+            
+            def store_chunk(df: pd.DataFrame, table_name: str = table_name):
+                dates = df['deal_date'].dropna()
+                if not dates.empty:
+                    stored = self.db_manager.query_deals(table_name, dates.min().date(), dates.max().date())
+                    df = drop_stored_deals(df, stored, symbol_column(table_name))
+                if not df.empty and self.db_manager.store_data(df, table_name):
+                    written[table_name] += len(df)
+            
+            try:
+                self.nse_fetcher.stream_range(category, start, end, store_chunk)
+            except Exception as e:
+                logger.error(f"Error backfilling {table_name}: {e}")
+                logger.error(traceback.format_exc())
+        
+        for table_name, rows in written.items():
+            logger.info(f"✓ Backfilled {rows} new deals into {table_name}")
+        return written
+    
     def save_to_csv(self, data: Dict[str, pd.DataFrame]) -> List[str]:
         """Save DataFrames to CSV files"""
         csv_files = []
@@ -962,6 +1568,7 @@ class DealsAutomation:
         for key, filename in mapping.items():
             df = data.get(key)
             if df is not None and not df.empty:
+                filename = os.path.join(self.output_dir, filename)
                 try:
                     df.to_csv(filename, index=False)
                     csv_files.append(filename)
@@ -971,8 +1578,69 @@ class DealsAutomation:
         
         return csv_files
     
-    def store_all_data(self, data: Dict[str, pd.DataFrame]) -> bool:
-        """Store all data to Supabase"""
+    def enrich_deals(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Add deal value and % of day volume / delivery from the bhavcopy, when configured"""
+        if self.bhavcopies is None:
+            return data
+        try:
+            return enrich_all(data, self.bhavcopies)
+        except Exception as e:
+            logger.error(f"Bhavcopy enrichment failed: {e}")
+            logger.error(traceback.format_exc())
+            return data
+    
+    def index_csv_files(self, csv_files: List[str]):
+        """Add saved CSVs to the archive index (already indexed files are skipped)"""
+        if not Config.DEAL_INDEX_DIR or not csv_files:
+            return
+        try:
+            DealIndex(os.path.join(self.output_dir, Config.DEAL_INDEX_DIR)).add_files(csv_files)
+        except Exception as e:
+            logger.error(f"Failed to index CSV files: {e}")
+            logger.error(traceback.format_exc())
+    
+    def update_rollups(self, table_name: str, df: pd.DataFrame):
+        """DatabaseManager listener: fold stored deals into the day / week / month rollups
+        
+        Empty rollups are seeded from the stored history instead, which
+        already holds these deals.
+        """
+        tables = [Config.TABLE_NSE_BULK, Config.TABLE_NSE_BLOCK, Config.TABLE_BSE_BULK, Config.TABLE_BSE_BLOCK]
+        if table_name not in tables:
+            return
+        
+        try:
+            if self.rollups.is_empty():
+                dates = pd.to_datetime(df['deal_date'], errors='coerce').dropna() if 'deal_date' in df.columns \
+                    else pd.Series(dtype='datetime64[ns]')
+                end = dates.max().date() if not dates.empty else datetime.now().date()
+                start = min(dates.min().date() if not dates.empty else end,
+                            end - timedelta(days=Config.ROLLUP_SEED_DAYS))
+                history = load_history(self.db_manager, tables, start, end)
+                self.rollups.seed(history)
+                logger.info(f"↺ Seeded rollups from {sum(len(h) for h in history.values())} stored deals")
+                return
+            self.rollups.add(table_name, df)
+        except Exception as e:
+            logger.error(f"Error updating rollups for {table_name}: {e}")
+            logger.error(traceback.format_exc())
+    
+    def send_digest(self, period: str, day: Optional[date] = None):
+        """Email and Telegram the digest for the day / week / month holding day, from the rollups only"""
+        day = day or datetime.now().date()
+        digest = build_digest(self.rollups, period, day, Config.DIGEST_TOP_N)
+        logger.info(f"{digest_title(digest)}: {digest['total']['deals']:,.0f} deals in "
+                    f"{digest['securities']} securities")
+        self.email_reporter.send_digest(digest)
+        self.telegram_notifier.send_digest(digest)
+    
+    def store_all_data(self, data: Dict[str, pd.DataFrame],
+                       checkpoint: Optional[RunCheckpoint] = None) -> bool:
+        """Store all data to Supabase
+        
+        With a checkpoint, tables stored by an earlier attempt of the same
+        run are skipped, so a resume never inserts them twice.
+        """
         success_count = 0
         
         mapping = {
@@ -983,14 +1651,46 @@ class DealsAutomation:
         }
         
         for key, table_name in mapping.items():
+            step = f"store:{table_name}"
+            if checkpoint and checkpoint.done(step):
+                logger.info(f"↺ {table_name} already stored in this run - skipping")
+                success_count += 1
+                continue
             df = data.get(key)
+            if df is not None:
+                # Enrichment is derived from the bhavcopy, not part of the stored deal
+                df = df.drop(columns=ENRICHED_COLUMNS, errors='ignore')
             if self.db_manager.store_data(df, table_name):
                 success_count += 1
+                if checkpoint:
+                    checkpoint.mark_done(step)
         
         return success_count > 0
     
-    def run(self):
-        """Main execution method"""
+    def _checkpointed(self, checkpoint: RunCheckpoint, step: str, compute):
+        """Output of a finished step from the checkpoint, else compute and save it"""
+        if checkpoint.done(step):
+            logger.info(f"↺ Step '{step}' finished in an earlier attempt - loaded from checkpoint")
+            return checkpoint.load(step)
+        value = compute()
+        checkpoint.save(step, value)
+        return value
+    
+    def _send_once(self, checkpoint: RunCheckpoint, channel: str, send):
+        """Send a notification unless this run already sent it"""
+        if checkpoint.sent(channel):
+            logger.info(f"↺ {channel} notification already sent for this run - skipping")
+            return
+        if send():
+            checkpoint.mark_sent(channel)
+    
+    def run(self, catch_up: bool = False, resume: bool = False):
+        """Main execution method
+        
+        Every step's output is checkpointed under Config.RUN_DIR; with
+        resume=True finished steps are loaded instead of rerun and sent
+        notifications are not sent again.
+        """
         try:
             logger.info("=" * 70)
             logger.info("STARTING DAILY BULK & BLOCK DEALS AUTOMATION")
@@ -999,35 +1699,52 @@ class DealsAutomation:
             logger.info(f"Execution Time: {datetime.now().strftime('%d %B %Y, %I:%M:%S %p IST')}")
             logger.info("=" * 70)
             
+            trade_date = self.nse_fetcher.trade_date or datetime.now().date()
+            checkpoint = RunCheckpoint(os.path.join(self.output_dir, Config.RUN_DIR), trade_date,
+                                       resume=resume, suffix='-catch-up' if catch_up else '')
+            
             logger.info("\n[STEP 1/7] Loading monitored investors...")
-            self.investor_monitor.load_monitored_investors()
+            if not checkpoint.done('match'):
+                self.investor_monitor.load_monitored_investors()
             
             logger.info("\n[STEP 2/7] Fetching data from NSE and BSE...")
-            data = self.fetch_all_data()
+            data = self._checkpointed(checkpoint, 'fetch', lambda: self.fetch_all_data(catch_up=catch_up))
+            data = self.enrich_deals(data)
             
             logger.info("\n[STEP 3/7] Checking for monitored investor activity...")
-            self.monitored_deals = self.investor_monitor.find_monitored_deals(data)
+            def match():
+                alerts = self.investor_monitor.find_monitored_deals(data)
+                alerts += self.investor_monitor.find_symbol_alerts(data, alerts)
+                alerts += self.investor_monitor.find_rule_alerts(data, alerts)
+                alerts += self.investor_monitor.find_pattern_alerts(data)
+                alerts.sort(key=lambda x: x.priority, reverse=True)
+                return alerts
+            self.monitored_deals = self._checkpointed(checkpoint, 'match', match)
             
             if self.monitored_deals:
                 logger.info(f"\n🚨 ALERT: Found {len(self.monitored_deals)} deals from monitored investors!")
                 for deal in self.monitored_deals[:5]:
-                    logger.info(f"  - {deal['investor']}: {deal['action']} {deal['symbol']}")
+                    logger.info(f"  - {deal.investor}: {deal.action} {deal.symbol}")
             
             logger.info("\n[STEP 4/7] Saving to CSV...")
-            self.csv_files = self.save_to_csv(data)
+            self.csv_files = self._checkpointed(checkpoint, 'csv', lambda: self.save_to_csv(data))
+            self.index_csv_files(self.csv_files)
             
             logger.info("\n[STEP 5/7] Storing in Supabase...")
-            self.store_all_data(data)
+            self.store_all_data(data, checkpoint)
             
             logger.info("\n[STEP 6/7] Generating report...")
-            summary = self.db_manager.get_today_summary()
+            summary = self._checkpointed(checkpoint, 'report', self.db_manager.get_today_summary)
             
             logger.info("\n[STEP 7/7] Sending notifications...")
             logger.info("Sending email report...")
-            self.email_reporter.send_report(summary, self.csv_files, self.monitored_deals)
+            self._send_once(checkpoint, 'email', lambda: self.email_reporter.send_report(
+                summary, self.csv_files, self.monitored_deals))
             
             logger.info("Sending Telegram notification...")
-            self.telegram_notifier.send_daily_summary(summary, self.monitored_deals)
+            self._send_once(checkpoint, 'telegram', lambda: self.telegram_notifier.send_daily_summary(
+                summary, self.monitored_deals))
+            checkpoint.mark_done('complete')
             
             logger.info("\n" + "=" * 70)
             logger.info("✓ AUTOMATION COMPLETED SUCCESSFULLY!")
@@ -1039,11 +1756,15 @@ class DealsAutomation:
             logger.info(f"  - BSE Block: {summary.get(Config.TABLE_BSE_BLOCK, 0)}")
             logger.info(f"Monitored Investor Alerts: {len(self.monitored_deals)}")
             logger.info(f"CSV Files Generated: {len(self.csv_files)}")
+            if get_limiter().buckets:
+                logger.info("Exchange rate limits:")
+                get_limiter().log_metrics()
             logger.info("=" * 70)
             
         except Exception as e:
             logger.error(f"Fatal error: {e}")
             logger.error(traceback.format_exc())
+            logger.error("Finished steps are checkpointed - rerun with --resume to continue")
             sys.exit(1)
 
 
@@ -1053,9 +1774,40 @@ class DealsAutomation:
 
 def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description='NSE/BSE bulk and block deals automation')
+    parser.add_argument('--catch-up', action='store_true', default=Config.CATCH_UP,
+                        help='Fetch all deals since the last stored deal_date (env: CATCH_UP)')
+    parser.add_argument('--backfill', nargs=2, metavar=('START', 'END'),
+                        help='Stream NSE deals for START..END (YYYY-MM-DD) into storage and exit')
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue today's run from its last finished step without re-alerting")
+    parser.add_argument('--force', action='store_true',
+                        help='Run even if today is a weekend or exchange holiday')
+    parser.add_argument('--digest', choices=['day', 'week', 'month'],
+                        help="Send the digest for the current day / week / month from the rollups and exit")
+    parser.add_argument('--digest-date', help='Any day in the digest period (YYYY-MM-DD); default today')
+    args = parser.parse_args()
+    
+    if not args.backfill and not args.digest and not args.force and Config.SKIP_NON_TRADING_DAYS:
+        calendar = get_calendar(Config.TRADING_HOLIDAYS_PATH)
+        today = datetime.now().date()
+        if not calendar.is_trading_day(today):
+            kind = 'an exchange holiday' if calendar.is_holiday(today) else 'a weekend'
+            logger.info(f"↺ {today} is {kind} - no deals to fetch, skipping the run "
+                        f"(next trading day {calendar.next_trading_day(today)}; use --force to run anyway)")
+            return
+    
     try:
         automation = DealsAutomation()
-        automation.run()
+        if args.backfill:
+            start, end = (datetime.strptime(d, '%Y-%m-%d').date() for d in args.backfill)
+            automation.backfill(start, end)
+            return
+        if args.digest:
+            day = datetime.strptime(args.digest_date, '%Y-%m-%d').date() if args.digest_date else None
+            automation.send_digest(args.digest, day)
+            return
+        automation.run(catch_up=args.catch_up, resume=args.resume)
     except Exception as e:
         logger.error(f"Failed to initialize: {e}")
         logger.error(traceback.format_exc())
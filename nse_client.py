@@ -0,0 +1,166 @@
+"""
+First-party NSE Bulk/Block Deals Client
+
+Calls NSE's JSON API directly instead of going through nsepython:
+
+    https://www.nseindia.com/api/historical/bulk-deals?from=DD-MM-YYYY&to=DD-MM-YYYY
+    https://www.nseindia.com/api/historical/block-deals?from=DD-MM-YYYY&to=DD-MM-YYYY
+
+- one pooled SyncSession per client (cookies primed once from the home page)
+- responses are decoded column by column straight into the compact dtypes
+  (datetime64 dates, Int64 quantities, float64 prices, categorical text)
+- any date range; long ranges are split into MAX_RANGE_DAYS windows
+- on_timing(event) is called after every request with request/decode
+  seconds, rows and bytes
+"""
+
+import time
+import logging
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from async_http import SyncSession
+from deal_schema import concat_deal_frames
+from resilient_http import ResilientHTTP
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = 'https://www.nseindia.com'
+API_PATHS = {
+    'BULK': '/api/historical/bulk-deals',
+    'BLOCK': '/api/historical/block-deals',
+}
+
+# NSE rejects very long ranges, so they are fetched in windows
+MAX_RANGE_DAYS = 90
+
+# Output column -> JSON keys, historical API first, then the market snapshot API
+FIELDS = {
+    'deal_date': ('BD_DT_DATE', 'date'),
+    'symbol': ('BD_SYMBOL', 'symbol'),
+    'security_name': ('BD_SCRIP_NAME', 'name'),
+    'client_name': ('BD_CLIENT_NAME', 'clientName'),
+    'buy_sell': ('BD_BUY_SELL', 'buySell'),
+    'quantity_traded': ('BD_QTY_TRD', 'qty'),
+    'trade_price': ('BD_TP_WATP', 'watp'),
+    'remarks': ('BD_REMARKS', 'remarks'),
+}
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nseindia.com/report-detail/display-bulk-and-block-deals',
+}
+
+
+def _column(records: List[Dict], keys: tuple) -> Optional[list]:
+    """Values for the first key present in the payload, or None"""
+    if not records:
+        return None
+    for key in keys:
+        if key in records[0]:
+            return [record.get(key) for record in records]
+    return None
+
+
+def _numeric(values: list) -> pd.Series:
+    series = pd.Series(values, dtype=object)
+    # The API sometimes sends "1,23,456" instead of a number
+    text = series.map(lambda v: v.replace(',', '') if isinstance(v, str) else v)
+    return pd.to_numeric(text, errors='coerce')
+
+
+def decode_deals(payload, category: str) -> pd.DataFrame:
+    """NSE JSON payload -> frame with canonical column names and compact dtypes"""
+    records = payload.get('data', []) if isinstance(payload, dict) else payload
+    if not records:
+        return pd.DataFrame()
+
+    columns = {}
+    for name, keys in FIELDS.items():
+        values = _column(records, keys)
+        if values is None:
+            continue
+        if name == 'deal_date':
+            columns[name] = pd.to_datetime(pd.Series(values, dtype=object), format='%d-%b-%Y', errors='coerce')
+        elif name == 'quantity_traded':
+            columns[name] = _numeric(values).round().astype('Int64')
+        elif name == 'trade_price':
+            columns[name] = _numeric(values).astype('float64')
+        else:
+            text = pd.Series(values, dtype=object).str.strip()
+            if name in ('client_name', 'buy_sell'):
+                text = text.str.upper()
+            columns[name] = text.astype('category')
+
+    df = pd.DataFrame(columns)
+    if category == 'BLOCK' and 'remarks' in df.columns:
+        df = df.drop(columns=['remarks'])
+    return df
+
+
+class NSEClient:
+    """Bulk/block deals straight from NSE's JSON API"""
+
+    def __init__(self, session=None, on_timing: Optional[Callable[[Dict], None]] = None,
+                 base_url: str = BASE_URL):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or SyncSession()
+        self.session.headers.update(HEADERS)
+        self.http = ResilientHTTP(self.session)
+        self.on_timing = on_timing
+        self._primed = False
+
+    def _prime(self):
+        """NSE's API answers 401 until the home page has set its cookies"""
+        self.http.get(self.base_url, timeout=10)
+        self._primed = True
+
+    def _get_json(self, category: str, start: date, end: date):
+        url = f"{self.base_url}{API_PATHS[category]}"
+        params = {'from': start.strftime('%d-%m-%Y'), 'to': end.strftime('%d-%m-%Y')}
+        if not self._primed:
+            self._prime()
+
+        started = time.perf_counter()
+        response = self.http.get(url, params=params, timeout=20)
+        if response.status_code in (401, 403):
+            # Cookies expired - prime again once
+            self._prime()
+            response = self.http.get(url, params=params, timeout=20)
+        response.raise_for_status()
+        content = response.content
+        return response.json(), len(content), time.perf_counter() - started
+
+    def fetch_deals(self, category: str, start: date, end: date) -> pd.DataFrame:
+        """All deals of category ('BULK' / 'BLOCK') dated start..end"""
+        frames = []
+        window_start = start
+        while window_start <= end:
+            window_end = min(end, window_start + timedelta(days=MAX_RANGE_DAYS - 1))
+            payload, size, request_s = self._get_json(category, window_start, window_end)
+
+            started = time.perf_counter()
+            df = decode_deals(payload, category)
+            decode_s = time.perf_counter() - started
+
+            self._report({'category': category, 'start': window_start, 'end': window_end,
+                          'request_s': request_s, 'decode_s': decode_s, 'rows': len(df), 'bytes': size})
+            if not df.empty:
+                frames.append(df)
+            window_start = window_end + timedelta(days=1)
+
+        return concat_deal_frames(frames)
+
+    def _report(self, timing: Dict):
+        logger.debug(f"NSE {timing['category']} {timing['start']}..{timing['end']}: "
+                     f"{timing['rows']} rows, {timing['bytes']} bytes, "
+                     f"request {timing['request_s']:.3f}s, decode {timing['decode_s']:.3f}s")
+        if self.on_timing:
+            try:
+                self.on_timing(timing)
+            except Exception as e:
+                logger.warning(f"NSE timing hook failed: {e}")
@@ -2,34 +2,61 @@
 Fetch NSE Bulk/Block Deals using direct CSV download
 """
 
-import requests
+import io
 import pandas as pd
 from datetime import datetime
-import time
 from io import StringIO
 
+from async_http import SyncSession
+from resilient_http import ResilientHTTP
+
+
+class _ResponseStream(io.RawIOBase):
+    """Read-only file view over response.iter_content(), one chunk at a time"""
+    
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b''
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, b):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
 class NSECSVFetcher:
     """Fetch NSE data using CSV download endpoints"""
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, http=None, base_url='https://www.nseindia.com'):
+        self.base_url = base_url.rstrip('/')
+        self.session = SyncSession()
+        # Retries, hedging and the nseindia.com circuit breaker
+        self.http = http or ResilientHTTP(self.session)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.nseindia.com/report-detail/display-bulk-and-block-deals'
+            'Referer': f'{self.base_url}/report-detail/display-bulk-and-block-deals'
         }
         self._get_cookies()
     
     def _get_cookies(self):
         """Visit main page to get cookies"""
         try:
-            self.session.get('https://www.nseindia.com', headers=self.headers, timeout=10)
-            time.sleep(1)
+            # Spacing between requests comes from the shared rate limiter
+            self.http.get(self.base_url, headers=self.headers, timeout=10)
             # Visit the deals page
-            self.session.get('https://www.nseindia.com/report-detail/display-bulk-and-block-deals', 
+            self.http.get(f'{self.base_url}/report-detail/display-bulk-and-block-deals', 
                            headers=self.headers, timeout=10)
-            time.sleep(1)
             print("Cookies obtained")
         except Exception as e:
             print(f"Error getting cookies: {e}")
@@ -46,11 +73,11 @@ class NSECSVFetcher:
                 to_date = (datetime.now()).strftime('%d-%m-%Y')
             
             # CSV download URL with date parameters
-            url = f"https://www.nseindia.com/api/historical/bulk-deals?from={from_date}&to={to_date}&csv=true"
+            url = f"{self.base_url}/api/historical/bulk-deals?from={from_date}&to={to_date}&csv=true"
             
             print(f"Fetching bulk deals from {from_date} to {to_date}...")
             
-            response = self.session.get(url, headers=self.headers, timeout=20)
+            response = self.http.get(url, headers=self.headers, timeout=20)
             response.raise_for_status()
             
             # Try to parse as CSV
@@ -72,6 +99,35 @@ class NSECSVFetcher:
             print(f"Error: {e}")
             return None
     
+    def stream_deals_csv(self, category, from_date, to_date, chunksize=50000):
+        """
+        Yield a historical range as DataFrame chunks of at most chunksize rows
+        category: 'BULK' or 'BLOCK'; dates in format: DD-MM-YYYY
+        
+        The response is read with stream=True and parsed as it arrives, so
+        memory stays at one chunk however long the range is.
+        """
+        kind = 'bulk-deals' if category == 'BULK' else 'block-deals'
+        url = f"{self.base_url}/api/historical/{kind}?from={from_date}&to={to_date}&csv=true"
+        
+        print(f"Streaming {category.lower()} deals from {from_date} to {to_date}...")
+        
+        response = self.http.get(url, headers=self.headers, timeout=20, stream=True)
+        try:
+            response.raise_for_status()
+            raw = io.BufferedReader(_ResponseStream(response.iter_content(chunk_size=64 * 1024)))
+            text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace')
+            try:
+                reader = pd.read_csv(text, chunksize=chunksize)
+            except pd.errors.EmptyDataError:
+                print("No data available for these dates")
+                return
+            with reader:
+                for chunk in reader:
+                    yield chunk
+        finally:
+            response.close()
+    
     def fetch_block_deals_csv(self, from_date=None, to_date=None):
         """
         Fetch block deals CSV
@@ -83,11 +139,11 @@ class NSECSVFetcher:
             if to_date is None:
                 to_date = (datetime.now()).strftime('%d-%m-%Y')
             
-            url = f"https://www.nseindia.com/api/historical/block-deals?from={from_date}&to={to_date}&csv=true"
+            url = f"{self.base_url}/api/historical/block-deals?from={from_date}&to={to_date}&csv=true"
             
             print(f"Fetching block deals from {from_date} to {to_date}...")
             
-            response = self.session.get(url, headers=self.headers, timeout=20)
+            response = self.http.get(url, headers=self.headers, timeout=20)
             response.raise_for_status()
             
             try:
@@ -133,8 +189,6 @@ def test_last_week():
         bulk.to_csv('NSE_Bulk_LastWeek.csv', index=False)
         print(f"\nSaved to: NSE_Bulk_LastWeek.csv")
     
-    time.sleep(2)  # Be polite to the server
-    
     # Block deals
     print("\n2. BLOCK DEALS:")
     block = fetcher.fetch_block_deals_csv(from_date, to_date)
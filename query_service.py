@@ -0,0 +1,415 @@
+"""
+Local Deal Query Service
+
+Answers ad-hoc questions over the stored deal history ("deals by HRTI in
+the last 30 days") as HTTP/JSON instead of hand-written PostgREST calls
+against four tables:
+
+    GET /deals?client=HRTI&days=30
+    GET /deals?symbol=RELIANCE&from=2025-09-01&to=2025-09-30&side=buy&category=bulk
+    GET /stats
+
+Filters: from / to / days (deal_date range), symbol (NSE symbol, BSE scrip
+code or ISIN), client (case-insensitive substring), side (buy / sell),
+category (bulk / block), exchange (nse / bse), limit (rows returned).
+
+- The date range and symbol are pushed down to the backend's indexed
+  deal_date / symbol / scrip_code columns (DatabaseManager.query_deals),
+  on the local mirror when dual-writing
+- client and side are filtered on the categories of the narrowed frame,
+  so each distinct client name is tested once
+- Results are cached in an LRU keyed by the normalized query (relative
+  ranges resolved, names upper-cased, filters in canonical order)
+- Storing deals through the same DatabaseManager drops only the cached
+  queries whose tables and date range cover the new deals; deals stored
+  by other processes are noticed by a row-count check at most every
+  QUERY_REFRESH_SECONDS
+
+Usage:
+    python query_service.py --port 8765
+    python query_service.py --db deals.sqlite
+"""
+
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from deal_schema import concat_deal_frames
+
+logger = logging.getLogger(__name__)
+
+# kind -> (exchange, category)
+KINDS = {
+    'nse_bulk': ('NSE', 'BULK'),
+    'nse_block': ('NSE', 'BLOCK'),
+    'bse_bulk': ('BSE', 'BULK'),
+    'bse_block': ('BSE', 'BLOCK'),
+}
+
+RESULT_COLUMNS = [
+    'kind', 'deal_date', 'source', 'deal_category', 'symbol', 'scrip_code', 'isin', 'security_name',
+    'client_name', 'buy_sell', 'quantity_traded', 'trade_price',
+]
+
+DEFAULT_LIMIT = 1000
+
+
+def _kind_tables() -> Dict[str, str]:
+    from main import Config
+    return {
+        'nse_bulk': Config.TABLE_NSE_BULK,
+        'nse_block': Config.TABLE_NSE_BLOCK,
+        'bse_bulk': Config.TABLE_BSE_BULK,
+        'bse_block': Config.TABLE_BSE_BLOCK,
+    }
+
+
+def _parse_date(value: str, name: str) -> date:
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date, got {value!r}")
+
+
+def _looks_like_isin(identifier: str) -> bool:
+    return len(identifier) == 12 and identifier[:2].isalpha() and identifier.isalnum()
+
+
+@dataclass(frozen=True)
+class DealQuery:
+    """Normalized query; equal questions give equal (hashable) queries"""
+
+    kinds: Tuple[str, ...] = tuple(KINDS)
+    start: Optional[date] = None
+    end: Optional[date] = None
+    symbol: Optional[str] = None
+    client: Optional[str] = None
+    side: Optional[str] = None
+
+    @classmethod
+    def from_params(cls, params: Dict[str, str], today: Optional[date] = None) -> 'DealQuery':
+        """Build from query-string parameters, raising ValueError on bad input"""
+        params = {key: value.strip() for key, value in params.items() if value and value.strip()}
+        unknown = set(params) - {'from', 'to', 'days', 'symbol', 'client', 'side', 'category', 'exchange', 'limit'}
+        if unknown:
+            raise ValueError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+        today = today or date.today()
+
+        end = _parse_date(params['to'], 'to') if 'to' in params else None
+        start = _parse_date(params['from'], 'from') if 'from' in params else None
+        if 'days' in params:
+            if not params['days'].isdigit() or int(params['days']) < 1:
+                raise ValueError(f"days must be a positive integer, got {params['days']!r}")
+            end = end or today
+            start = end - timedelta(days=int(params['days']) - 1)
+        if start and end and start > end:
+            raise ValueError(f"from ({start}) is after to ({end})")
+
+        side = None
+        if 'side' in params:
+            side = params['side'].upper()[:1]
+            if side not in ('B', 'S'):
+                raise ValueError(f"side must be buy or sell, got {params['side']!r}")
+
+        exchanges = {e.strip().upper() for e in params.get('exchange', 'NSE,BSE').split(',')}
+        categories = {c.strip().upper() for c in params.get('category', 'BULK,BLOCK').split(',')}
+        for value, allowed, name in ((exchanges, {'NSE', 'BSE'}, 'exchange'),
+                                     (categories, {'BULK', 'BLOCK'}, 'category')):
+            if not value <= allowed:
+                raise ValueError(f"{name} must be one of {', '.join(sorted(allowed)).lower()}")
+        kinds = tuple(kind for kind, (exchange, category) in KINDS.items()
+                      if exchange in exchanges and category in categories)
+
+        return cls(
+            kinds=kinds,
+            start=start,
+            end=end,
+            symbol=params['symbol'].upper() if 'symbol' in params else None,
+            client=' '.join(params['client'].upper().split()) if 'client' in params else None,
+            side=side,
+        )
+
+    def covers(self, kind: str, first: Optional[date], last: Optional[date]) -> bool:
+        """Could deals of this kind dated first..last change the result?"""
+        if kind not in self.kinds:
+            return False
+        if first is None or last is None:
+            return True
+        return (self.start is None or last >= self.start) and (self.end is None or first <= self.end)
+
+    def to_dict(self) -> Dict:
+        values = asdict(self)
+        values['kinds'] = list(self.kinds)
+        values['start'] = self.start.isoformat() if self.start else None
+        values['end'] = self.end.isoformat() if self.end else None
+        return values
+
+
+def _category_mask(column: pd.Series, test) -> pd.Series:
+    """test(text) per row, evaluated once per distinct value"""
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype('category')
+    hits = [test(str(value).upper()) for value in column.cat.categories]
+    matched = column.cat.categories[[i for i, hit in enumerate(hits) if hit]]
+    return column.isin(matched)
+
+
+def filter_deals(df: pd.DataFrame, query: DealQuery) -> pd.DataFrame:
+    """Apply the filters the backend could not push down"""
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if query.symbol:
+        symbol_mask = pd.Series(False, index=df.index)
+        for column in ('symbol', 'scrip_code', 'isin'):
+            if column in df.columns:
+                symbol_mask |= _category_mask(df[column], lambda text: text == query.symbol)
+        mask &= symbol_mask
+    if query.client:
+        if 'client_name' not in df.columns:
+            return df.iloc[:0]
+        mask &= _category_mask(df['client_name'], lambda text: query.client in ' '.join(text.split()))
+    if query.side:
+        mask &= _category_mask(df['buy_sell'], lambda text: text.strip()[:1] == query.side)
+    return df[mask]
+
+
+class QueryCache:
+    """Thread-safe LRU of query -> result frame"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[DealQuery, pd.DataFrame]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, query: DealQuery) -> Optional[pd.DataFrame]:
+        with self._lock:
+            result = self._entries.get(query)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(query)
+            self.hits += 1
+            return result
+
+    def put(self, query: DealQuery, result: pd.DataFrame):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[query] = result
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind: str, first: Optional[date] = None, last: Optional[date] = None) -> int:
+        """Drop cached queries that deals of this kind dated first..last affect"""
+        with self._lock:
+            stale = [query for query in self._entries if query.covers(kind, first, last)]
+            for query in stale:
+                del self._entries[query]
+            self.invalidated += len(stale)
+            return len(stale)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidated': self.invalidated,
+            }
+
+
+class QueryService:
+    """Cached deal queries over a DatabaseManager"""
+
+    def __init__(self, db_manager, cache_size: Optional[int] = None, refresh_seconds: Optional[float] = None):
+        from main import Config
+        self.db = db_manager
+        self.cache = QueryCache(Config.QUERY_CACHE_SIZE if cache_size is None else cache_size)
+        self.refresh_seconds = Config.QUERY_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self.tables = _kind_tables()
+        self._kinds = {table: kind for kind, table in self.tables.items()}
+        # One backend call at a time (SQLite connections are shared across threads)
+        self._db_lock = threading.Lock()
+        self._row_counts: Dict[str, Optional[int]] = {}
+        self._checked_at = 0.0
+        db_manager.store_listeners.append(self.on_store)
+        self._check_for_new_deals(force=True)
+
+    def on_store(self, table_name: str, df: pd.DataFrame):
+        """DatabaseManager listener: drop cached results the new deals change"""
+        kind = self._kinds.get(table_name)
+        if kind is None:
+            return
+        dates = pd.to_datetime(df['deal_date'], errors='coerce').dropna() if 'deal_date' in df.columns \
+            else pd.Series(dtype='datetime64[ns]')
+        if dates.empty:
+            dropped = self.cache.invalidate(kind)
+        else:
+            dropped = self.cache.invalidate(kind, dates.min().date(), dates.max().date())
+        # Our own writes should not look like another process's on the next check
+        self._row_counts.pop(table_name, None)
+        logger.debug(f"Invalidated {dropped} cached queries after storing {len(df)} {kind} deals")
+
+    def _check_for_new_deals(self, force: bool = False):
+        """Flush cached results for tables whose row count changed behind our back"""
+        if not force and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = time.monotonic()
+        for kind, table in self.tables.items():
+            try:
+                with self._db_lock:
+                    count = self.db.backend.count(table)
+            except Exception as e:
+                logger.warning(f"Could not count {table}: {e}")
+                continue
+            previous = self._row_counts.get(table)
+            if previous is not None and count != previous:
+                logger.info(f"↺ {table} changed ({previous} -> {count} rows), "
+                            f"dropped {self.cache.invalidate(kind)} cached queries")
+            self._row_counts[table] = count
+
+    def _fetch(self, query: DealQuery) -> pd.DataFrame:
+        from storage import symbol_column
+
+        frames = []
+        for kind in query.kinds:
+            table = self.tables[kind]
+            # NSE tables index symbol, BSE tables scrip_code; other identifiers
+            # (ISINs, the other exchange's code) are matched after the fetch
+            symbol = query.symbol
+            if symbol is not None and (_looks_like_isin(symbol)
+                                       or symbol.isdigit() != (symbol_column(table) == 'scrip_code')):
+                symbol = None
+            with self._db_lock:
+                df = self.db.query_deals(table, query.start, query.end, symbol, analytics=True)
+            df = filter_deals(df, query)
+            if df.empty:
+                continue
+            if 'security_name' not in df.columns and 'scrip_name' in df.columns:
+                df = df.rename(columns={'scrip_name': 'security_name'})
+            df = df.assign(kind=kind)
+            frames.append(df[[column for column in RESULT_COLUMNS if column in df.columns]])
+
+        result = concat_deal_frames(frames)
+        if result.empty:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        return result.sort_values('deal_date', ascending=False, kind='stable').reset_index(drop=True)
+
+    def query(self, query: DealQuery) -> Tuple[pd.DataFrame, bool]:
+        """(deals, served_from_cache)"""
+        self._check_for_new_deals()
+        result = self.cache.get(query)
+        if result is not None:
+            return result, True
+        result = self._fetch(query)
+        self.cache.put(query, result)
+        return result, False
+
+    def query_json(self, params: Dict[str, str]) -> bytes:
+        """Response body for GET /deals"""
+        query = DealQuery.from_params(params)
+        limit = params.get('limit', '').strip() or str(DEFAULT_LIMIT)
+        if not limit.isdigit():
+            raise ValueError(f"limit must be a non-negative integer, got {limit!r}")
+
+        started = time.perf_counter()
+        result, cached = self.query(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        rows = result.head(int(limit))
+        if 'deal_date' in rows.columns:
+            rows = rows.assign(deal_date=pd.to_datetime(rows['deal_date']).dt.strftime('%Y-%m-%d'))
+        header = json.dumps({
+            'query': query.to_dict(),
+            'count': len(result),
+            'returned': len(rows),
+            'cached': cached,
+            'elapsed_ms': round(elapsed_ms, 2),
+        })
+        return f'{header[:-1]}, "deals": {rows.to_json(orient="records")}}}'.encode('utf-8')
+
+    def serve(self, host: str = '127.0.0.1', port: int = 8765):
+        """Serve until interrupted"""
+        server = ThreadingHTTPServer((host, port), _handler(self))
+        logger.info(f"✓ Query service listening on http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            logger.info(f"Query cache: {self.cache.metrics()}")
+
+
+def _handler(service: QueryService):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str):
+            self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            try:
+                if url.path == '/deals':
+                    self._send(200, service.query_json(dict(parse_qsl(url.query))))
+                elif url.path == '/stats':
+                    self._send(200, json.dumps(service.cache.metrics()).encode('utf-8'))
+                else:
+                    self._error(404, f"Unknown path {url.path} (use /deals or /stats)")
+            except ValueError as e:
+                self._error(400, str(e))
+            except Exception as e:
+                logger.error(f"Query failed for {self.path}: {e}")
+                self._error(500, 'query failed')
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return QueryHandler
+
+
+def main():
+    """Command line entry point"""
+    from main import Config, DatabaseManager
+    from storage import SQLiteBackend
+
+    parser = argparse.ArgumentParser(description='Local HTTP/JSON query service over stored deals')
+    parser.add_argument('--db', help='Query this SQLite file instead of the configured backend')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=Config.QUERY_SERVICE_PORT)
+    parser.add_argument('--cache-size', type=int, default=None, help='Cached queries (default: QUERY_CACHE_SIZE)')
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(backend=SQLiteBackend(args.db)) if args.db else DatabaseManager()
+    QueryService(db_manager, cache_size=args.cache_size).serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Token-Bucket Rate Limiter for Exchange Endpoints
+
+One bucket per host, or per host + path when a limit is configured for
+that endpoint. Every exchange request (ResilientHTTP.get) takes a token
+first, so concurrent backfills and polling share one request budget
+instead of tripping NSE's anti-bot 403s.
+
+- limits are "rate:burst" (requests per second : bucket size), from
+  DEFAULT_LIMITS and RATE_LIMITS, e.g.
+      RATE_LIMITS="www.nseindia.com=0.5:2,www.nseindia.com/api/historical/bulk-deals=0.2:1"
+- usable from threads (acquire) and asyncio (acquire_async); the lock is
+  only held to reserve a slot, never while waiting
+- adaptive: a 429/403 halves the bucket's rate and honours Retry-After;
+  each success restores 10% of the configured rate
+- RATE_LIMIT_STATE=path shares bucket state between processes through a
+  flock'ed JSON file (POSIX only; per-process buckets elsewhere)
+- metrics() reports requests, waits and throttles per bucket
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# key -> (requests per second, burst)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'www.nseindia.com': (1.0, 3),
+    # Config.NSE_ARCHIVE_URL (today's bulk.csv / block.csv)
+    'archives.nseindia.com': (1.0, 3),
+    'api.bseindia.com': (2.0, 5),
+    'www.bseindia.com': (2.0, 5),
+}
+DEFAULT_LIMIT = (5.0, 10)
+
+THROTTLE_STATUSES = {403, 429}
+
+# Throttling never slows a bucket below this fraction of its configured rate
+MIN_RATE_FACTOR = 0.1
+RECOVERY_STEP = 0.1
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """'key=rate:burst,key=rate:burst' -> {key: (rate, burst)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            key, value = item.split('=', 1)
+            rate, _, burst = value.partition(':')
+            limits[key.strip()] = (float(rate), float(burst or 1))
+        except ValueError:
+            logger.warning(f"Ignoring malformed rate limit {item!r}")
+    return limits
+
+
+class _StateFile:
+    """Bucket states shared between processes: JSON guarded by an flock"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = path + '.lock'
+
+    @contextmanager
+    def locked(self):
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                states = {}
+                if os.path.exists(self.path):
+                    try:
+                        with open(self.path, encoding='utf-8') as f:
+                            states = json.load(f)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Resetting unreadable rate limit state {self.path}: {e}")
+                yield states
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(states, f)
+                os.replace(tmp_path, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    """Tokens refill at `rate` per second up to `burst`
+
+    Reservations may drive the balance negative. A caller that finds a
+    debt waits it off, so concurrent callers queue up in reservation
+    order without holding the lock while sleeping.
+    """
+
+    def __init__(self, key: str, rate: float, burst: float, state_file: Optional[_StateFile] = None):
+        self.key = key
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        # Wall clock, so persisted state means the same thing in every process
+        self.updated = time.time()
+        self.state_file = state_file
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.throttled = 0
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _state(self):
+        """Hold the bucket, synced with the shared state file when configured"""
+        with self._lock:
+            if not self.state_file:
+                yield
+                return
+            with self.state_file.locked() as states:
+                saved = states.get(self.key)
+                if saved:
+                    self.tokens, self.updated, self.rate = saved
+                yield
+                states[self.key] = [self.tokens, self.updated, self.rate]
+
+    def _refill(self, now: float):
+        # updated lies in the future while a Retry-After is pending, which
+        # turns the remaining block into debt
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # ------------------------------------------------------------------
+    # Acquiring
+    # ------------------------------------------------------------------
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens now; returns the seconds the caller must wait before using them"""
+        with self._state():
+            self._refill(time.time())
+            self.tokens -= tokens
+            wait = max(0.0, -self.tokens / self.rate)
+            self.requests += 1
+            if wait > 0:
+                self.waits += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+        return wait
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until tokens are available; returns the time waited"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    # ------------------------------------------------------------------
+    # Adapting
+    # ------------------------------------------------------------------
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """Server pushed back: halve the rate and pause for Retry-After"""
+        with self._state():
+            now = time.time()
+            self._refill(now)
+            self.rate = max(self.configured_rate * MIN_RATE_FACTOR, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.updated = max(self.updated, now + retry_after)
+            self.throttled += 1
+            rate = self.rate
+        logger.warning(f"⚠️  Throttled by {self.key}; slowing to {rate:.2f} req/s"
+                       + (f", paused {retry_after:.0f}s" if retry_after else ""))
+
+    def recover(self):
+        """A request succeeded: step back towards the configured rate"""
+        if self.rate >= self.configured_rate and not self.state_file:
+            return
+        with self._state():
+            self.rate = min(self.configured_rate, self.rate + self.configured_rate * RECOVERY_STEP)
+
+    def metrics(self) -> Dict:
+        return {
+            'rate': round(self.rate, 3),
+            'burst': self.burst,
+            'requests': self.requests,
+            'waits': self.waits,
+            'wait_total_s': round(self.wait_total, 3),
+            'wait_max_s': round(self.wait_max, 3),
+            'throttled': self.throttled,
+        }
+
+
+class RateLimiter:
+    """Buckets by host / endpoint, created on first use"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 default: Tuple[float, float] = DEFAULT_LIMIT, state_path: str = ''):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.default = default
+        self.state_file = None
+        if state_path:
+            if fcntl is None:
+                logger.warning("RATE_LIMIT_STATE needs flock; rate limits are per process")
+            else:
+                self.state_file = _StateFile(state_path)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_key(self, url: str) -> str:
+        """host/path if that endpoint has its own limit, otherwise host"""
+        parts = urlsplit(url)
+        endpoint = f"{parts.netloc}{parts.path}".rstrip('/')
+        return endpoint if endpoint in self.limits else parts.netloc
+
+    def bucket(self, url: str) -> TokenBucket:
+        key = self.bucket_key(url)
+        with self._lock:
+            if key not in self.buckets:
+                rate, burst = self.limits.get(key, self.default)
+                self.buckets[key] = TokenBucket(key, rate, burst, self.state_file)
+            return self.buckets[key]
+
+    def acquire(self, url: str) -> float:
+        return self.bucket(url).acquire()
+
+    async def acquire_async(self, url: str) -> float:
+        return await self.bucket(url).acquire_async()
+
+    def observe(self, url: str, status_code: int, headers=None):
+        """Feed a response status back into the bucket"""
+        bucket = self.bucket(url)
+        if status_code in THROTTLE_STATUSES:
+            bucket.throttle(_retry_after(headers))
+        elif status_code < 400:
+            bucket.recover()
+
+    def metrics(self) -> Dict[str, Dict]:
+        with self._lock:
+            buckets = list(self.buckets.values())
+        return {bucket.key: bucket.metrics() for bucket in buckets}
+
+    def log_metrics(self):
+        for key, m in self.metrics().items():
+            logger.info(f"  {key}: {m['requests']} requests, waited {m['wait_total_s']:.1f}s "
+                        f"(max {m['wait_max_s']:.1f}s), throttled {m['throttled']}x")
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Retry-After in seconds (HTTP-date values are ignored)"""
+    if not headers:
+        return None
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    """Process-wide limiter configured from RATE_LIMITS / RATE_LIMIT_STATE"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter({**DEFAULT_LIMITS, **parse_limits(os.getenv('RATE_LIMITS', ''))},
+                                   state_path=os.getenv('RATE_LIMIT_STATE', ''))
+        return _limiter
@@ -0,0 +1,544 @@
+"""
+Offline Replay Mode for the Deals Automation
+
+Runs DealsAutomation.run() end-to-end without touching NSE, BSE, Supabase,
+Gmail or Telegram:
+
+- NSE: recorded nsepython frames (JSON/CSV) are fed to NSEDataFetcher
+- BSE: recorded deals pages (HTML) are served by a replay session, so the
+  real pd.read_html + _clean_*_data path runs
+- Supabase: a SQLite database with the supabase_schema.sql layout behind a
+  PostgREST-style client (table().select().eq()...execute())
+- Email / Telegram: captured sinks that write everything to disk
+
+The bundled NSE_*/BSE_* CSVs can be used as recordings; they are turned back
+into the raw nsepython / BSE page formats before being replayed.
+
+Usage:
+    python replay.py --recording-dir . --trade-date 2025-10-03
+    python replay.py --recording-dir recordings/ --db replay.sqlite --profile
+"""
+
+import os
+import glob
+import json
+import sqlite3
+import logging
+import argparse
+import cProfile
+import pstats
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from alert_ledger import AlertLedger
+from storage import SCHEMA_FILE, load_schema_statements
+
+logger = logging.getLogger(__name__)
+
+# Processed CSV column -> raw nsepython column
+NSE_RAW_COLUMNS = {
+    'deal_date': 'Date',
+    'symbol': 'Symbol',
+    'security_name': 'Security Name',
+    'client_name': 'Client Name',
+    'buy_sell': 'Buy/Sell',
+    'quantity_traded': 'Quantity Traded',
+    'trade_price': 'Trade Price / Wght. Avg. Price',
+    'remarks': 'Remarks',
+}
+
+# Processed CSV column -> raw BSE deals page header
+BSE_RAW_COLUMNS = {
+    'deal_date': 'Deal Date',
+    'scrip_code': 'Security Code',
+    'scrip_name': 'Security Name',
+    'client_name': 'Client Name',
+    'buy_sell': 'Deal Type *',
+    'quantity_traded': 'Quantity',
+    'trade_price': 'Price **',
+    'Trade Price': 'Price **',
+}
+
+# Columns added by the fetchers themselves - never part of a raw payload
+METADATA_COLUMNS = ['fetch_date', 'source', 'deal_category']
+
+# Recording file patterns, most specific first
+RECORDING_PATTERNS = {
+    'nse_bulk': ['nse_bulk.json', 'nse_bulk.csv', 'NSE_Bulk_Deals_*.csv'],
+    'nse_block': ['nse_block.json', 'nse_block.csv', 'NSE_Block_Deals_*.csv'],
+    'bse_bulk': ['bse_bulk.html', 'BSE_Bulk_Deals_*.csv'],
+    'bse_block': ['bse_block.html', 'BSE_Block_Deals_*.csv'],
+}
+
+BSE_URL_KEYS = {
+    'bulk_deals.aspx': 'bse_bulk',
+    'block_deals.aspx': 'bse_block',
+}
+
+
+# ============================================================================
+# LOCAL POSTGREST STAND-IN
+# ============================================================================
+
+class LocalAPIError(Exception):
+    """Raised where PostgREST would answer with an error"""
+
+
+class LocalResponse:
+    """Mimics the postgrest APIResponse (data + count)"""
+
+    def __init__(self, data: List[Dict[str, Any]], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class LocalQuery:
+    """Subset of the postgrest query builder used by this project"""
+
+    _OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+    def __init__(self, client: 'LocalSupabaseClient', table: str):
+        self.client = client
+        self.table = table
+        self.mode = 'select'
+        self.columns = '*'
+        self.count_mode = None
+        self.filters = []
+        self.order_by = []
+        self.limit_n = None
+        self.offset_n = None
+        self.rows = []
+
+    def select(self, columns: str = '*', count: Optional[str] = None) -> 'LocalQuery':
+        self.mode = 'select'
+        self.columns = columns
+        self.count_mode = count
+        return self
+
+    def insert(self, rows) -> 'LocalQuery':
+        self.mode = 'insert'
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def _filter(self, op: str, column: str, value) -> 'LocalQuery':
+        self.filters.append((column, self._OPERATORS[op], value))
+        return self
+
+    def eq(self, column, value): return self._filter('eq', column, value)
+    def neq(self, column, value): return self._filter('neq', column, value)
+    def gt(self, column, value): return self._filter('gt', column, value)
+    def gte(self, column, value): return self._filter('gte', column, value)
+    def lt(self, column, value): return self._filter('lt', column, value)
+    def lte(self, column, value): return self._filter('lte', column, value)
+
+    def in_(self, column: str, values) -> 'LocalQuery':
+        self.filters.append((column, 'IN', list(values)))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> 'LocalQuery':
+        self.order_by.append(f'"{column}" {"DESC" if desc else "ASC"}')
+        return self
+
+    def limit(self, n: int) -> 'LocalQuery':
+        self.limit_n = int(n)
+        return self
+
+    def offset(self, n: int) -> 'LocalQuery':
+        self.offset_n = int(n)
+        return self
+
+    def range(self, start: int, end: int) -> 'LocalQuery':
+        self.offset_n = int(start)
+        self.limit_n = int(end) - int(start) + 1
+        return self
+
+    def execute(self) -> LocalResponse:
+        if self.mode == 'insert':
+            return self.client._insert(self.table, self.rows)
+        return self.client._select(self)
+
+
+class LocalSupabaseClient:
+    """SQLite-backed stand-in for supabase.Client
+
+    Creates the supabase_schema.sql tables on first use and rejects
+    unknown columns the same way PostgREST does.
+    """
+
+    def __init__(self, db_path: str = ':memory:', schema_file: str = SCHEMA_FILE):
+        self.db_path = db_path
+        # The PostgREST stand-in (standins/postgrest.py) calls in from its handler threads
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        for stmt in load_schema_statements('sqlite', schema_file):
+            self.conn.execute(stmt)
+        self.conn.commit()
+        self._columns: Dict[str, List[str]] = {}
+        logger.info(f"Local database stand-in ready at {db_path}")
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    def table_columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            rows = self.conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            if not rows:
+                raise LocalAPIError(f'relation "{table}" does not exist')
+            self._columns[table] = [row['name'] for row in rows]
+        return self._columns[table]
+
+    def _insert(self, table: str, rows: List[Dict[str, Any]]) -> LocalResponse:
+        if not rows:
+            return LocalResponse([])
+
+        known = set(self.table_columns(table))
+        columns = list(rows[0].keys())
+        unknown = [c for c in columns if c not in known]
+        if unknown:
+            raise LocalAPIError(f"Could not find the '{unknown[0]}' column of '{table}'")
+
+        col_sql = ', '.join(f'"{c}"' for c in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        self.conn.executemany(
+            f'INSERT INTO "{table}" ({col_sql}) VALUES ({placeholders})',
+            [tuple(row.get(c) for c in columns) for row in rows]
+        )
+        self.conn.commit()
+        return LocalResponse(rows)
+
+    def _select(self, query: LocalQuery) -> LocalResponse:
+        self.table_columns(query.table)
+
+        if query.columns.strip() == '*':
+            col_sql = '*'
+        else:
+            col_sql = ', '.join(f'"{c.strip()}"' for c in query.columns.split(','))
+
+        where, params = [], []
+        for column, op, value in query.filters:
+            if op == 'IN':
+                where.append(f'"{column}" IN ({", ".join("?" for _ in value)})')
+                params.extend(value)
+            else:
+                where.append(f'"{column}" {op} ?')
+                params.append(value)
+        where_sql = f' WHERE {" AND ".join(where)}' if where else ''
+
+        sql = f'SELECT {col_sql} FROM "{query.table}"{where_sql}'
+        if query.order_by:
+            sql += ' ORDER BY ' + ', '.join(query.order_by)
+        if query.limit_n is not None or query.offset_n:
+            # SQLite needs a LIMIT before OFFSET; -1 means none
+            sql += f' LIMIT {query.limit_n if query.limit_n is not None else -1}'
+            if query.offset_n:
+                sql += f' OFFSET {query.offset_n}'
+
+        data = [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+        count = None
+        if query.count_mode:
+            count = self.conn.execute(
+                f'SELECT COUNT(*) FROM "{query.table}"{where_sql}', params
+            ).fetchone()[0]
+        return LocalResponse(data, count)
+
+    def seed_monitored_investors(self, investors: List[Dict[str, Any]]):
+        """Load monitored investors (investor_name, display_name, category, priority)"""
+        rows = [{
+            'investor_name': inv['investor_name'],
+            'display_name': inv.get('display_name', inv['investor_name']),
+            'category': inv.get('category', ''),
+            'priority': inv.get('priority', 0),
+            'is_active': inv.get('is_active', True),
+        } for inv in investors]
+        added = self._seed('monitored_investors', 'investor_name', rows)
+        logger.info(f"Seeded {added} monitored investors ({len(rows) - added} already present)")
+
+    def seed_monitored_symbols(self, symbols: List[Dict[str, Any]]):
+        """Load the symbol watchlist (symbol, display_name, category, priority)"""
+        rows = [{
+            'symbol': entry['symbol'],
+            'display_name': entry.get('display_name', entry['symbol']),
+            'category': entry.get('category', 'Watchlist'),
+            'priority': entry.get('priority', 0),
+            'is_active': entry.get('is_active', True),
+        } for entry in symbols]
+        added = self._seed('monitored_symbols', 'symbol', rows)
+        logger.info(f"Seeded {added} watched symbols ({len(rows) - added} already present)")
+
+    def _seed(self, table: str, key: str, rows: List[Dict[str, Any]]) -> int:
+        """Insert the rows whose key is not stored yet, so re-running on the same --db adds nothing"""
+        present = {row[0] for row in self.conn.execute(f'SELECT "{key}" FROM "{table}"')}
+        fresh = []
+        for row in rows:
+            if row[key] not in present:
+                present.add(row[key])
+                fresh.append(row)
+        self._insert(table, fresh)
+        return len(fresh)
+
+
+# ============================================================================
+# RECORDED PAYLOADS
+# ============================================================================
+
+def find_recording(recording_dir: str, key: str) -> Optional[str]:
+    """Locate the recording file for nse_bulk / nse_block / bse_bulk / bse_block"""
+    for pattern in RECORDING_PATTERNS[key]:
+        matches = sorted(glob.glob(os.path.join(recording_dir, pattern)))
+        if matches:
+            return matches[-1]
+    return None
+
+
+def _read_recorded_frame(path: str) -> pd.DataFrame:
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        # Accept both a bare record list and NSE's {"data": [...]} envelope
+        if isinstance(payload, dict):
+            payload = payload.get('data', [])
+        return pd.DataFrame(payload)
+    # nsepython builds its frames with read_csv, so let pandas infer types
+    return pd.read_csv(path)
+
+
+class RecordedNSESource:
+    """Callable returning a recorded nsepython frame (raw column names)"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.frame = None
+        if path:
+            df = _read_recorded_frame(path)
+            df = df.drop(columns=[c for c in METADATA_COLUMNS if c in df.columns])
+            self.frame = df.rename(columns=NSE_RAW_COLUMNS)
+
+    def __call__(self) -> pd.DataFrame:
+        if self.frame is None:
+            return pd.DataFrame()
+        # The fetcher renames/filters in place - hand out a copy each time
+        return self.frame.copy()
+
+    def chunks(self, chunksize: int = 50000):
+        """The recording in slices, standing in for a streamed CSV download"""
+        frame = self()
+        for offset in range(0, len(frame), chunksize):
+            yield frame.iloc[offset:offset + chunksize].copy()
+
+
+def render_bse_page(path: str) -> bytes:
+    """Return a BSE deals page: the recorded HTML, or one rebuilt from a CSV"""
+    if path.endswith('.html'):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df = df.drop(columns=[c for c in METADATA_COLUMNS if c in df.columns])
+    if 'deal_date' in df.columns:
+        # The live page uses DD/MM/YYYY
+        df['deal_date'] = pd.to_datetime(df['deal_date'], errors='coerce').dt.strftime('%d/%m/%Y')
+    df = df.rename(columns=BSE_RAW_COLUMNS)
+    return f"<html><body>{df.to_html(index=False)}</body></html>".encode('utf-8')
+
+
+class ReplayResponse:
+    """Minimal requests.Response look-alike"""
+
+    def __init__(self, status_code: int = 200, content: bytes = b'', url: str = ''):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} replay error for {self.url}", response=self)
+
+
+class ReplaySession:
+    """requests.Session stand-in serving recorded BSE pages by URL"""
+
+    def __init__(self, pages: Dict[str, bytes]):
+        self.pages = pages
+        self.headers: Dict[str, str] = {}
+        self.requests: List[str] = []
+
+    def get(self, url: str, **kwargs) -> ReplayResponse:
+        self.requests.append(url)
+        for url_key, page_key in BSE_URL_KEYS.items():
+            if url_key in url and page_key in self.pages:
+                return ReplayResponse(200, self.pages[page_key], url)
+        return ReplayResponse(404, b'', url)
+
+
+def infer_trade_date(recording_dir: str) -> Optional[date]:
+    """Most common deal_date in the NSE bulk recording"""
+    path = find_recording(recording_dir, 'nse_bulk')
+    if not path:
+        return None
+    df = RecordedNSESource(path)()
+    if 'Date' not in df.columns or df.empty:
+        return None
+    dates = pd.to_datetime(df['Date'], format='%d-%b-%Y', errors='coerce').dropna()
+    return dates.dt.date.mode().iloc[0] if not dates.empty else None
+
+
+# ============================================================================
+# CAPTURED NOTIFICATION SINKS
+# ============================================================================
+
+class CapturedSMTP:
+    """yagmail.SMTP stand-in that writes each email to the sink directory"""
+
+    def __init__(self, sink_dir: str):
+        self.sink_dir = sink_dir
+        self.sent: List[Dict[str, Any]] = []
+        os.makedirs(sink_dir, exist_ok=True)
+
+    def send(self, to=None, subject: str = '', contents=None, **kwargs):
+        body = contents if isinstance(contents, str) else '\n'.join(map(str, contents or []))
+        self.sent.append({'to': to, 'subject': subject, 'body': body})
+        path = os.path.join(self.sink_dir, f'email_{len(self.sent):03d}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"<!-- To: {to} -->\n<!-- Subject: {subject} -->\n{body}")
+        logger.info(f"Captured email '{subject}' -> {path}")
+
+
+class CapturedTelegram:
+    """requests-compatible post() sink for Telegram sendMessage calls"""
+
+    def __init__(self, sink_dir: str):
+        self.sink_dir = sink_dir
+        self.messages: List[Dict[str, Any]] = []
+        os.makedirs(sink_dir, exist_ok=True)
+
+    def post(self, url: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> ReplayResponse:
+        # Never persist the bot token
+        method = url.rsplit('/', 1)[-1]
+        self.messages.append({'method': method, 'payload': json})
+        path = os.path.join(self.sink_dir, f'telegram_{len(self.messages):03d}.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write((json or {}).get('text', ''))
+        logger.info(f"Captured Telegram {method} -> {path}")
+        return ReplayResponse(200, b'{"ok": true}', url)
+
+
+# ============================================================================
+# REPLAY WIRING
+# ============================================================================
+
+def build_replay_automation(recording_dir: str,
+                            trade_date: Optional[date] = None,
+                            db_path: str = ':memory:',
+                            sink_dir: str = 'replay_output',
+                            investors: Optional[List[Dict[str, Any]]] = None,
+                            symbols: Optional[List[Dict[str, Any]]] = None):
+    """Build a DealsAutomation wired entirely to local stand-ins"""
+    from main import (DealsAutomation, NSEDataFetcher, BSEDataFetcher,
+                      DatabaseManager, EmailReporter, TelegramNotifier)
+
+    trade_date = trade_date or infer_trade_date(recording_dir) or datetime.now().date()
+    logger.info(f"Replaying recordings from {recording_dir} for trade date {trade_date}")
+
+    recordings = {key: find_recording(recording_dir, key) for key in RECORDING_PATTERNS}
+    for key, path in recordings.items():
+        logger.info(f"  {key}: {path or 'no recording'}")
+
+    nse_sources = {
+        'BULK': RecordedNSESource(recordings['nse_bulk']),
+        'BLOCK': RecordedNSESource(recordings['nse_block']),
+    }
+    nse_fetcher = NSEDataFetcher(
+        bulk_source=nse_sources['BULK'],
+        block_source=nse_sources['BLOCK'],
+        # Recordings already span whatever dates they hold
+        range_source=lambda category, start, end: nse_sources[category](),
+        range_stream=lambda category, start, end: nse_sources[category].chunks(),
+        trade_date=trade_date,
+    )
+    pages = {key: render_bse_page(path) for key, path in recordings.items()
+             if key.startswith('bse') and path}
+    bse_fetcher = BSEDataFetcher(session=ReplaySession(pages), trade_date=trade_date)
+
+    client = LocalSupabaseClient(db_path)
+    if investors is None:
+        investors_file = os.path.join(recording_dir, 'monitored_investors.json')
+        if os.path.exists(investors_file):
+            with open(investors_file, encoding='utf-8') as f:
+                investors = json.load(f)
+    if investors:
+        client.seed_monitored_investors(investors)
+    if symbols is None:
+        symbols_file = os.path.join(recording_dir, 'monitored_symbols.json')
+        if os.path.exists(symbols_file):
+            with open(symbols_file, encoding='utf-8') as f:
+                symbols = json.load(f)
+    if symbols:
+        client.seed_monitored_symbols(symbols)
+
+    os.makedirs(sink_dir, exist_ok=True)
+    # Replays keep their own ledger next to the captured messages
+    ledger = AlertLedger(os.path.join(sink_dir, 'alert_ledger.bin'))
+    return DealsAutomation(
+        nse_fetcher=nse_fetcher,
+        bse_fetcher=bse_fetcher,
+        db_manager=DatabaseManager(client=client),
+        email_reporter=EmailReporter(yag=CapturedSMTP(sink_dir), ledger=ledger),
+        telegram_notifier=TelegramNotifier(http=CapturedTelegram(sink_dir), ledger=ledger),
+        output_dir=sink_dir,
+    )
+
+
+def main():
+    """Entry point"""
+    parser = argparse.ArgumentParser(description='Replay recorded NSE/BSE payloads offline')
+    parser.add_argument('--recording-dir', default='.', help='Directory with recorded payloads')
+    parser.add_argument('--trade-date', help='Deal date to replay (YYYY-MM-DD); inferred if omitted')
+    parser.add_argument('--db', default=':memory:', help='SQLite file for the storage stand-in')
+    parser.add_argument('--sink-dir', default='replay_output', help='Where CSVs, emails and messages go')
+    parser.add_argument('--investor', action='append', default=[],
+                        help='Monitored investor name (repeatable); overrides monitored_investors.json')
+    parser.add_argument('--symbol', action='append', default=[],
+                        help='Watched symbol / scrip code / ISIN (repeatable); overrides monitored_symbols.json')
+    parser.add_argument('--catch-up', action='store_true', help='Run in catch-up mode')
+    parser.add_argument('--resume', action='store_true', help='Resume the last replay from its checkpoints')
+    parser.add_argument('--backfill', nargs=2, metavar=('START', 'END'),
+                        help='Stream the NSE recordings for START..END into the database and exit')
+    parser.add_argument('--digest', choices=['day', 'week', 'month'],
+                        help='Send the digest for the period holding the trade date from the rollups and exit')
+    parser.add_argument('--profile', action='store_true', help='Write cProfile stats to the sink dir')
+    args = parser.parse_args()
+
+    trade_date = datetime.strptime(args.trade_date, '%Y-%m-%d').date() if args.trade_date else None
+    investors = [{'investor_name': name} for name in args.investor] or None
+    symbols = [{'symbol': symbol} for symbol in args.symbol] or None
+
+    automation = build_replay_automation(args.recording_dir, trade_date, args.db,
+                                         args.sink_dir, investors, symbols)
+    if args.backfill:
+        start, end = (datetime.strptime(d, '%Y-%m-%d').date() for d in args.backfill)
+        automation.backfill(start, end)
+    elif args.digest:
+        automation.send_digest(args.digest, automation.nse_fetcher.trade_date)
+    elif args.profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(automation.run, catch_up=args.catch_up, resume=args.resume)
+        stats_file = os.path.join(args.sink_dir, 'replay.prof')
+        profiler.dump_stats(stats_file)
+        pstats.Stats(stats_file).sort_stats('cumulative').print_stats(25)
+    else:
+        automation.run(catch_up=args.catch_up, resume=args.resume)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Resilient Request Layer for Exchange Fetchers
+
+Shared by BSEDataFetcher, NSEDataFetcher and NSECSVFetcher:
+
+- per-endpoint latency tracking (host + path, query string ignored)
+- hedged requests: if the first attempt is slower than the endpoint's
+  p95, a duplicate is sent and whichever answers first wins
+- bounded retries with exponential backoff inside a per-call time budget
+- one circuit breaker per host, so once an exchange is down the
+  remaining fetches fail fast instead of each waiting out its timeout
+- every attempt takes a token from the shared rate limiter
+  (rate_limiter.py), and 429/403 responses slow that host down
+
+Breakers and latency samples are module-level, so every fetcher in a run
+shares them. Set HTTP_LATENCY_PATH to keep latency samples between runs.
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from rate_limiter import RateLimiter, get_limiter
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying (and counted against the breaker); other 4xx are
+# returned to the caller, e.g. NSE's 401/403 when cookies are missing
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class RetryPolicy:
+    """Retry, hedging and breaker settings (defaults overridable from env)"""
+
+    def __init__(self,
+                 retries: int = int(os.getenv('HTTP_RETRIES', '2')),
+                 backoff: float = float(os.getenv('HTTP_BACKOFF', '1.0')),
+                 budget: float = float(os.getenv('HTTP_BUDGET', '60')),
+                 hedge: bool = os.getenv('HTTP_HEDGE', 'true').lower() in ('1', 'true', 'yes'),
+                 hedge_delay: float = 5.0,
+                 min_hedge_delay: float = 0.5,
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 60.0):
+        self.retries = retries
+        self.backoff = backoff
+        # Wall-clock budget for one call including retries
+        self.budget = budget
+        self.hedge = hedge
+        # Hedge delay used until an endpoint has enough latency samples
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+
+class LatencyTracker:
+    """Recent successful latencies per endpoint"""
+
+    def __init__(self, path: str = '', window: int = 50, min_samples: int = 5):
+        self.path = path
+        self.window = window
+        self.min_samples = min_samples
+        self.samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    for endpoint, values in json.load(f).items():
+                        self.samples[endpoint] = deque(values, maxlen=window)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable latency file {path}: {e}")
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(round(seconds, 3))
+            if self.path:
+                self._save()
+
+    def percentile(self, endpoint: str, q: float = 0.95) -> Optional[float]:
+        """q-th latency percentile, or None until min_samples are recorded"""
+        with self._lock:
+            values = sorted(self.samples.get(endpoint, ()))
+        if len(values) < self.min_samples:
+            return None
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def _save(self):
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({k: list(v) for k, v in self.samples.items()}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save latency samples: {e}")
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after a cool-down"""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        if self.state == 'open':
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(f"Circuit open for {self.name} (retry in {remaining:.0f}s)")
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"✓ Circuit closed for {self.name}")
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed half-open trial re-opens immediately
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                if self.state != 'open':
+                    logger.warning(f"⚠️  Circuit opened for {self.name} after {self.failures} failure(s)")
+                self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_latency = LatencyTracker(os.getenv('HTTP_LATENCY_PATH', ''))
+# Abandoned hedge losers keep running until their own timeout
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='resilient-http')
+
+
+def _close_result(future):
+    """Close the response of a hedge attempt that lost the race"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    result, _ = future.result()
+    close = getattr(result, 'close', None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Closing abandoned hedge response failed: {e}")
+
+
+def get_breaker(host: str, policy: RetryPolicy) -> CircuitBreaker:
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host, policy.failure_threshold, policy.reset_timeout)
+        return _breakers[host]
+
+
+def endpoint_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+class ResilientHTTP:
+    """Hedged, retried, circuit-broken calls over a requests-style session"""
+
+    def __init__(self, session=None, policy: Optional[RetryPolicy] = None,
+                 latency: Optional[LatencyTracker] = None, limiter: Optional[RateLimiter] = None):
+        self.session = session or requests.Session()
+        self.policy = policy or RetryPolicy()
+        self.latency = latency or _latency
+        self.limiter = limiter or get_limiter()
+
+    def get(self, url: str, **kwargs):
+        """session.get with retries/hedging; non-retryable responses are returned as-is"""
+        def attempt():
+            self.limiter.acquire(url)
+            response = self.session.get(url, **kwargs)
+            self.limiter.observe(url, response.status_code, getattr(response, 'headers', None))
+            if response.status_code in RETRYABLE_STATUSES:
+                raise requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            return response
+
+        return self.call(endpoint_of(url), attempt)
+
+    def call(self, endpoint: str, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) for endpoint ('host/path') with the full policy
+
+        Raises CircuitOpenError when the host's breaker is open, otherwise
+        the last error once retries or the time budget are exhausted.
+        """
+        breaker = get_breaker(endpoint.split('/', 1)[0], self.policy)
+        deadline = time.monotonic() + self.policy.budget
+
+        for attempt in range(self.policy.retries + 1):
+            breaker.before_call()
+            try:
+                result = self._hedged(endpoint, fn, args, kwargs)
+            except Exception as e:
+                breaker.record_failure()
+                delay = self.policy.backoff * (2 ** attempt) * random.uniform(0.8, 1.2)
+                if attempt == self.policy.retries or time.monotonic() + delay > deadline:
+                    raise
+                logger.warning(f"  {endpoint} failed ({e}); retry {attempt + 1}/{self.policy.retries} in {delay:.1f}s")
+                time.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+    def _hedged(self, endpoint: str, fn: Callable, args, kwargs):
+        def timed():
+            started = time.monotonic()
+            result = fn(*args, **kwargs)
+            return result, time.monotonic() - started
+
+        futures = [_executor.submit(timed)]
+        if self.policy.hedge:
+            p95 = self.latency.percentile(endpoint)
+            delay = max(self.policy.min_hedge_delay, p95) if p95 is not None else self.policy.hedge_delay
+            done, _ = wait(futures, timeout=delay)
+            if not done:
+                logger.info(f"  Hedging {endpoint} after {delay:.1f}s")
+                futures.append(_executor.submit(timed))
+
+        # First success wins; only fail once every in-flight attempt has failed
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                self.latency.record(endpoint, elapsed)
+                # Losers that already finished, or finish later, give their connection back
+                for other in (done | pending) - {future}:
+                    if not other.cancel():
+                        other.add_done_callback(_close_result)
+                return result
+        raise error
@@ -0,0 +1,373 @@
+"""
+Precomputed Deal Rollups and Periodic Digests
+
+Reports over a week or a month should not re-aggregate raw deals from
+four tables. Every store folds its new deals into two small tables
+instead:
+
+    deal_rollups          period | period_start | source | deal_category | symbol | security_name
+                          deals | buy_qty | sell_qty | gross_value | unique_clients
+    deal_rollup_clients   period | period_start | source | deal_category | symbol | client_key
+
+for period in day / week (starting Monday) / month. Besides one row per
+security, each ingest writes a symbol '*' row per source x category and
+a '*' / '*' / '*' grand total, so totals carry exact unique client counts
+(a client trading two securities is one client).
+
+Rollup rows are additive deltas: a period's figures are the sums of its
+rows, so storage only ever inserts. unique_clients stays additive
+because deal_rollup_clients records which clients a period has already
+counted; an ingest only counts clients new to the period, and only reads
+the client keys of the periods it touches.
+
+A digest (DealRollups.load() + format_digest_text / format_digest_html)
+reads the rollup rows of one period and the previous one, so its cost
+depends on how many securities traded in the period, never on how much
+history is stored.
+"""
+
+import hashlib
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from storage import symbol_column
+
+logger = logging.getLogger(__name__)
+
+TABLE_ROLLUPS = 'deal_rollups'
+TABLE_ROLLUP_CLIENTS = 'deal_rollup_clients'
+
+PERIODS = ('day', 'week', 'month')
+
+# Stands for "all" in the source / deal_category / symbol of total rows
+ALL = '*'
+
+KEY_COLUMNS = ['period', 'period_start', 'source', 'deal_category', 'symbol']
+SUM_COLUMNS = ['deals', 'buy_qty', 'sell_qty', 'gross_value', 'unique_clients']
+
+CRORE = 1e7
+
+# Above this many distinct period starts, counted clients are read as one date range
+MAX_START_LOOKUPS = 8
+
+
+def period_start(day: date, period: str) -> date:
+    """First day of the day / week (Monday) / month holding day"""
+    return pd.Timestamp(_period_starts(np.array([np.datetime64(day, 'D')]), period)[0]).date()
+
+
+def previous_period_start(start: date, period: str) -> date:
+    """Start of the period before the one starting on start"""
+    return period_start(start - timedelta(days=1), period)
+
+
+def period_end(start: date, period: str) -> date:
+    """Last calendar day of the period starting on start"""
+    if period == 'day':
+        return start
+    if period == 'week':
+        return start + timedelta(days=6)
+    return (pd.Timestamp(start) + pd.offsets.MonthEnd(0)).date()
+
+
+def _period_starts(days: np.ndarray, period: str) -> np.ndarray:
+    """Vectorized period_start over datetime64 values"""
+    days = days.astype('datetime64[D]')
+    if period == 'day':
+        return days
+    if period == 'week':
+        # 1970-01-01 was a Thursday: (epoch day + 3) % 7 is 0 on Mondays
+        epoch = days.astype('int64')
+        return (epoch - (epoch + 3) % 7).astype('datetime64[D]')
+    if period == 'month':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"Unknown rollup period: {period}")
+
+
+def _client_key(name: str) -> str:
+    return hashlib.blake2b(name.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _text(column: pd.Series) -> pd.Series:
+    """Stripped upper-case text, nulls as ''"""
+    return column.astype(object).where(column.notna(), '').astype(str).str.strip().str.upper()
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+
+def _records(df: pd.DataFrame) -> List[Dict]:
+    """JSON-ready records (Python scalars, None for nulls)"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+class DealRollups:
+    """Incrementally maintained day / week / month rollups in a storage backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def is_empty(self) -> bool:
+        return self.backend.count(TABLE_ROLLUPS) == 0
+
+    def add(self, table_name: str, df: pd.DataFrame) -> int:
+        """Fold newly stored deals from one deal table in; returns rollup rows written"""
+        deals = self._normalize(table_name, df)
+        if deals.empty:
+            return 0
+
+        # period_start is ISO text, as the backends return it
+        buckets = pd.concat([
+            deals.assign(period=period, period_start=np.datetime_as_string(_period_starts(deals['day'].values, period)))
+            for period in PERIODS
+        ], ignore_index=True)
+        # Per-security rows, per source x category totals and the grand total
+        totals = buckets.assign(symbol=ALL, security_name='')
+        grand = totals.assign(source=ALL, deal_category=ALL)
+        buckets = pd.concat([buckets, totals, grand], ignore_index=True)
+
+        rollup = buckets.groupby(KEY_COLUMNS, sort=False).agg(
+            security_name=('security_name', 'first'),
+            deals=('quantity', 'size'),
+            buy_qty=('buy_qty', 'sum'),
+            sell_qty=('sell_qty', 'sum'),
+            gross_value=('gross_value', 'sum'),
+        ).reset_index()
+
+        new_clients = self._new_clients(buckets)
+        counted = new_clients.groupby(KEY_COLUMNS, sort=False).size().rename('unique_clients')
+        rollup = rollup.merge(counted.reset_index(), on=KEY_COLUMNS, how='left')
+        rollup['unique_clients'] = rollup['unique_clients'].fillna(0).astype('int64')
+
+        written = self.backend.insert_records(TABLE_ROLLUPS, _records(rollup))
+        if written < len(rollup):
+            logger.error(f"Only {written}/{len(rollup)} rollup rows stored for {table_name}")
+        if not new_clients.empty:
+            self.backend.insert_records(TABLE_ROLLUP_CLIENTS, _records(new_clients))
+        logger.info(f"✓ Rolled {len(deals)} {table_name} deals into {written} rollup rows")
+        return written
+
+    def seed(self, history: Dict[str, pd.DataFrame]) -> int:
+        """Fold stored history (deal table -> deals) into empty rollups"""
+        return sum(self.add(table_name, df) for table_name, df in history.items()
+                   if df is not None and not df.empty)
+
+    def _normalize(self, table_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """One row per deal: source, category, security, client, day, quantities and value"""
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        source, category = table_name.split('_')[:2]
+        day = pd.to_datetime(_column(df, 'deal_date'), errors='coerce')
+        day = day.fillna(pd.to_datetime(_column(df, 'fetch_date'), errors='coerce'))
+        quantity = pd.to_numeric(_column(df, 'quantity_traded'), errors='coerce').fillna(0.0).astype('float64')
+        price = pd.to_numeric(_column(df, 'trade_price'), errors='coerce').fillna(0.0).astype('float64')
+        # NSE says BUY/SELL, BSE says B/S
+        buy = _text(_column(df, 'buy_sell')).str[:1].eq('B')
+        name_column = 'scrip_name' if table_name.startswith('bse') else 'security_name'
+
+        deals = pd.DataFrame({
+            'source': source.upper(),
+            'deal_category': category.upper(),
+            'symbol': _text(_column(df, symbol_column(table_name))),
+            'security_name': _column(df, name_column).astype(object).where(
+                _column(df, name_column).notna(), '').astype(str).str.strip(),
+            'client': _text(_column(df, 'client_name')).str.split().str.join(' '),
+            'day': day.values.astype('datetime64[D]'),
+            'quantity': quantity,
+            'buy_qty': quantity.where(buy, 0.0),
+            'sell_qty': quantity.where(~buy, 0.0),
+            'gross_value': quantity * price,
+        })
+        skipped = int(day.isna().sum())
+        if skipped:
+            logger.warning(f"{skipped} {table_name} deals without a date left out of the rollups")
+        return deals[day.notna().values].reset_index(drop=True)
+
+    def _new_clients(self, buckets: pd.DataFrame) -> pd.DataFrame:
+        """(period key, client_key) pairs not yet counted in deal_rollup_clients"""
+        named = buckets[buckets['client'] != '']
+        if named.empty:
+            return pd.DataFrame(columns=KEY_COLUMNS + ['client_key'])
+
+        clients = named[KEY_COLUMNS + ['client']].drop_duplicates()
+        keys = {name: _client_key(name) for name in clients['client'].unique()}
+        clients = clients.assign(client_key=clients['client'].map(keys)).drop(columns='client')
+
+        # Only the touched periods' client keys are read: one lookup per period start
+        # for a day's deals (day, week and month), one range for larger batches
+        starts = sorted(clients['period_start'].unique())
+        ranges = [(start, start) for start in starts] if len(starts) <= MAX_START_LOOKUPS \
+            else [(starts[0], starts[-1])]
+        counted = pd.concat([self.backend.query_deals(TABLE_ROLLUP_CLIENTS, start, end, date_column='period_start')
+                             for start, end in ranges], ignore_index=True)
+        if not counted.empty:
+            counted = counted[KEY_COLUMNS + ['client_key']].copy()
+            counted['period_start'] = pd.to_datetime(counted['period_start']).dt.strftime('%Y-%m-%d')
+            clients = clients.merge(counted.drop_duplicates(), how='left', indicator=True)
+            clients = clients[clients['_merge'] == 'left_only'].drop(columns='_merge')
+        return clients.reset_index(drop=True)
+
+    def load(self, period: str, start: date) -> pd.DataFrame:
+        """Summed rollup rows of the period starting on start"""
+        rows = self.backend.query_deals(TABLE_ROLLUPS, start, start, date_column='period_start')
+        columns = KEY_COLUMNS + ['security_name'] + SUM_COLUMNS
+        if rows is None or rows.empty:
+            return pd.DataFrame(columns=columns)
+
+        rows = rows[rows['period'] == period]
+        if rows.empty:
+            return pd.DataFrame(columns=columns)
+        rows = rows.assign(**{column: pd.to_numeric(rows[column], errors='coerce').fillna(0)
+                              for column in SUM_COLUMNS})
+        rows['security_name'] = rows['security_name'].fillna('')
+        return rows.groupby(KEY_COLUMNS, sort=False).agg(
+            security_name=('security_name', 'first'),
+            **{column: (column, 'sum') for column in SUM_COLUMNS},
+        ).reset_index()[columns]
+
+
+# ============================================================================
+# DIGEST
+# ============================================================================
+
+def build_digest(rollups: DealRollups, period: str, day: date, top_n: int = 10) -> Dict:
+    """Figures for the period holding day, with the previous period for comparison"""
+    start = period_start(day, period)
+    current = rollups.load(period, start)
+    previous = rollups.load(period, previous_period_start(start, period))
+
+    def grand_total(frame: pd.DataFrame) -> Dict:
+        row = frame[(frame['source'] == ALL) & (frame['symbol'] == ALL)]
+        return {column: float(row[column].sum()) for column in SUM_COLUMNS}
+
+    categories = current[(current['source'] != ALL) & (current['symbol'] == ALL)]
+    securities = current[current['symbol'] != ALL]
+    top = securities.nlargest(top_n, 'gross_value') if len(securities) else securities
+
+    return {
+        'period': period,
+        'start': start,
+        'end': period_end(start, period),
+        'total': grand_total(current),
+        'previous': grand_total(previous),
+        'categories': categories.sort_values(['source', 'deal_category']).to_dict('records'),
+        'top_securities': top.to_dict('records'),
+        'securities': len(securities),
+    }
+
+
+def _change(current: float, previous: float) -> str:
+    if not previous:
+        return 'new' if current else '-'
+    return f"{(current - previous) / previous:+.0%}"
+
+
+def _security_label(row: Dict) -> str:
+    name = row.get('security_name') or ''
+    return f"{row['symbol']} ({name})" if name and name.upper() != row['symbol'] else row['symbol']
+
+
+def digest_fingerprint(digest: Dict) -> str:
+    """Alert-ledger key: a period's digest is sent again only once it holds more deals"""
+    return f"digest|{digest['period']}|{digest['start']}|{digest['total']['deals']:.0f}"
+
+
+def digest_title(digest: Dict) -> str:
+    label = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly'}[digest['period']]
+    return f"{label} Bulk & Block Deals Digest - {digest['start']:%d %b} to {digest['end']:%d %b %Y}"
+
+
+def format_digest_text(digest: Dict) -> str:
+    """Telegram (Markdown) digest"""
+    total, previous = digest['total'], digest['previous']
+    message = f"*📅 {digest_title(digest)}*\n\n"
+    message += f"*Total:* {total['deals']:,.0f} deals ({_change(total['deals'], previous['deals'])}), "
+    message += f"₹{total['gross_value'] / CRORE:,.2f} Cr ({_change(total['gross_value'], previous['gross_value'])})\n"
+    message += f"{total['unique_clients']:,.0f} clients in {digest['securities']:,} securities\n\n"
+
+    if digest['categories']:
+        message += "*By exchange:*\n"
+        for row in digest['categories']:
+            message += f"{row['source']} {row['deal_category'].title()}: {row['deals']:,.0f} deals, "
+            message += f"₹{row['gross_value'] / CRORE:,.2f} Cr, {row['unique_clients']:,.0f} clients\n"
+        message += "\n"
+
+    if digest['top_securities']:
+        message += "*Top securities by value:*\n"
+        for i, row in enumerate(digest['top_securities'], 1):
+            net = row['buy_qty'] - row['sell_qty']
+            net_emoji = "🟢" if net >= 0 else "🔴"
+            message += f"{i}. {net_emoji} *{_security_label(row)}* - {row['source']} {row['deal_category'].title()}\n"
+            message += f"   ₹{row['gross_value'] / CRORE:,.2f} Cr | {row['deals']:,.0f} deals | "
+            message += f"net {net:+,.0f}\n"
+    else:
+        message += "No deals stored for this period\n"
+    return message
+
+
+def format_digest_html(digest: Dict) -> str:
+    """Email (HTML) digest"""
+    total, previous = digest['total'], digest['previous']
+
+    category_rows = ''.join(
+        f"<tr><td>{row['source']} {row['deal_category'].title()}</td><td>{row['deals']:,.0f}</td>"
+        f"<td>₹{row['gross_value'] / CRORE:,.2f} Cr</td><td>{row['unique_clients']:,.0f}</td></tr>"
+        for row in digest['categories']
+    )
+    security_rows = ''.join(
+        f"<tr><td>{_security_label(row)}</td><td>{row['source']} {row['deal_category'].title()}</td>"
+        f"<td>{row['deals']:,.0f}</td><td>{row['buy_qty']:,.0f}</td><td>{row['sell_qty']:,.0f}</td>"
+        f"<td>₹{row['gross_value'] / CRORE:,.2f} Cr</td><td>{row['unique_clients']:,.0f}</td></tr>"
+        for row in digest['top_securities']
+    )
+
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif;">
+        <h2>📅 {digest_title(digest)}</h2>
+        <p>
+            <b>{total['deals']:,.0f}</b> deals ({_change(total['deals'], previous['deals'])} vs previous {digest['period']}),
+            <b>₹{total['gross_value'] / CRORE:,.2f} Cr</b> ({_change(total['gross_value'], previous['gross_value'])}),
+            {total['unique_clients']:,.0f} clients in {digest['securities']:,} securities
+        </p>
+        <h3>By Exchange</h3>
+        <table border="1" cellpadding="6" cellspacing="0" style="border-collapse: collapse;">
+            <tr style="background-color: #f2f2f2;"><th>Category</th><th>Deals</th><th>Value</th><th>Clients</th></tr>
+            {category_rows or '<tr><td colspan="4">No deals stored for this period</td></tr>'}
+        </table>
+        <h3>Top Securities by Value</h3>
+        <table border="1" cellpadding="6" cellspacing="0" style="border-collapse: collapse;">
+            <tr style="background-color: #f2f2f2;"><th>Security</th><th>Category</th><th>Deals</th>
+                <th>Bought</th><th>Sold</th><th>Value</th><th>Clients</th></tr>
+            {security_rows or '<tr><td colspan="7">No deals stored for this period</td></tr>'}
+        </table>
+        <p style="color: #888; font-size: 12px;">Built from precomputed rollups ({TABLE_ROLLUPS}).</p>
+    </body>
+    </html>
+    """
+
+
+def load_history(db_manager, tables: Iterable[str], start: date, end: date) -> Dict[str, pd.DataFrame]:
+    """Stored deals per table for seeding"""
+    return {table: db_manager.query_deals(table, start, end) for table in tables}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Print a deal digest from the stored rollups')
+    parser.add_argument('--period', choices=PERIODS, default='week')
+    parser.add_argument('--date', help='Any day in the period (YYYY-MM-DD); default today')
+    parser.add_argument('--top', type=int, default=10, help='Securities listed by value')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    from main import DatabaseManager
+    day = date.fromisoformat(args.date) if args.date else date.today()
+    print(format_digest_text(build_digest(DealRollups(DatabaseManager().backend), args.period, day, args.top)))
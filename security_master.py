@@ -0,0 +1,216 @@
+"""
+Cross-Exchange Security Master
+
+Links NSE symbols and BSE scrip codes through ISIN so deals in the same
+company can be matched across exchanges.
+
+Sources are the exchanges' downloadable equity lists, kept as local files:
+- NSE: EQUITY_L.csv   (SYMBOL, NAME OF COMPANY, ..., ISIN NUMBER, ...)
+- BSE: Equity.csv     (Security Code, Security Id, Security Name, ..., ISIN No, ...)
+
+Parsed rows are cached per source file in a JSON index; refresh() only
+re-parses files whose size/mtime changed. Lookups are plain dicts, so
+enriching a deal frame is one hash lookup per distinct symbol.
+
+Usage:
+    python security_master.py refresh EQUITY_L.csv Equity.csv
+    python security_master.py lookup RELIANCE 500325 INE002A01018
+"""
+
+import os
+import sys
+import json
+import logging
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = 'security_master.json'
+
+# Normalized header -> field, per exchange list format
+NSE_LIST_COLUMNS = {
+    'SYMBOL': 'nse_symbol',
+    'NAME OF COMPANY': 'name',
+    'ISIN NUMBER': 'isin',
+}
+BSE_LIST_COLUMNS = {
+    'SECURITY CODE': 'bse_code',
+    'SECURITY ID': 'bse_id',
+    'SECURITY NAME': 'name',
+    'ISIN NO': 'isin',
+}
+
+
+def _detect_format(columns: List[str]) -> Optional[str]:
+    normalized = {c.strip().upper() for c in columns}
+    if set(NSE_LIST_COLUMNS) <= normalized:
+        return 'NSE'
+    if set(BSE_LIST_COLUMNS) <= normalized:
+        return 'BSE'
+    return None
+
+
+def parse_equity_list(path: str) -> Dict[str, Dict[str, str]]:
+    """Parse one exchange equity list into {isin: fields}"""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    fmt = _detect_format(list(df.columns))
+    if fmt is None:
+        raise ValueError(f"Unrecognized equity list format: {path}")
+
+    df.columns = [c.strip().upper() for c in df.columns]
+    mapping = NSE_LIST_COLUMNS if fmt == 'NSE' else BSE_LIST_COLUMNS
+    df = df[list(mapping)].rename(columns=mapping)
+    df = df.apply(lambda col: col.str.strip())
+    df = df[df['isin'] != '']
+
+    records = {row['isin']: row for row in df.to_dict('records')}
+    logger.info(f"Parsed {len(records)} {fmt} securities from {path}")
+    return records
+
+
+class SecurityMaster:
+    """ISIN-keyed security index with NSE symbol and BSE scrip code lookups"""
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        # path -> {'size', 'mtime', 'records': {isin: fields}}
+        self.sources: Dict[str, Dict] = {}
+        self.by_isin: Dict[str, Dict[str, str]] = {}
+        self.isin_by_symbol: Dict[str, str] = {}
+        self.isin_by_scrip: Dict[str, str] = {}
+        self.symbol_by_isin: Dict[str, str] = {}
+        self.scrip_by_isin: Dict[str, str] = {}
+
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                self.sources = json.load(f).get('sources', {})
+            self._build_lookups()
+
+    def __len__(self) -> int:
+        return len(self.by_isin)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def refresh(self, paths: List[str]) -> int:
+        """Re-parse changed source files and rebuild the lookups
+
+        Returns the number of files that were (re)parsed.
+        """
+        changed = 0
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                logger.error(f"Security master source unavailable: {e}")
+                continue
+
+            cached = self.sources.get(path)
+            if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+                logger.debug(f"Unchanged security list: {path}")
+                continue
+
+            try:
+                records = parse_equity_list(path)
+            except Exception as e:
+                logger.error(f"Failed to parse security list {path}: {e}")
+                continue
+            self.sources[path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'records': records}
+            changed += 1
+
+        if changed:
+            self._build_lookups()
+            self.save()
+        logger.info(f"✓ Security master: {len(self)} securities ({changed} source file(s) refreshed)")
+        return changed
+
+    def _build_lookups(self):
+        by_isin: Dict[str, Dict[str, str]] = {}
+        for source in self.sources.values():
+            for isin, fields in source['records'].items():
+                merged = by_isin.setdefault(isin, {'isin': isin})
+                for key, value in fields.items():
+                    if value and not merged.get(key):
+                        merged[key] = value
+
+        self.by_isin = by_isin
+        self.isin_by_symbol = {f['nse_symbol']: isin for isin, f in by_isin.items() if f.get('nse_symbol')}
+        self.isin_by_scrip = {f['bse_code']: isin for isin, f in by_isin.items() if f.get('bse_code')}
+        self.symbol_by_isin = {isin: symbol for symbol, isin in self.isin_by_symbol.items()}
+        self.scrip_by_isin = {isin: scrip for scrip, isin in self.isin_by_scrip.items()}
+
+    def save(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'sources': self.sources}, f)
+        os.replace(tmp_path, self.index_path)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def lookup(self, key: str) -> Optional[Dict[str, str]]:
+        """Resolve an ISIN, NSE symbol or BSE scrip code"""
+        key = str(key).strip().upper()
+        isin = key if key in self.by_isin else self.isin_by_symbol.get(key) or self.isin_by_scrip.get(key)
+        return self.by_isin.get(isin) if isin else None
+
+    def enrich(self, df: pd.DataFrame, exchange: str) -> pd.DataFrame:
+        """Add isin plus the other exchange's identifier to a deal frame"""
+        if df is None or df.empty or not self.by_isin:
+            return df
+
+        if exchange == 'NSE' and 'symbol' in df.columns:
+            key_col, lookup = 'symbol', self.isin_by_symbol
+            other_col, other_lookup = 'scrip_code', self.scrip_by_isin
+        elif exchange == 'BSE' and 'scrip_code' in df.columns:
+            key_col, lookup = 'scrip_code', self.isin_by_scrip
+            other_col, other_lookup = 'symbol', self.symbol_by_isin
+        else:
+            return df
+
+        keys = df[key_col]
+        if not isinstance(keys.dtype, pd.CategoricalDtype):
+            keys = keys.astype(str).str.strip().str.upper()
+        # On categoricals map() only touches the distinct categories
+        isin = keys.map(lookup).astype('category')
+
+        df['isin'] = isin
+        df[other_col] = isin.map(other_lookup).astype('category')
+
+        matched = int(isin.notna().sum())
+        logger.info(f"  Security master matched {matched}/{len(df)} {exchange} deals")
+        return df
+
+
+def load_security_master(index_path: str, sources: List[str]) -> Optional[SecurityMaster]:
+    """SecurityMaster when an index or source files are configured, else None"""
+    if not sources and not os.path.exists(index_path):
+        return None
+    master = SecurityMaster(index_path)
+    if sources:
+        master.refresh(sources)
+    return master if len(master) else None
+
+
+def main():
+    """Command line entry point"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 3 or sys.argv[1] not in ('refresh', 'lookup'):
+        print(__doc__)
+        sys.exit(1)
+
+    index_path = os.getenv('SECURITY_MASTER_PATH', DEFAULT_INDEX_PATH)
+    master = SecurityMaster(index_path)
+    if sys.argv[1] == 'refresh':
+        master.refresh(sys.argv[2:])
+    else:
+        for key in sys.argv[2:]:
+            print(f"{key}: {master.lookup(key)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Local Stand-in Servers for NSE, BSE, Telegram and PostgREST
+
+Real HTTP servers on localhost that answer like the services this project
+talks to, so the fetchers, notifier and storage backend run their real
+network code (connection pool, retries, hedging, rate limiter, circuit
+breakers) deterministically and offline:
+
+- NSEStandin: recorded deals as the historical JSON / CSV API and archive CSVs
+- BSEStandin: recorded deals pages
+- TelegramStandin: sendMessage sink
+- PostgRESTStandin: /rest/v1 insert/select over SQLite
+
+Each takes a Behaviour (latency, jitter, error rate, throttling, seed).
+start_standins() starts all four and standin_env() gives the environment
+(NSE_BASE_URL, BSE_BASE_URL, TELEGRAM_API_URL, SUPABASE_URL, ...) that
+points main.py at them. From the command line:
+
+    python -m standins --recording-dir . --latency 0.2 --error-rate 0.1 --rate 5
+"""
+
+from typing import Dict, Optional
+
+from standins.base import Behaviour, StandinServer
+from standins.exchanges import BSEStandin, NSEStandin
+from standins.postgrest import PostgRESTStandin
+from standins.telegram import TelegramStandin
+
+__all__ = ['Behaviour', 'StandinServer', 'NSEStandin', 'BSEStandin', 'TelegramStandin', 'PostgRESTStandin',
+           'start_standins', 'standin_env', 'DEFAULT_PORTS']
+
+DEFAULT_PORTS = {'nse': 8801, 'bse': 8802, 'telegram': 8803, 'postgrest': 8804}
+
+
+def start_standins(recording_dir: str = '.', db_path: str = ':memory:', host: str = '127.0.0.1',
+                   ports: Optional[Dict[str, int]] = None,
+                   behaviours: Optional[Dict[str, Behaviour]] = None) -> Dict[str, StandinServer]:
+    """Start all four stand-ins in background threads
+
+    ports / behaviours are keyed 'nse', 'bse', 'telegram', 'postgrest';
+    missing ports default to 0 (any free port), missing behaviours to none.
+    """
+    ports = ports or {}
+    behaviours = behaviours or {}
+    servers = {
+        'nse': NSEStandin(recording_dir, host, ports.get('nse', 0), behaviours.get('nse')),
+        'bse': BSEStandin(recording_dir, host, ports.get('bse', 0), behaviours.get('bse')),
+        'telegram': TelegramStandin(host, ports.get('telegram', 0), behaviours.get('telegram')),
+        'postgrest': PostgRESTStandin(db_path, host, ports.get('postgrest', 0), behaviours.get('postgrest')),
+    }
+    for server in servers.values():
+        server.start()
+    return servers
+
+
+def standin_env(servers: Dict[str, StandinServer]) -> Dict[str, str]:
+    """Environment variables that point main.py's Config at the stand-ins"""
+    env = {}
+    if 'nse' in servers:
+        env['NSE_BASE_URL'] = env['NSE_ARCHIVE_URL'] = servers['nse'].url
+    if 'bse' in servers:
+        env['BSE_BASE_URL'] = servers['bse'].url
+    if 'telegram' in servers:
+        env['TELEGRAM_API_URL'] = servers['telegram'].url
+    if 'postgrest' in servers:
+        # The default 'supabase' storage backend speaks PostgREST directly
+        env['SUPABASE_URL'] = servers['postgrest'].url
+        env['STORAGE_BACKEND'] = 'supabase'
+    return env
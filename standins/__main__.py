@@ -0,0 +1,80 @@
+"""
+Run the stand-ins until interrupted
+
+    python -m standins --recording-dir . --db standin.sqlite
+    python -m standins --latency 0.3 --jitter 0.1 --error-rate 0.05 --rate 2 --burst 3
+    python -m standins --set nse.error_rate=0.5 --set postgrest.latency=1
+
+The global flags apply to every server; --set SERVER.FIELD=VALUE overrides
+one server. The environment that points main.py at the servers is printed
+on startup.
+"""
+
+import time
+import logging
+import argparse
+from dataclasses import fields, replace
+
+from standins import DEFAULT_PORTS, Behaviour, standin_env, start_standins
+
+logger = logging.getLogger(__name__)
+
+
+def parse_overrides(specs, base: Behaviour):
+    """['nse.latency=0.5', ...] -> {'nse': Behaviour(...)}"""
+    types = {f.name: f.type for f in fields(Behaviour)}
+    behaviours = {name: replace(base) for name in DEFAULT_PORTS}
+    for spec in specs:
+        target, _, value = spec.partition('=')
+        server, _, name = target.partition('.')
+        if server not in behaviours or name not in types or not value:
+            raise ValueError(f"Bad --set {spec!r}; expected SERVER.FIELD=VALUE with SERVER in "
+                             f"{', '.join(DEFAULT_PORTS)} and FIELD in {', '.join(types)}")
+        convert = int if types[name] in (int, 'int') else float
+        behaviours[server] = replace(behaviours[server], **{name: convert(value)})
+    return behaviours
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Local stand-ins for NSE, BSE, Telegram and PostgREST')
+    parser.add_argument('--recording-dir', default='.', help='Recorded NSE/BSE deals (see replay.py)')
+    parser.add_argument('--db', default=':memory:', help='SQLite file behind the PostgREST stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    for name, port in DEFAULT_PORTS.items():
+        parser.add_argument(f'--{name}-port', type=int, default=port)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- seconds of random extra latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--rate', type=float, default=0.0, help='Requests/s before answering 429 (0 = off)')
+    parser.add_argument('--burst', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--set', action='append', default=[], metavar='SERVER.FIELD=VALUE')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    base = Behaviour(args.latency, args.jitter, args.error_rate, args.error_status, args.rate, args.burst, args.seed)
+    try:
+        behaviours = parse_overrides(args.set, base)
+    except ValueError as e:
+        parser.error(str(e))
+    ports = {name: getattr(args, f'{name}_port') for name in DEFAULT_PORTS}
+
+    servers = start_standins(args.recording_dir, args.db, args.host, ports, behaviours)
+    print("\nPoint the automation at the stand-ins with:")
+    for name, value in standin_env(servers).items():
+        print(f"  export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers.values():
+            logger.info(f"{server.name}: {dict(server.stats)}")
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
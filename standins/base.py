@@ -0,0 +1,168 @@
+"""
+Shared HTTP server and fault injection for the stand-ins
+
+Every stand-in is a ThreadingHTTPServer whose requests pass through the
+same Behaviour before reaching the service's route():
+
+1. throttling: a token bucket of `rate` requests/s (bucket size `burst`);
+   an empty bucket answers 429 with Retry-After, like a real rate limit
+2. latency: `latency` seconds, +/- `jitter`, slept before answering
+3. errors: a `error_rate` fraction of requests answers `error_status`
+
+Random draws come from one seeded generator per server, so a run with the
+same seed and request order fails the same requests. GET /_standin/stats
+bypasses the behaviour and reports the counters as JSON.
+"""
+
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+STATS_PATH = '/_standin/stats'
+
+# status, headers, body
+Reply = Tuple[int, Dict[str, str], bytes]
+
+
+@dataclass
+class Behaviour:
+    """Latency, error and throttling settings of one stand-in"""
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Requests per second before answering 429; 0 disables throttling
+    rate: float = 0.0
+    burst: float = 1.0
+    seed: int = 0
+
+
+def json_reply(payload, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Reply:
+    body = json.dumps(payload, default=str).encode('utf-8')
+    return status, {'Content-Type': 'application/json', **(headers or {})}, body
+
+
+class Request:
+    """What route() gets: method, path, query pairs, headers and body"""
+
+    def __init__(self, handler: BaseHTTPRequestHandler, body: bytes):
+        url = urlsplit(handler.path)
+        self.method = handler.command
+        self.path = url.path
+        self.query = parse_qsl(url.query, keep_blank_values=True)
+        self.headers = handler.headers
+        self.body = body
+
+    @property
+    def params(self) -> Dict[str, str]:
+        return dict(self.query)
+
+    def json(self):
+        return json.loads(self.body or b'null')
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Base class; subclasses implement route(request) -> Reply"""
+
+    daemon_threads = True
+    name = 'standin'
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, behaviour: Optional[Behaviour] = None):
+        super().__init__((host, port), _Handler)
+        self.behaviour = behaviour or Behaviour()
+        self.stats = Counter()
+        self._random = random.Random(self.behaviour.seed)
+        self._lock = threading.Lock()
+        self._tokens = self.behaviour.burst
+        self._refilled = time.monotonic()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, request: Request) -> Reply:
+        raise NotImplementedError
+
+    def _draw(self) -> Tuple[Optional[float], float, bool]:
+        """(Retry-After if throttled, latency, inject error) for the next request"""
+        b = self.behaviour
+        with self._lock:
+            retry_after = None
+            if b.rate > 0:
+                now = time.monotonic()
+                self._tokens = min(b.burst, self._tokens + (now - self._refilled) * b.rate)
+                self._refilled = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                else:
+                    retry_after = (1 - self._tokens) / b.rate
+            delay = max(0.0, b.latency + self._random.uniform(-b.jitter, b.jitter)) if b.latency or b.jitter else 0.0
+            fail = b.error_rate > 0 and self._random.random() < b.error_rate
+        return retry_after, delay, fail
+
+    def handle_request_with_behaviour(self, request: Request) -> Reply:
+        if request.path == STATS_PATH:
+            return json_reply({'server': self.name, 'behaviour': asdict(self.behaviour), **self.stats})
+
+        self.stats['requests'] += 1
+        retry_after, delay, fail = self._draw()
+        if retry_after is not None:
+            self.stats['throttled'] += 1
+            return json_reply({'message': 'Too Many Requests'}, 429,
+                              {'Retry-After': str(max(1, round(retry_after)))})
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.stats['errors'] += 1
+            return json_reply({'message': 'injected error'}, self.behaviour.error_status)
+        try:
+            return self.route(request)
+        except Exception as e:
+            logger.error(f"{self.name} stand-in failed on {request.method} {request.path}: {e}")
+            self.stats['failures'] += 1
+            return json_reply({'message': str(e)}, 500)
+
+    def start(self) -> 'StandinServer':
+        """Serve from a daemon thread; returns self"""
+        self._thread = threading.Thread(target=self.serve_forever, name=f'{self.name}-standin', daemon=True)
+        self._thread.start()
+        logger.info(f"✓ {self.name} stand-in listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _dispatch(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, headers, payload = self.server.handle_request_with_behaviour(Request(self, body))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _dispatch
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.server.name} {self.address_string()} {format % args}")
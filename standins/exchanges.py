@@ -0,0 +1,123 @@
+"""
+NSE and BSE stand-ins serving recorded deals
+
+Recordings are found the way replay.py finds them (nse_bulk.json,
+NSE_Bulk_Deals_*.csv, bse_bulk.html, BSE_Bulk_Deals_*.csv, ...).
+
+NSE (point NSE_BASE_URL and NSE_ARCHIVE_URL at it):
+    /                                         home page, sets the session cookie
+    /report-detail/display-bulk-and-block-deals
+    /api/historical/{bulk,block}-deals        JSON, or CSV with csv=true; 401 without the cookie
+    /content/equities/{bulk,block}.csv        archive CSV (what nsepython reads)
+
+BSE (point BSE_BASE_URL at it):
+    /markets/equity/EQReports/{bulk,block}_deals.aspx
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+
+from nse_client import FIELDS
+from replay import NSE_RAW_COLUMNS, RecordedNSESource, find_recording, render_bse_page
+from standins.base import Behaviour, Reply, Request, StandinServer, json_reply
+
+logger = logging.getLogger(__name__)
+
+COOKIE = 'nsit'
+
+# Raw nsepython column -> historical API JSON key
+NSE_JSON_KEYS = {NSE_RAW_COLUMNS[name]: keys[0] for name, keys in FIELDS.items()}
+
+NSE_API_CATEGORIES = {'bulk-deals': 'BULK', 'block-deals': 'BLOCK'}
+NSE_ARCHIVE_CATEGORIES = {'bulk.csv': 'BULK', 'block.csv': 'BLOCK'}
+BSE_PAGES = {'bulk_deals.aspx': 'bse_bulk', 'block_deals.aspx': 'bse_block'}
+
+
+def _html(body: str, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Reply:
+    page = f"<html><body>{body}</body></html>".encode('utf-8')
+    return status, {'Content-Type': 'text/html; charset=utf-8', **(headers or {})}, page
+
+
+def _csv(df: pd.DataFrame) -> Reply:
+    return 200, {'Content-Type': 'text/csv; charset=utf-8'}, df.to_csv(index=False).encode('utf-8-sig')
+
+
+class NSEStandin(StandinServer):
+    """www.nseindia.com + archives.nseindia.com subset"""
+
+    name = 'NSE'
+
+    def __init__(self, recording_dir: str = '.', host: str = '127.0.0.1', port: int = 0,
+                 behaviour: Optional[Behaviour] = None):
+        super().__init__(host, port, behaviour)
+        self.frames = {
+            'BULK': RecordedNSESource(find_recording(recording_dir, 'nse_bulk'))(),
+            'BLOCK': RecordedNSESource(find_recording(recording_dir, 'nse_block'))(),
+        }
+        for frame in self.frames.values():
+            if 'Date' in frame.columns:
+                frame['_date'] = pd.to_datetime(frame['Date'], format='%d-%b-%Y', errors='coerce').dt.date
+
+    def _raw(self, category: str, params: Dict[str, str]) -> pd.DataFrame:
+        """Recorded rows of category dated from..to (DD-MM-YYYY), raw columns"""
+        frame = self.frames[category]
+        if '_date' in frame.columns:
+            start = datetime.strptime(params['from'], '%d-%m-%Y').date() if params.get('from') else None
+            end = datetime.strptime(params['to'], '%d-%m-%Y').date() if params.get('to') else None
+            if start is not None:
+                frame = frame[frame['_date'] >= start]
+            if end is not None:
+                frame = frame[frame['_date'] <= end]
+        return frame.drop(columns=['_date'], errors='ignore')
+
+    def route(self, request: Request) -> Reply:
+        path = request.path.rstrip('/')
+        if path == '':
+            return _html('NSE stand-in', headers={'Set-Cookie': f'{COOKIE}=standin; Path=/'})
+        if path == '/report-detail/display-bulk-and-block-deals':
+            return _html('Bulk and block deals')
+
+        kind = path.rsplit('/', 1)[-1]
+        if path.startswith('/api/historical/') and kind in NSE_API_CATEGORIES:
+            # The real API answers 401 until the home page has set its cookies
+            if f'{COOKIE}=' not in (request.headers.get('Cookie') or ''):
+                return json_reply({'message': 'Unauthorized'}, 401)
+            params = request.params
+            try:
+                df = self._raw(NSE_API_CATEGORIES[kind], params)
+            except ValueError as e:
+                return json_reply({'message': f'Invalid date: {e}'}, 400)
+            if params.get('csv') == 'true':
+                return _csv(df)
+            records = df.rename(columns=NSE_JSON_KEYS).astype(object)
+            return json_reply({'data': records.where(records.notna(), None).to_dict('records')})
+        if path.startswith('/content/equities/') and kind in NSE_ARCHIVE_CATEGORIES:
+            return _csv(self._raw(NSE_ARCHIVE_CATEGORIES[kind], {}))
+        return json_reply({'message': f'Unknown path {request.path}'}, 404)
+
+
+class BSEStandin(StandinServer):
+    """www.bseindia.com deals pages"""
+
+    name = 'BSE'
+
+    def __init__(self, recording_dir: str = '.', host: str = '127.0.0.1', port: int = 0,
+                 behaviour: Optional[Behaviour] = None):
+        super().__init__(host, port, behaviour)
+        self.pages = {}
+        for key in BSE_PAGES.values():
+            path = find_recording(recording_dir, key)
+            if path:
+                self.pages[key] = render_bse_page(path)
+
+    def route(self, request: Request) -> Reply:
+        key = BSE_PAGES.get(request.path.rsplit('/', 1)[-1])
+        if key is None:
+            return _html('Page not found', 404)
+        if key not in self.pages:
+            # The live page shows an empty grid on days without deals
+            return _html('<p>No Records Found</p>')
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, self.pages[key]
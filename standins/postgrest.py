@@ -0,0 +1,119 @@
+"""
+PostgREST stand-in (the insert/select subset Supabase clients use)
+
+Serves /rest/v1/<table> over replay.LocalSupabaseClient, so tables come
+from supabase_schema.sql and unknown columns are rejected as PostgREST
+does. Point SUPABASE_URL at it (any SUPABASE_KEY is accepted).
+
+    GET   select=, <column>=eq|neq|gt|gte|lt|lte.<value>, <column>=in.(a,b),
+          order=<column>[.asc|.desc][,<column>...], limit=, offset=;
+          Prefer: count=exact adds Content-Range: <first>-<last>/<total>
+    POST  a JSON row or list of rows; Prefer: return=minimal answers 201
+          without a body, anything else returns the inserted rows
+"""
+
+import re
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+from replay import LocalAPIError, LocalSupabaseClient
+from standins.base import Behaviour, Reply, Request, StandinServer, json_reply
+
+logger = logging.getLogger(__name__)
+
+PREFIX = '/rest/v1/'
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'columns', 'on_conflict'}
+FILTER = re.compile(r'^(eq|neq|gt|gte|lt|lte|in)\.(.*)$', re.S)
+
+
+def _value(text: str):
+    # PostgREST compares booleans by name; SQLite stores them as 0/1
+    return {'true': 1, 'false': 0}.get(text, text)
+
+
+def _error(status: int, message: str, code: str = 'PGRST100') -> Reply:
+    return json_reply({'code': code, 'details': None, 'hint': None, 'message': message}, status)
+
+
+class PostgRESTStandin(StandinServer):
+    """SQLite-backed /rest/v1 endpoint"""
+
+    name = 'PostgREST'
+
+    def __init__(self, db_path: str = ':memory:', host: str = '127.0.0.1', port: int = 0,
+                 behaviour: Optional[Behaviour] = None, client: Optional[LocalSupabaseClient] = None):
+        super().__init__(host, port, behaviour)
+        self.client = client or LocalSupabaseClient(db_path)
+        # One SQLite connection shared by the handler threads
+        self._db_lock = threading.Lock()
+
+    def route(self, request: Request) -> Reply:
+        if not request.path.startswith(PREFIX):
+            return _error(404, f'Unknown path {request.path}', 'PGRST125')
+        table = request.path[len(PREFIX):].strip('/')
+        prefer = request.headers.get('Prefer') or ''
+        try:
+            with self._db_lock:
+                if request.method == 'GET' or request.method == 'HEAD':
+                    return self._select(table, request, 'count=exact' in prefer)
+                if request.method == 'POST':
+                    return self._insert(table, request, 'return=minimal' in prefer)
+        except LocalAPIError as e:
+            return _error(400, str(e), '42703' if 'column' in str(e) else '42P01')
+        except sqlite3.IntegrityError as e:
+            # A failed batch is rolled back whole, as in Postgres
+            self.client.conn.rollback()
+            if 'UNIQUE' in str(e):
+                return _error(409, str(e), '23505')
+            return _error(400, str(e), '23502' if 'NOT NULL' in str(e) else '23514')
+        except ValueError as e:
+            return _error(400, str(e))
+        return _error(405, f'{request.method} is not supported by the stand-in')
+
+    def _select(self, table: str, request: Request, count: bool) -> Reply:
+        query = self.client.table(table).select(request.params.get('select', '*') or '*',
+                                                count='exact' if count else None)
+        for column, spec in request.query:
+            if column in RESERVED_PARAMS:
+                continue
+            match = FILTER.match(spec)
+            if not match:
+                raise ValueError(f'Unsupported filter {column}={spec}')
+            op, value = match.groups()
+            if op == 'in':
+                query.in_(column, [_value(v.strip('"')) for v in value.strip('()').split(',') if v])
+            else:
+                getattr(query, op)(column, _value(value))
+        for term in filter(None, request.params.get('order', '').split(',')):
+            column, _, direction = term.partition('.')
+            query.order(column, desc=direction.startswith('desc'))
+
+        offset = int(request.params.get('offset', 0))
+        if 'limit' in request.params:
+            query.limit(int(request.params['limit']))
+        query.offset(offset)
+
+        response = query.execute()
+        headers = {}
+        if count:
+            last = offset + len(response.data) - 1
+            span = f'{offset}-{last}' if response.data else '*'
+            headers['Content-Range'] = f'{span}/{response.count}'
+        if request.method == 'HEAD':
+            return 200, {'Content-Type': 'application/json', **headers}, b''
+        return json_reply(response.data, headers=headers)
+
+    def _insert(self, table: str, request: Request, minimal: bool) -> Reply:
+        try:
+            rows = request.json()
+        except ValueError:
+            raise ValueError('Request body is not valid JSON')
+        rows = rows if isinstance(rows, list) else [rows]
+        if any(not isinstance(row, dict) for row in rows):
+            raise ValueError('Rows must be JSON objects')
+        self.client.table(table).insert(rows).execute()
+        if minimal:
+            return 201, {}, b''
+        return json_reply(rows, 201)
@@ -0,0 +1,47 @@
+"""
+Telegram Bot API stand-in
+
+POST /bot<token>/sendMessage answers like the Bot API and keeps the
+message; nothing is sent anywhere. Point TELEGRAM_API_URL at it.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from standins.base import Behaviour, Reply, Request, StandinServer, json_reply
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramStandin(StandinServer):
+    """sendMessage sink; messages are kept in order in self.messages"""
+
+    name = 'Telegram'
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, behaviour: Optional[Behaviour] = None):
+        super().__init__(host, port, behaviour)
+        self.messages: List[Dict[str, Any]] = []
+        self._messages_lock = threading.Lock()
+
+    def route(self, request: Request) -> Reply:
+        parts = request.path.strip('/').split('/')
+        if len(parts) != 2 or not parts[0].startswith('bot'):
+            return json_reply({'ok': False, 'error_code': 404, 'description': 'Not Found'}, 404)
+        if parts[1] != 'sendMessage':
+            return json_reply({'ok': False, 'error_code': 400, 'description': f'Unsupported method {parts[1]}'}, 400)
+
+        try:
+            payload = request.json() if request.body else request.params
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict) or not payload.get('chat_id') or not payload.get('text'):
+            return json_reply({'ok': False, 'error_code': 400,
+                               'description': 'Bad Request: chat_id and text are required'}, 400)
+
+        with self._messages_lock:
+            self.messages.append(payload)
+            message_id = len(self.messages)
+        return json_reply({'ok': True, 'result': {
+            'message_id': message_id, 'chat': {'id': payload['chat_id']}, 'text': payload['text'],
+        }})
@@ -0,0 +1,546 @@
+"""
+Pluggable Storage Backends for Deals Data
+
+DatabaseManager talks to one of these instead of a bare Supabase client:
+
+- PostgRESTBackend: Supabase's REST API over the shared async HTTP client
+  (system of record)
+- SupabaseBackend: the same through the supabase client (or a stand-in)
+- SQLiteBackend:   embedded, stdlib only
+- DuckDBBackend:   embedded columnar engine for heavy analytics
+- DualWriteBackend: writes to a primary plus local mirrors; every read
+  goes to the primary, and analytics_reader() hands ad-hoc reporting the
+  first mirror
+
+The embedded engines create their tables from supabase_schema.sql so the
+layout stays identical to the hosted database.
+"""
+
+import os
+import re
+import asyncio
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'supabase_schema.sql')
+
+# PostgREST caps responses at 1000 rows by default
+POSTGREST_PAGE_SIZE = 1000
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+def load_schema_statements(dialect: str = 'sqlite', schema_file: str = SCHEMA_FILE) -> List[str]:
+    """Read supabase_schema.sql and translate it to the given embedded dialect"""
+    with open(schema_file, encoding='utf-8') as f:
+        sql = f.read()
+
+    # Drop comments, then split into statements
+    sql = re.sub(r'--[^\n]*', '', sql)
+    statements = []
+    for stmt in sql.split(';'):
+        stmt = stmt.strip()
+        if not stmt.upper().startswith(('CREATE TABLE', 'CREATE INDEX')):
+            continue
+
+        if dialect == 'sqlite':
+            stmt = re.sub(r'BIGSERIAL PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT', stmt, flags=re.I)
+            stmt = re.sub(r'TIMESTAMP WITH TIME ZONE', 'TEXT', stmt, flags=re.I)
+        elif dialect == 'duckdb':
+            table = re.search(r'CREATE TABLE IF NOT EXISTS (\w+)', stmt, flags=re.I)
+            if table and re.search(r'BIGSERIAL', stmt, flags=re.I):
+                seq = f'seq_{table.group(1)}'
+                statements.append(f'CREATE SEQUENCE IF NOT EXISTS {seq}')
+                stmt = re.sub(r'BIGSERIAL PRIMARY KEY',
+                              f"BIGINT PRIMARY KEY DEFAULT nextval('{seq}')", stmt, flags=re.I)
+            stmt = re.sub(r'TIMESTAMP WITH TIME ZONE', 'TIMESTAMPTZ', stmt, flags=re.I)
+            stmt = re.sub(r'\s+DESC\)', ')', stmt, flags=re.I)
+        else:
+            raise ValueError(f"Unknown schema dialect: {dialect}")
+
+        statements.append(stmt)
+    return statements
+
+
+def symbol_column(table: str) -> str:
+    """NSE tables key securities by symbol, BSE tables by scrip_code"""
+    return 'scrip_code' if table.startswith('bse') else 'symbol'
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def _to_date(value) -> Optional[date]:
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).date()
+
+
+# ============================================================================
+# BACKEND INTERFACE
+# ============================================================================
+
+class StorageBackend(ABC):
+    """Common interface for all deal stores"""
+
+    name = 'base'
+
+    @abstractmethod
+    def insert_records(self, table: str, records: List[Dict[str, Any]]) -> int:
+        """Insert JSON-ready records, returning the number stored"""
+
+    @abstractmethod
+    def select(self, table: str, columns: str = '*', eq: Optional[Dict[str, Any]] = None,
+               order_by: Optional[str] = None, desc: bool = False,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Simple filtered select"""
+
+    @abstractmethod
+    def count(self, table: str, eq: Optional[Dict[str, Any]] = None) -> int:
+        """Count rows matching equality filters"""
+
+    @abstractmethod
+    def query_deals(self, table: str, start: Optional[date] = None, end: Optional[date] = None,
+                    symbol: Optional[str] = None, date_column: str = 'deal_date') -> pd.DataFrame:
+        """Deals in [start, end], optionally for one symbol / scrip code"""
+
+    @abstractmethod
+    def last_deal_date(self, table: str) -> Optional[date]:
+        """Latest stored deal_date, or None for an empty table"""
+
+    def analytics_reader(self) -> 'StorageBackend':
+        """Backend for read-only ad-hoc analytics (this one, unless mirrored)"""
+        return self
+
+    def close(self):
+        pass
+
+
+# ============================================================================
+# SUPABASE
+# ============================================================================
+
+class SupabaseBackend(StorageBackend):
+    """PostgREST via the supabase client (or any compatible stand-in)"""
+
+    name = 'supabase'
+
+    def __init__(self, client, batch_size: int = 100):
+        self.client = client
+        self.batch_size = batch_size
+
+    def insert_records(self, table: str, records: List[Dict[str, Any]]) -> int:
+        total_inserted = 0
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
+            try:
+                self.client.table(table).insert(batch).execute()
+                total_inserted += len(batch)
+                logger.debug(f"Inserted batch of {len(batch)} records into {table}")
+            except Exception as e:
+                logger.error(f"Error inserting batch into {table}: {e}")
+        return total_inserted
+
+    def select(self, table, columns='*', eq=None, order_by=None, desc=False, limit=None):
+        query = self.client.table(table).select(columns)
+        for column, value in (eq or {}).items():
+            query = query.eq(column, _iso(value))
+        if order_by:
+            query = query.order(order_by, desc=desc)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data
+
+    def count(self, table, eq=None) -> int:
+        query = self.client.table(table).select("*", count="exact")
+        for column, value in (eq or {}).items():
+            query = query.eq(column, _iso(value))
+        response = query.execute()
+        return response.count if getattr(response, 'count', None) is not None else len(response.data)
+
+    def query_deals(self, table, start=None, end=None, symbol=None, date_column='deal_date'):
+        rows = []
+        offset = 0
+        while True:
+            query = self.client.table(table).select('*')
+            if start is not None:
+                query = query.gte(date_column, _iso(start))
+            if end is not None:
+                query = query.lte(date_column, _iso(end))
+            if symbol is not None:
+                query = query.eq(symbol_column(table), symbol)
+            page = query.order(date_column).order('id').range(offset, offset + POSTGREST_PAGE_SIZE - 1).execute().data
+            rows.extend(page)
+            if len(page) < POSTGREST_PAGE_SIZE:
+                break
+            offset += POSTGREST_PAGE_SIZE
+        return pd.DataFrame(rows)
+
+    def last_deal_date(self, table):
+        # gte() also filters NULLs, which Postgres sorts first on DESC
+        rows = self.client.table(table).select('deal_date')\
+            .gte('deal_date', '1900-01-01')\
+            .order('deal_date', desc=True)\
+            .limit(1)\
+            .execute().data
+        return _to_date(rows[0]['deal_date']) if rows else None
+
+
+class PostgRESTBackend(StorageBackend):
+    """Supabase's PostgREST API spoken directly over async_http
+
+    Insert batches are sent concurrently; the connector's per-host limit
+    caps how many are in flight.
+    """
+
+    name = 'supabase'
+
+    def __init__(self, url: str, key: str, batch_size: int = 100, client=None):
+        from async_http import get_client
+        self.base_url = url.rstrip('/') + '/rest/v1'
+        self.batch_size = batch_size
+        self.http = client or get_client()
+        self.headers = {
+            'apikey': key,
+            'Authorization': f'Bearer {key}',
+            'Content-Type': 'application/json',
+        }
+
+    def _request(self, method: str, table: str, params=None, headers=None, json=None):
+        return self.http.request(method, f'{self.base_url}/{table}', params=params,
+                                 headers={**self.headers, **(headers or {})}, json=json, timeout=30)
+
+    @staticmethod
+    def _filters(eq: Optional[Dict[str, Any]]) -> List[tuple]:
+        return [(column, f'eq.{_postgrest_value(value)}') for column, value in (eq or {}).items()]
+
+    def insert_records(self, table: str, records: List[Dict[str, Any]]) -> int:
+        batches = [records[i:i + self.batch_size] for i in range(0, len(records), self.batch_size)]
+
+        async def insert(batch):
+            response = await self._request('POST', table, headers={'Prefer': 'return=minimal'}, json=batch)
+            response.raise_for_status()
+            return len(batch)
+
+        async def insert_all():
+            return await asyncio.gather(*(insert(batch) for batch in batches), return_exceptions=True)
+
+        total_inserted = 0
+        for batch, result in zip(batches, self.http.run(insert_all())):
+            if isinstance(result, Exception):
+                logger.error(f"Error inserting batch into {table}: {result}")
+            else:
+                total_inserted += result
+                logger.debug(f"Inserted batch of {len(batch)} records into {table}")
+        return total_inserted
+
+    def _get(self, table: str, params: List[tuple], headers=None):
+        response = self.http.run(self._request('GET', table, params=params, headers=headers))
+        response.raise_for_status()
+        return response
+
+    def select(self, table, columns='*', eq=None, order_by=None, desc=False, limit=None):
+        params = [('select', columns.replace(' ', ''))] + self._filters(eq)
+        if order_by:
+            params.append(('order', f'{order_by}.{"desc" if desc else "asc"}'))
+        if limit is not None:
+            params.append(('limit', str(limit)))
+        return self._get(table, params).json()
+
+    def count(self, table, eq=None) -> int:
+        # Content-Range: 0-0/<total>
+        response = self._get(table, [('select', 'id'), ('limit', '1')] + self._filters(eq),
+                             headers={'Prefer': 'count=exact'})
+        total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+        return int(total) if total.isdigit() else len(response.json())
+
+    def query_deals(self, table, start=None, end=None, symbol=None, date_column='deal_date'):
+        # id breaks ties between equal dates, otherwise pages may overlap or skip rows
+        params = [('select', '*'), ('order', f'{date_column}.asc,id.asc')]
+        if start is not None:
+            params.append((date_column, f'gte.{_iso(start)}'))
+        if end is not None:
+            params.append((date_column, f'lte.{_iso(end)}'))
+        if symbol is not None:
+            params.append((symbol_column(table), f'eq.{symbol}'))
+
+        rows = []
+        offset = 0
+        while True:
+            page = self._get(table, params + [('offset', str(offset)), ('limit', str(POSTGREST_PAGE_SIZE))]).json()
+            rows.extend(page)
+            if len(page) < POSTGREST_PAGE_SIZE:
+                break
+            offset += POSTGREST_PAGE_SIZE
+        return pd.DataFrame(rows)
+
+    def last_deal_date(self, table):
+        # order=deal_date.desc.nullslast skips rows without a date
+        rows = self._get(table, [('select', 'deal_date'), ('order', 'deal_date.desc.nullslast'),
+                                 ('limit', '1')]).json()
+        return _to_date(rows[0]['deal_date']) if rows else None
+
+
+def _postgrest_value(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(_iso(value))
+
+
+# ============================================================================
+# EMBEDDED SQL ENGINES
+# ============================================================================
+
+class _EmbeddedBackend(StorageBackend):
+    """Shared SQL for SQLite and DuckDB"""
+
+    dialect = ''
+
+    def __init__(self):
+        self._columns: Dict[str, List[str]] = {}
+        self._warned: set = set()
+
+    # Engine specific ------------------------------------------------------
+
+    @abstractmethod
+    def _execute(self, sql: str, params: Optional[list] = None):
+        """Run a statement without results"""
+
+    @abstractmethod
+    def _fetch(self, sql: str, params: Optional[list] = None) -> List[Dict[str, Any]]:
+        """Rows of a query as dicts"""
+
+    def _fetch_frame(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        return pd.DataFrame(self._fetch(sql, params))
+
+    @abstractmethod
+    def _bulk_insert(self, table: str, columns: List[str], records: List[Dict[str, Any]]):
+        """Insert records (restricted to columns) in one statement or transaction"""
+
+    @abstractmethod
+    def table_columns(self, table: str) -> List[str]:
+        """Column names of a table, cached"""
+
+    # Shared ---------------------------------------------------------------
+
+    def _create_schema(self):
+        for stmt in load_schema_statements(self.dialect):
+            self._execute(stmt)
+
+    def insert_records(self, table: str, records: List[Dict[str, Any]]) -> int:
+        if not records:
+            return 0
+
+        known = set(self.table_columns(table))
+        columns = [c for c in records[0].keys() if c in known]
+        dropped = [c for c in records[0].keys() if c not in known]
+        if dropped and (table, tuple(dropped)) not in self._warned:
+            # A local mirror must never reject what the system of record accepted
+            logger.warning(f"{self.name}: {table} has no column(s) {dropped} - not stored locally")
+            self._warned.add((table, tuple(dropped)))
+
+        try:
+            self._bulk_insert(table, columns, records)
+            return len(records)
+        except Exception as e:
+            logger.error(f"Error bulk loading {len(records)} records into {self.name}.{table}: {e}")
+            return 0
+
+    @staticmethod
+    def _where(eq: Optional[Dict[str, Any]]):
+        clauses, params = [], []
+        for column, value in (eq or {}).items():
+            clauses.append(f'"{column}" = ?')
+            params.append(_iso(value))
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def select(self, table, columns='*', eq=None, order_by=None, desc=False, limit=None):
+        col_sql = '*' if columns.strip() == '*' else ', '.join(f'"{c.strip()}"' for c in columns.split(','))
+        where_sql, params = self._where(eq)
+        sql = f'SELECT {col_sql} FROM "{table}"{where_sql}'
+        if order_by:
+            sql += f' ORDER BY "{order_by}" {"DESC" if desc else "ASC"}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return self._fetch(sql, params)
+
+    def count(self, table, eq=None) -> int:
+        where_sql, params = self._where(eq)
+        rows = self._fetch(f'SELECT COUNT(*) AS n FROM "{table}"{where_sql}', params)
+        return int(rows[0]['n']) if rows else 0
+
+    def query_deals(self, table, start=None, end=None, symbol=None, date_column='deal_date'):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append(f'"{date_column}" >= ?')
+            params.append(_iso(start))
+        if end is not None:
+            clauses.append(f'"{date_column}" <= ?')
+            params.append(_iso(end))
+        if symbol is not None:
+            clauses.append(f'"{symbol_column(table)}" = ?')
+            params.append(symbol)
+        where_sql = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        return self._fetch_frame(f'SELECT * FROM "{table}"{where_sql} ORDER BY "{date_column}"', params)
+
+    def last_deal_date(self, table):
+        rows = self._fetch(f'SELECT MAX(deal_date) AS last_date FROM "{table}"')
+        return _to_date(rows[0]['last_date']) if rows else None
+
+
+class SQLiteBackend(_EmbeddedBackend):
+    """Embedded SQLite store (stdlib)"""
+
+    name = 'sqlite'
+    dialect = 'sqlite'
+
+    def __init__(self, path: str = 'deals.sqlite'):
+        super().__init__()
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self._create_schema()
+        self.conn.commit()
+        logger.info(f"SQLite backend ready at {path}")
+
+    def _execute(self, sql, params=None):
+        self.conn.execute(sql, params or [])
+
+    def _fetch(self, sql, params=None):
+        return [dict(row) for row in self.conn.execute(sql, params or []).fetchall()]
+
+    def _fetch_frame(self, sql, params=None):
+        return pd.read_sql_query(sql, self.conn, params=params or [])
+
+    def table_columns(self, table):
+        if table not in self._columns:
+            rows = self.conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            self._columns[table] = [row['name'] for row in rows]
+        return self._columns[table]
+
+    def _bulk_insert(self, table, columns, records):
+        col_sql = ', '.join(f'"{c}"' for c in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        with self.conn:
+            self.conn.executemany(
+                f'INSERT INTO "{table}" ({col_sql}) VALUES ({placeholders})',
+                [tuple(record.get(c) for c in columns) for record in records]
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class DuckDBBackend(_EmbeddedBackend):
+    """Embedded DuckDB store - bulk loads through a registered DataFrame (Arrow)"""
+
+    name = 'duckdb'
+    dialect = 'duckdb'
+
+    def __init__(self, path: str = 'deals.duckdb'):
+        super().__init__()
+        import duckdb  # optional dependency, only needed for this backend
+        self.path = path
+        self.conn = duckdb.connect(path)
+        self._create_schema()
+        logger.info(f"DuckDB backend ready at {path}")
+
+    def _execute(self, sql, params=None):
+        self.conn.execute(sql, params or [])
+
+    def _fetch_frame(self, sql, params=None):
+        return self.conn.execute(sql, params or []).df()
+
+    def _fetch(self, sql, params=None):
+        return self._fetch_frame(sql, params).to_dict('records')
+
+    def table_columns(self, table):
+        if table not in self._columns:
+            rows = self.conn.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position",
+                [table]
+            ).fetchall()
+            self._columns[table] = [row[0] for row in rows]
+        return self._columns[table]
+
+    def _bulk_insert(self, table, columns, records):
+        incoming = pd.DataFrame.from_records(records, columns=columns)
+        col_sql = ', '.join(f'"{c}"' for c in columns)
+        self.conn.register('_incoming', incoming)
+        try:
+            self.conn.execute(f'INSERT INTO "{table}" ({col_sql}) SELECT {col_sql} FROM _incoming')
+        finally:
+            self.conn.unregister('_incoming')
+
+    def close(self):
+        self.conn.close()
+
+
+# ============================================================================
+# DUAL WRITE
+# ============================================================================
+
+class DualWriteBackend(StorageBackend):
+    """Primary (system of record) plus local mirrors
+
+    Writes go to every backend; only the primary decides success. All
+    reads go to the primary: the dedupe paths (catch-up, backfill, import,
+    rollups) must see what is actually stored there, not a mirror that is
+    new, lagging or lost with an ephemeral runner. analytics_reader()
+    returns the first mirror for callers that can live with that.
+    """
+
+    name = 'dual'
+
+    def __init__(self, primary: StorageBackend, mirrors: List[StorageBackend]):
+        self.primary = primary
+        self.mirrors = mirrors
+
+    def insert_records(self, table, records):
+        inserted = self.primary.insert_records(table, records)
+        for mirror in self.mirrors:
+            try:
+                mirror_count = mirror.insert_records(table, records)
+                logger.debug(f"Mirrored {mirror_count} records into {mirror.name}.{table}")
+            except Exception as e:
+                logger.error(f"Mirror write to {mirror.name}.{table} failed: {e}")
+        return inserted
+
+    def select(self, table, columns='*', eq=None, order_by=None, desc=False, limit=None):
+        return self.primary.select(table, columns, eq, order_by, desc, limit)
+
+    def count(self, table, eq=None):
+        return self.primary.count(table, eq)
+
+    def query_deals(self, table, start=None, end=None, symbol=None, date_column='deal_date'):
+        return self.primary.query_deals(table, start, end, symbol, date_column)
+
+    def analytics_reader(self):
+        return self.mirrors[0] if self.mirrors else self.primary
+
+    def last_deal_date(self, table):
+        return self.primary.last_deal_date(table)
+
+    def close(self):
+        for backend in [self.primary] + self.mirrors:
+            backend.close()
+
+
+def create_embedded_backend(kind: str, path: Optional[str] = None) -> StorageBackend:
+    """Build an embedded backend by name ('sqlite' or 'duckdb')"""
+    if kind == 'sqlite':
+        return SQLiteBackend(path or 'deals.sqlite')
+    if kind == 'duckdb':
+        return DuckDBBackend(path or 'deals.duckdb')
+    raise ValueError(f"Unknown embedded storage backend: {kind}")
@@ -0,0 +1,306 @@
+"""
+Incremental Streak and Anomaly Detection
+
+Flags investor behaviour that only shows up across days:
+
+- streaks: the same client buying (or selling) the same security on
+  PATTERN_MIN_STREAK or more consecutive trading days
+- first appearances: a client never seen before whose deals that day are
+  worth at least PATTERN_LARGE_CLIENT_CR crores
+
+Instead of rescanning history, each run folds only its new deals into a
+persisted state of one 40-byte record per (client, security, side) and
+per client:
+
+    key (64-bit hash) | first_day | last_day | streak | deals | streak_qty | total_qty
+
+The state is a sorted .npy base (memory-mapped, binary searched) plus an
+append-only .log of changed records; the log is merged into the base
+once it reaches a quarter of the base's size. Updating is a groupby and
+a searchsorted over the new deals, so a run costs O(new deals).
+
+Replaying a trading date that is already in the state changes nothing
+and emits the same events again, so reruns stay consistent.
+"""
+
+import os
+import hashlib
+import logging
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from deal_records import AlertBatch, DealAlert
+from deal_schema import concat_deal_frames
+
+logger = logging.getLogger(__name__)
+
+STATE = np.dtype([
+    ('key', '<u8'), ('first_day', '<i4'), ('last_day', '<i4'), ('streak', '<i4'), ('deals', '<i4'),
+    ('streak_qty', '<f8'), ('total_qty', '<f8'),
+])
+
+CRORE = 1e7
+
+
+def _hash(*parts: str) -> int:
+    digest = hashlib.blake2b('\0'.join(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _normalized(column: pd.Series) -> pd.Series:
+    """Upper-case text with collapsed whitespace, nulls as ''"""
+    return column.astype(object).where(column.notna(), '').astype(str).str.upper().str.split().str.join(' ')
+
+
+class StreakState:
+    """key -> STATE record, as a sorted base file plus an append-only log"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.log_path = path + '.log'
+        self._base = np.empty(0, dtype=STATE)
+        self._log = np.empty(0, dtype=STATE)
+        self._load()
+
+    def __len__(self):
+        return len(self._base) + len(self._log)
+
+    def _load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                self._base = np.load(self.path, mmap_mode='r')
+            except (OSError, ValueError) as e:
+                logger.warning(f"Unreadable pattern state {self.path}, starting empty: {e}")
+        if self.path and os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                data = f.read()
+            # A torn final record (crash mid-append) is dropped
+            self._log = self._latest(np.frombuffer(data[:len(data) - len(data) % STATE.itemsize], dtype=STATE))
+
+    @staticmethod
+    def _latest(records: np.ndarray) -> np.ndarray:
+        """One record per key (the last written), sorted by key"""
+        if not len(records):
+            return records
+        reversed_records = records[::-1]
+        _, first = np.unique(reversed_records['key'], return_index=True)
+        return reversed_records[first]
+
+    def get(self, keys: np.ndarray) -> np.ndarray:
+        """Stored record per key; key 0 marks keys never seen"""
+        result = np.zeros(len(keys), dtype=STATE)
+        for records in (self._base, self._log):  # log entries are newer
+            if not len(records):
+                continue
+            stored = np.ascontiguousarray(records['key'])
+            at = np.minimum(np.searchsorted(stored, keys), len(stored) - 1)
+            hit = stored[at] == keys
+            result[hit] = records[at[hit]]
+        return result
+
+    def put(self, records: np.ndarray):
+        """Persist changed records"""
+        if not len(records):
+            return
+        self._log = self._latest(np.concatenate([self._log, records]))
+        if not self.path:
+            return
+        try:
+            with open(self.log_path, 'ab') as f:
+                f.write(records.tobytes())
+        except OSError as e:
+            logger.warning(f"Could not update pattern state {self.log_path}: {e}")
+            return
+        if len(self._log) >= max(1024, len(self._base) // 4):
+            self.merge()
+
+    def merge(self):
+        """Fold the log into the base file"""
+        merged = self._latest(np.concatenate([np.asarray(self._base), self._log]))
+        tmp_path = self.path + '.tmp.npy'
+        try:
+            np.save(tmp_path, merged)
+            os.replace(tmp_path, self.path)
+            os.remove(self.log_path)
+        except OSError as e:
+            logger.warning(f"Could not merge pattern state {self.path}: {e}")
+            return
+        self._base = np.load(self.path, mmap_mode='r')
+        self._log = np.empty(0, dtype=STATE)
+
+
+class StreakDetector:
+    """Folds each delta of deals into StreakState and returns pattern events as DealAlerts"""
+
+    def __init__(self, state: StreakState, min_streak: int = 3, large_client_cr: float = 25,
+                 priority: int = 1, holidays: Sequence = ()):
+        self.state = state
+        self.min_streak = min_streak
+        self.large_client_value = large_client_cr * CRORE
+        self.priority = priority
+        # Non-weekend exchange holidays, so Friday -> Monday still counts as consecutive
+        self.holidays = np.array(holidays, dtype='datetime64[D]')
+
+    @staticmethod
+    def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+        """Normalized client / security / side / day per usable deal; row points back into df"""
+        security = df['symbol'] if 'symbol' in df.columns else pd.Series(pd.NA, index=df.index)
+        if 'scrip_code' in df.columns:
+            security = security.astype(object).fillna(df['scrip_code'].astype(object))
+        side = df['buy_sell'] if 'buy_sell' in df.columns else pd.Series('', index=df.index)
+        quantity = pd.to_numeric(df['quantity_traded'], errors='coerce').astype('float64').fillna(0.0)
+        price = pd.to_numeric(df['trade_price'], errors='coerce').astype('float64').fillna(0.0)
+        day = pd.to_datetime(df['deal_date'], errors='coerce')
+        deals = pd.DataFrame({
+            'client': _normalized(df['client_name']).to_numpy(),
+            'security': _normalized(security).to_numpy(),
+            'side': _normalized(side).str[:1].to_numpy(),
+            # Days since the epoch, as stored in STATE
+            'day': day.to_numpy('datetime64[D]').astype('int64'),
+            'quantity': quantity.to_numpy(),
+            'value': (quantity * price).to_numpy(),
+            'row': np.arange(len(df)),
+        })
+        return deals[(deals['client'] != '') & (deals['security'] != '')
+                     & deals['side'].isin(['B', 'S']) & day.notna().to_numpy()]
+
+    @staticmethod
+    def _keys(labels: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(labels)
+        return np.array([_hash(label) for label in uniques], dtype='<u8')[codes]
+
+    def _fold(self, daily: pd.DataFrame, consecutive_rule: bool) -> pd.DataFrame:
+        """New state per (key, day) row of daily, sorted by key then day
+
+        daily has key, day, quantity and deals; rows already covered by the
+        stored state (day <= last_day) are dropped first.
+        """
+        stored = self.state.get(daily['key'].to_numpy())
+        days = daily['day'].to_numpy()
+        fresh = (stored['key'] == 0) | (days > stored['last_day'])
+        daily, stored, days = daily[fresh], stored[fresh], days[fresh]
+        if daily.empty:
+            return daily.assign(first_day=[], streak=[], streak_qty=[], total_qty=[], deals_total=[])
+
+        keys = daily['key'].to_numpy()
+        quantity = daily['quantity'].to_numpy()
+        starts = np.r_[True, keys[1:] != keys[:-1]]
+        known = stored['key'] != 0
+
+        # Previous active day: the row before in the same key, or the stored last_day
+        previous = np.where(starts, np.where(known, stored['last_day'], -1), np.r_[-1, days[:-1]])
+        if consecutive_rule:
+            gap = np.busday_count(previous.astype('datetime64[D]'), days.astype('datetime64[D]'),
+                                  holidays=self.holidays)
+            consecutive = (previous >= 0) & (gap == 1)
+        else:
+            consecutive = previous >= 0
+
+        # A run starts wherever the streak breaks; a run that continues the stored
+        # streak begins from it
+        run = np.cumsum(~consecutive | starts) - 1
+        run_start = np.flatnonzero(~consecutive | starts)
+        carried = np.where(starts & consecutive, stored['streak'], 0)[run_start]
+        carried_qty = np.where(starts & consecutive, stored['streak_qty'], 0.0)[run_start]
+        in_run = np.arange(len(days)) - run_start[run]
+        run_qty = np.cumsum(quantity) - np.r_[0, np.cumsum(quantity)][run_start][run]
+
+        key_start = np.flatnonzero(starts)
+        key_of = np.cumsum(starts) - 1
+        key_qty = np.cumsum(quantity) - np.r_[0, np.cumsum(quantity)][key_start][key_of]
+        base = stored[key_start][key_of]
+        return daily.assign(
+            first_day=np.where(base['key'] != 0, base['first_day'], days[key_start][key_of]),
+            streak=carried[run] + in_run + 1,
+            streak_qty=carried_qty[run] + run_qty,
+            total_qty=base['total_qty'] + key_qty,
+            deals_total=base['deals'] + daily['deals'].cumsum().to_numpy()
+                        - np.r_[0, daily['deals'].cumsum().to_numpy()][key_start][key_of],
+        )
+
+    @staticmethod
+    def _records(folded: pd.DataFrame) -> np.ndarray:
+        """Final STATE record per key"""
+        last = folded.drop_duplicates('key', keep='last')
+        records = np.empty(len(last), dtype=STATE)
+        records['key'] = last['key'].to_numpy()
+        records['first_day'] = last['first_day'].to_numpy()
+        records['last_day'] = last['day'].to_numpy()
+        records['streak'] = last['streak'].to_numpy()
+        records['deals'] = last['deals_total'].to_numpy()
+        records['streak_qty'] = last['streak_qty'].to_numpy()
+        records['total_qty'] = last['total_qty'].to_numpy()
+        return records
+
+    def ingest(self, data: Dict[str, pd.DataFrame], emit: bool = True) -> List[DealAlert]:
+        """Fold the deals in data into the state; pattern events for them (unless emit=False)"""
+        source = concat_deal_frames(data.values())
+        if source.empty or 'client_name' not in source.columns or 'deal_date' not in source.columns:
+            return []
+        deals = self._prepare(source)
+        if deals.empty:
+            return []
+
+        aggregations = dict(quantity=('quantity', 'sum'), value=('value', 'sum'),
+                            deals=('quantity', 'size'), row=('row', 'last'))
+        deals['pair'] = self._keys('pair|' + deals['client'] + '|' + deals['security'] + '|' + deals['side'])
+        deals['client_key'] = self._keys('client|' + deals['client'])
+        pairs = deals.groupby(['pair', 'day'], sort=True).agg(**aggregations).reset_index() \
+            .rename(columns={'pair': 'key'})
+        clients = deals.groupby(['client_key', 'day'], sort=True).agg(**aggregations).reset_index() \
+            .rename(columns={'client_key': 'key'})
+
+        folded_pairs = self._fold(pairs, consecutive_rule=True)
+        folded_clients = self._fold(clients, consecutive_rule=False)
+        self.state.put(np.concatenate([self._records(folded_pairs), self._records(folded_clients)]))
+        if not emit:
+            return []
+        return self._events(pairs, clients, source)
+
+    def _events(self, pairs: pd.DataFrame, clients: pd.DataFrame, source: pd.DataFrame) -> List[DealAlert]:
+        """Events read back from the state, so a replayed day reports the same ones"""
+        alerts = []
+
+        # Streaks: each pair's latest day in this delta, if that day extends a long enough streak
+        latest = pairs.drop_duplicates('key', keep='last')
+        state = self.state.get(latest['key'].to_numpy())
+        on_day = state['last_day'] == latest['day'].to_numpy()
+        hits = latest[on_day & (state['streak'] >= self.min_streak)]
+        hit_state = state[on_day & (state['streak'] >= self.min_streak)]
+        if not hits.empty:
+            rows = source.iloc[hits['row'].to_numpy()]
+            sides = np.where(rows['buy_sell'].astype(str).str.strip().str.upper().str[:1] == 'B', 'buy', 'sell')
+            labels = [f"{streak}-day {side} streak" for streak, side in zip(hit_state['streak'], sides)]
+            alerts.extend(self._alerts(rows, hits, labels, [
+                f"{streak} consecutive trading days, {quantity:,.0f} shares"
+                for streak, quantity in zip(hit_state['streak'], hit_state['streak_qty'])
+            ], 'streak'))
+
+        # First appearances: the client's first day in the state is this day, and that day was large
+        state = self.state.get(clients['key'].to_numpy())
+        first = (state['first_day'] == clients['day'].to_numpy()) \
+            & (clients['value'].to_numpy() >= self.large_client_value)
+        hits = clients[first]
+        if not hits.empty:
+            rows = source.iloc[hits['row'].to_numpy()]
+            alerts.extend(self._alerts(rows, hits, ['First appearance'] * len(hits), [
+                f"First deals seen from this client: ₹{value / CRORE:,.1f} Cr in {deals} deal(s)"
+                for value, deals in zip(hits['value'], hits['deals'])
+            ], 'first_appearance'))
+
+        return alerts
+
+    def _alerts(self, rows: pd.DataFrame, groups: pd.DataFrame, labels: List[str], remarks: List[str],
+                pattern: str) -> List[DealAlert]:
+        """One alert per group, shown on its day's last deal with the day's total quantity and VWAP"""
+        quantity = groups['quantity'].to_numpy()
+        vwap = np.divide(groups['value'].to_numpy(), quantity, out=np.zeros(len(groups)), where=quantity > 0)
+        return AlertBatch.from_frame(
+            rows.assign(quantity_traded=quantity, trade_price=vwap),
+            investor_category=labels, priority=self.priority, remarks=remarks, rule=pattern,
+        ).records()
+
+    def is_empty(self) -> bool:
+        return len(self.state) == 0
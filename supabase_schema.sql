@@ -7,18 +7,25 @@
 CREATE TABLE IF NOT EXISTS nse_bulk_deals (
     id BIGSERIAL PRIMARY KEY,
     fetch_date DATE NOT NULL,
+    deal_date DATE,
     source TEXT DEFAULT 'NSE',
+    deal_category TEXT,
     symbol TEXT,
     security_name TEXT,
     client_name TEXT,
-    deal_type TEXT,
-    quantity NUMERIC,
+    buy_sell TEXT,
+    quantity_traded NUMERIC,
     trade_price NUMERIC,
+    remarks TEXT,
+    isin TEXT,
+    scrip_code TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create index for faster queries
 CREATE INDEX IF NOT EXISTS idx_nse_bulk_fetch_date ON nse_bulk_deals(fetch_date DESC);
+CREATE INDEX IF NOT EXISTS idx_nse_bulk_deal_date ON nse_bulk_deals(deal_date DESC);
+CREATE INDEX IF NOT EXISTS idx_nse_bulk_isin ON nse_bulk_deals(isin);
 CREATE INDEX IF NOT EXISTS idx_nse_bulk_symbol ON nse_bulk_deals(symbol);
 
 -- ============================================================================
@@ -27,18 +34,25 @@ CREATE INDEX IF NOT EXISTS idx_nse_bulk_symbol ON nse_bulk_deals(symbol);
 CREATE TABLE IF NOT EXISTS nse_block_deals (
     id BIGSERIAL PRIMARY KEY,
     fetch_date DATE NOT NULL,
+    deal_date DATE,
     source TEXT DEFAULT 'NSE',
+    deal_category TEXT,
     symbol TEXT,
     security_name TEXT,
     client_name TEXT,
-    deal_type TEXT,
-    quantity NUMERIC,
+    buy_sell TEXT,
+    quantity_traded NUMERIC,
     trade_price NUMERIC,
+    remarks TEXT,
+    isin TEXT,
+    scrip_code TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create index for faster queries
 CREATE INDEX IF NOT EXISTS idx_nse_block_fetch_date ON nse_block_deals(fetch_date DESC);
+CREATE INDEX IF NOT EXISTS idx_nse_block_deal_date ON nse_block_deals(deal_date DESC);
+CREATE INDEX IF NOT EXISTS idx_nse_block_isin ON nse_block_deals(isin);
 CREATE INDEX IF NOT EXISTS idx_nse_block_symbol ON nse_block_deals(symbol);
 
 -- ============================================================================
@@ -47,18 +61,24 @@ CREATE INDEX IF NOT EXISTS idx_nse_block_symbol ON nse_block_deals(symbol);
 CREATE TABLE IF NOT EXISTS bse_bulk_deals (
     id BIGSERIAL PRIMARY KEY,
     fetch_date DATE NOT NULL,
+    deal_date DATE,
     source TEXT DEFAULT 'BSE',
+    deal_category TEXT,
     scrip_code TEXT,
     scrip_name TEXT,
     client_name TEXT,
-    deal_type TEXT,
-    quantity NUMERIC,
+    buy_sell TEXT,
+    quantity_traded NUMERIC,
     trade_price NUMERIC,
+    isin TEXT,
+    symbol TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create index for faster queries
 CREATE INDEX IF NOT EXISTS idx_bse_bulk_fetch_date ON bse_bulk_deals(fetch_date DESC);
+CREATE INDEX IF NOT EXISTS idx_bse_bulk_deal_date ON bse_bulk_deals(deal_date DESC);
+CREATE INDEX IF NOT EXISTS idx_bse_bulk_isin ON bse_bulk_deals(isin);
 CREATE INDEX IF NOT EXISTS idx_bse_bulk_scrip ON bse_bulk_deals(scrip_code);
 
 -- ============================================================================
@@ -67,20 +87,104 @@ CREATE INDEX IF NOT EXISTS idx_bse_bulk_scrip ON bse_bulk_deals(scrip_code);
 CREATE TABLE IF NOT EXISTS bse_block_deals (
     id BIGSERIAL PRIMARY KEY,
     fetch_date DATE NOT NULL,
+    deal_date DATE,
     source TEXT DEFAULT 'BSE',
+    deal_category TEXT,
     scrip_code TEXT,
     scrip_name TEXT,
     client_name TEXT,
-    deal_type TEXT,
-    quantity NUMERIC,
+    buy_sell TEXT,
+    quantity_traded NUMERIC,
     trade_price NUMERIC,
+    isin TEXT,
+    symbol TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create index for faster queries
 CREATE INDEX IF NOT EXISTS idx_bse_block_fetch_date ON bse_block_deals(fetch_date DESC);
+CREATE INDEX IF NOT EXISTS idx_bse_block_deal_date ON bse_block_deals(deal_date DESC);
+CREATE INDEX IF NOT EXISTS idx_bse_block_isin ON bse_block_deals(isin);
 CREATE INDEX IF NOT EXISTS idx_bse_block_scrip ON bse_block_deals(scrip_code);
 
+-- ============================================================================
+-- MONITORED INVESTORS TABLE
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS monitored_investors (
+    id BIGSERIAL PRIMARY KEY,
+    investor_name TEXT NOT NULL,
+    display_name TEXT,
+    category TEXT,
+    priority INTEGER DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Symbol watchlist: alert on every deal in these securities (NSE and BSE)
+-- symbol may be an NSE symbol, a BSE scrip code or an ISIN
+CREATE TABLE IF NOT EXISTS monitored_symbols (
+    id BIGSERIAL PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    display_name TEXT,
+    category TEXT,
+    priority INTEGER DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================================
+-- DEAL ROLLUPS (see rollups.py)
+-- ============================================================================
+-- Additive day / week / month aggregates per source x category x symbol;
+-- a period's figures are the sums of its rows. symbol '*' rows are the
+-- per source x category totals, source '*' the grand total.
+CREATE TABLE IF NOT EXISTS deal_rollups (
+    id BIGSERIAL PRIMARY KEY,
+    period TEXT NOT NULL,
+    period_start DATE NOT NULL,
+    source TEXT NOT NULL,
+    deal_category TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    security_name TEXT,
+    deals INTEGER DEFAULT 0,
+    buy_qty NUMERIC DEFAULT 0,
+    sell_qty NUMERIC DEFAULT 0,
+    gross_value NUMERIC DEFAULT 0,
+    unique_clients INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_deal_rollups_period ON deal_rollups(period_start DESC, period);
+
+-- Clients already counted in a rollup period (blake2b of the client name)
+CREATE TABLE IF NOT EXISTS deal_rollup_clients (
+    id BIGSERIAL PRIMARY KEY,
+    period TEXT NOT NULL,
+    period_start DATE NOT NULL,
+    source TEXT NOT NULL,
+    deal_category TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    client_key TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_deal_rollup_clients_period ON deal_rollup_clients(period_start DESC, period);
+
+-- ============================================================================
+-- MIGRATIONS FOR EXISTING TABLES
+-- ============================================================================
+-- Security master enrichment (isin + the other exchange's identifier)
+-- ALTER TABLE nse_bulk_deals ADD COLUMN IF NOT EXISTS isin TEXT;
+-- ALTER TABLE nse_bulk_deals ADD COLUMN IF NOT EXISTS scrip_code TEXT;
+-- ALTER TABLE nse_block_deals ADD COLUMN IF NOT EXISTS isin TEXT;
+-- ALTER TABLE nse_block_deals ADD COLUMN IF NOT EXISTS scrip_code TEXT;
+-- ALTER TABLE bse_bulk_deals ADD COLUMN IF NOT EXISTS isin TEXT;
+-- ALTER TABLE bse_bulk_deals ADD COLUMN IF NOT EXISTS symbol TEXT;
+-- ALTER TABLE bse_block_deals ADD COLUMN IF NOT EXISTS isin TEXT;
+-- ALTER TABLE bse_block_deals ADD COLUMN IF NOT EXISTS symbol TEXT;
+
 -- ============================================================================
 -- ENABLE ROW LEVEL SECURITY (RLS) - Optional but recommended
 -- ============================================================================
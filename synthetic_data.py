@@ -0,0 +1,282 @@
+"""
+Synthetic Bulk/Block Deal Generator for Scale Testing
+
+Produces NSE/BSE bulk and block deals at any volume, in the raw formats
+each fetcher consumes:
+
+- nsepython frames ("Date", "Symbol", ..., dates as 03-OCT-2025)
+- NSE historical API JSON (BD_* keys) and historical CSV ("Buy / Sell",
+  quantities with thousands separators)
+- BSE deals pages (HTML table, DD/MM/YYYY dates, B/S deal types)
+
+Volumes default to one production day (86 NSE bulk, 2 NSE block, 119 BSE
+bulk, 2 BSE block) times --scale, per trading day (trading_calendar.py) of
+the date span. Clients follow a Zipf distribution over --clients names, so a few
+clients dominate as in the real data. A --investor-hit-rate share of deals
+goes to the generated monitored investors, and a --symbol-hit-rate share
+to the watched symbols. Everything comes from one seeded generator, so a
+spec always gives the same data.
+
+write_recording() lays the output out as a recording directory that
+replay.py and the stand-ins (standins/) read directly:
+
+    nse_bulk.csv, nse_block.csv         nsepython frames
+    nse_bulk_api.json, ...              historical API JSON
+    nse_bulk_historical.csv, ...        historical CSV download
+    bse_bulk.html, bse_block.html       BSE deals pages
+    monitored_investors.json, monitored_symbols.json
+
+Usage:
+    python synthetic_data.py --out synthetic/ --scale 100
+    python synthetic_data.py --out synthetic/ --scale 10 --start 2025-01-01 --end 2025-03-31
+    python replay.py --recording-dir synthetic/ --db synthetic.sqlite
+"""
+
+import os
+import json
+import logging
+import argparse
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from nse_client import FIELDS
+from replay import BSE_RAW_COLUMNS, NSE_RAW_COLUMNS
+from trading_calendar import get_calendar
+
+logger = logging.getLogger(__name__)
+
+# Deals per trading day in production (the bundled 03-Oct-2025 recordings)
+PRODUCTION_ROWS = {'nse_bulk': 86, 'nse_block': 2, 'bse_bulk': 119, 'bse_block': 2}
+
+FIRST_WORDS = ['ALPHA', 'BHARAT', 'CRESCENT', 'DELTA', 'EVEREST', 'FORTUNE', 'GANGA', 'HIMALAYA', 'INDUS',
+               'JUPITER', 'KAVERI', 'LOTUS', 'MERIDIAN', 'NILGIRI', 'ORBIT', 'PINNACLE', 'RAINBOW', 'SAFFRON',
+               'TRIDENT', 'UNITY', 'VEDANTA', 'WESTERN', 'YAMUNA', 'ZODIAC', 'SHREE', 'MAHA', 'NAVIN', 'OMKAR']
+SECOND_WORDS = ['CAPITAL', 'SECURITIES', 'INVESTMENTS', 'FINSERV', 'VENTURES', 'HOLDINGS', 'TRADING',
+                'STOCK BROKING', 'WEALTH', 'ASSET', 'COMMODITIES', 'FINVEST', 'MARKETS', 'EQUITIES']
+SUFFIXES = ['PRIVATE LIMITED', 'LIMITED', 'LLP', 'FUND', 'MASTER FUND', 'PARTNERS LLP']
+GIVEN_NAMES = ['RAJESH', 'SUNITA', 'AMIT', 'PRIYA', 'VIKRAM', 'ANITA', 'SANJAY', 'NEHA', 'RAHUL', 'KAVITA',
+               'MANISH', 'POOJA', 'DEEPAK', 'REKHA', 'ARJUN', 'MEERA', 'SURESH', 'LATA', 'KIRAN', 'ASHOK']
+FAMILY_NAMES = ['SHAH', 'MEHTA', 'PATEL', 'AGARWAL', 'GUPTA', 'JAIN', 'KAPOOR', 'REDDY', 'IYER', 'NAIR',
+                'DESAI', 'JOSHI', 'KHANNA', 'MALHOTRA', 'BANSAL', 'CHOPRA', 'SETHI', 'BHATIA']
+# Monitored investors use their own words, so non-monitored clients never contain their names
+INVESTOR_WORDS = ['QUASAR', 'OBSIDIAN', 'HALCYON', 'TUNDRA', 'ZEPHYR', 'MOSAIC', 'CITADEL', 'KESTREL',
+                  'LODESTAR', 'SEQUOIA', 'BASALT', 'CORMORANT', 'PELICAN', 'MARLIN', 'GRANITE', 'FALCON']
+
+
+@dataclass
+class SyntheticSpec:
+    """What to generate; rows are per trading day before scaling"""
+    start: date = date(2025, 10, 3)
+    end: date = date(2025, 10, 3)
+    scale: float = 1.0
+    rows: Dict[str, int] = field(default_factory=lambda: dict(PRODUCTION_ROWS))
+    clients: int = 5000
+    # Zipf exponent of client activity; 0 gives every client the same share
+    client_skew: float = 1.1
+    symbols: int = 2000
+    investors: int = 10
+    investor_hit_rate: float = 0.02
+    watched_symbols: int = 10
+    symbol_hit_rate: float = 0.01
+    seed: int = 7
+
+    def trading_days(self) -> np.ndarray:
+        return np.array(get_calendar().trading_days(self.start, self.end), dtype='datetime64[D]')
+
+
+def client_names(n: int, rng: np.random.Generator) -> np.ndarray:
+    """n distinct names: firms and, for about a third, individuals"""
+    firms = [f"{a} {b} {c}" for a in FIRST_WORDS for b in SECOND_WORDS for c in SUFFIXES]
+    people = [f"{a} {b} {c}" for a in GIVEN_NAMES for b in GIVEN_NAMES if a != b for c in FAMILY_NAMES]
+    pool = np.array(firms + people, dtype=object)
+    if n > len(pool):
+        # Numbered copies once the word lists run out
+        pool = np.array([f"{name} {i // len(pool) + 1}" if i >= len(pool) else name
+                         for i, name in enumerate(np.resize(pool, n))], dtype=object)
+    return rng.permutation(pool)[:n]
+
+
+def investor_names(n: int) -> List[str]:
+    words = [f"{a} {b}" for a in INVESTOR_WORDS for b in INVESTOR_WORDS if a != b]
+    # Stride through the pairs (17 is coprime with their count) so first words vary
+    return [f"{words[i * 17 % len(words)]}{'' if i < len(words) else f' {i // len(words) + 1}'} CAPITAL"
+            for i in range(n)]
+
+
+def securities(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """symbol, security name, BSE scrip code and a base price per security"""
+    letters = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    symbols, seen = [], set()
+    while len(symbols) < n:
+        symbol = ''.join(rng.choice(letters, rng.integers(4, 11)))
+        if symbol not in seen:
+            seen.add(symbol)
+            symbols.append(symbol)
+    return pd.DataFrame({
+        'symbol': symbols,
+        'security_name': [f"{s.title()} {rng.choice(['Industries', 'Technologies', 'Finance', 'Pharma'])} Limited"
+                          for s in symbols],
+        'scrip_code': rng.choice(np.arange(500000, 545000), n, replace=False),
+        'price': np.round(np.exp(rng.normal(5, 1.3, n)), 2),
+    })
+
+
+class SyntheticDeals:
+    """Deals for a SyntheticSpec, in the processed schema and every raw format"""
+
+    def __init__(self, spec: Optional[SyntheticSpec] = None):
+        self.spec = spec or SyntheticSpec()
+        rng = np.random.default_rng(self.spec.seed)
+        self.rng = rng
+        self.clients = client_names(self.spec.clients, rng)
+        weights = 1.0 / np.arange(1, len(self.clients) + 1) ** self.spec.client_skew
+        self.client_weights = weights / weights.sum()
+        self.securities = securities(self.spec.symbols, rng)
+        self.investors = investor_names(self.spec.investors)
+        self.watched = self.securities.iloc[rng.choice(len(self.securities), self.spec.watched_symbols,
+                                                       replace=False)]
+
+    def monitored_investors(self) -> List[Dict]:
+        return [{'investor_name': name, 'display_name': name.title(), 'category': 'Synthetic',
+                 'priority': 1 + i % 3} for i, name in enumerate(self.investors)]
+
+    def monitored_symbols(self) -> List[Dict]:
+        return [{'symbol': symbol, 'display_name': symbol, 'category': 'Synthetic', 'priority': 1}
+                for symbol in self.watched['symbol']]
+
+    def deals(self, key: str) -> pd.DataFrame:
+        """Processed-schema deals for nse_bulk / nse_block / bse_bulk / bse_block"""
+        spec, rng = self.spec, self.rng
+        days = spec.trading_days()
+        per_day = spec.rows.get(key, 0) * spec.scale
+        counts = rng.poisson(per_day, len(days)) if per_day else np.zeros(len(days), dtype=int)
+        n = int(counts.sum())
+
+        clients = self.clients[rng.choice(len(self.clients), n, p=self.client_weights)]
+        if self.investors:
+            hits = rng.random(n) < spec.investor_hit_rate
+            clients[hits] = np.array(self.investors, dtype=object)[rng.integers(0, len(self.investors), hits.sum())]
+        rows = rng.integers(0, len(self.securities), n)
+        if len(self.watched):
+            watched = rng.random(n) < spec.symbol_hit_rate
+            rows[watched] = self.watched.index.to_numpy()[rng.integers(0, len(self.watched), watched.sum())]
+        security = self.securities.iloc[rows].reset_index(drop=True)
+
+        block = key.endswith('block')
+        # Block deals are fewer but larger (minimum ₹10 crore at NSE)
+        quantity = np.round(np.exp(rng.normal(13 if block else 11.5, 1.2, n))).astype(np.int64)
+        price = np.round(security['price'].to_numpy() * rng.normal(1, 0.03, n), 2).clip(0.05)
+        df = pd.DataFrame({
+            'deal_date': pd.to_datetime(np.repeat(days, counts)).date,
+            'client_name': clients,
+            'buy_sell': rng.choice(['BUY', 'SELL'], n),
+            'quantity_traded': quantity,
+            'trade_price': price,
+        })
+        if key.startswith('nse'):
+            df.insert(1, 'symbol', security['symbol'])
+            df.insert(2, 'security_name', security['security_name'])
+            if not block:
+                df['remarks'] = np.where(rng.random(n) < 0.05, 'Pre-open', '-')
+        else:
+            df.insert(1, 'scrip_code', security['scrip_code'])
+            df.insert(2, 'scrip_name', security['symbol'])
+        return df
+
+    def all_deals(self) -> Dict[str, pd.DataFrame]:
+        return {key: self.deals(key) for key in PRODUCTION_ROWS}
+
+
+# ============================================================================
+# RAW FORMATS
+# ============================================================================
+
+def _nse_dates(df: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(df['deal_date']).dt.strftime('%d-%b-%Y').str.upper()
+
+
+def to_nsepython(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame as nsepython.get_bulkdeals() / get_blockdeals() return it"""
+    raw = df.assign(deal_date=_nse_dates(df))
+    return raw[[c for c in NSE_RAW_COLUMNS if c in raw.columns]].rename(columns=NSE_RAW_COLUMNS)
+
+
+def to_nse_json(df: pd.DataFrame) -> Dict:
+    """Historical API payload: {"data": [{"BD_DT_DATE": ..., ...}]}"""
+    raw = df.assign(deal_date=pd.to_datetime(df['deal_date']).dt.strftime('%d-%b-%Y'))
+    raw = raw[[c for c in FIELDS if c in raw.columns]].rename(columns={c: keys[0] for c, keys in FIELDS.items()})
+    return {'data': raw.astype(object).to_dict('records')}
+
+
+def to_nse_historical_csv(df: pd.DataFrame) -> bytes:
+    """Historical CSV download ("Buy / Sell" header, 1,23,456-style quantities)"""
+    raw = to_nsepython(df).rename(columns={'Buy/Sell': 'Buy / Sell'})
+    raw['Quantity Traded'] = df['quantity_traded'].map('{:,}'.format).to_numpy()
+    return raw.to_csv(index=False).encode('utf-8-sig')
+
+
+def to_bse_html(df: pd.DataFrame) -> bytes:
+    """BSE bulk/block deals page"""
+    raw = df.assign(deal_date=pd.to_datetime(df['deal_date']).dt.strftime('%d/%m/%Y'),
+                    buy_sell=df['buy_sell'].str[:1])
+    columns = {c: raw_name for c, raw_name in BSE_RAW_COLUMNS.items() if c in raw.columns}
+    table = raw[list(columns)].rename(columns=columns).to_html(index=False)
+    return f"<html><body>{table}</body></html>".encode('utf-8')
+
+
+def write_recording(out_dir: str, spec: Optional[SyntheticSpec] = None) -> Dict[str, int]:
+    """Write every raw format plus the monitored lists to out_dir; rows per kind"""
+    generator = SyntheticDeals(spec)
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for key, df in generator.all_deals().items():
+        counts[key] = len(df)
+        if key.startswith('nse'):
+            to_nsepython(df).to_csv(os.path.join(out_dir, f'{key}.csv'), index=False)
+            with open(os.path.join(out_dir, f'{key}_api.json'), 'w', encoding='utf-8') as f:
+                json.dump(to_nse_json(df), f)
+            with open(os.path.join(out_dir, f'{key}_historical.csv'), 'wb') as f:
+                f.write(to_nse_historical_csv(df))
+        else:
+            with open(os.path.join(out_dir, f'{key}.html'), 'wb') as f:
+                f.write(to_bse_html(df))
+
+    with open(os.path.join(out_dir, 'monitored_investors.json'), 'w', encoding='utf-8') as f:
+        json.dump(generator.monitored_investors(), f, indent=2)
+    with open(os.path.join(out_dir, 'monitored_symbols.json'), 'w', encoding='utf-8') as f:
+        json.dump(generator.monitored_symbols(), f, indent=2)
+    logger.info(f"✓ Wrote synthetic recording to {out_dir}: {counts}")
+    return counts
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Generate synthetic NSE/BSE deal recordings')
+    parser.add_argument('--out', required=True, help='Recording directory to write')
+    parser.add_argument('--start', type=date.fromisoformat, default=SyntheticSpec.start)
+    parser.add_argument('--end', type=date.fromisoformat, help='Last deal date (default: --start)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiple of one production day per trading day')
+    parser.add_argument('--clients', type=int, default=SyntheticSpec.clients)
+    parser.add_argument('--client-skew', type=float, default=SyntheticSpec.client_skew)
+    parser.add_argument('--symbols', type=int, default=SyntheticSpec.symbols)
+    parser.add_argument('--investors', type=int, default=SyntheticSpec.investors)
+    parser.add_argument('--investor-hit-rate', type=float, default=SyntheticSpec.investor_hit_rate)
+    parser.add_argument('--watched-symbols', type=int, default=SyntheticSpec.watched_symbols)
+    parser.add_argument('--symbol-hit-rate', type=float, default=SyntheticSpec.symbol_hit_rate)
+    parser.add_argument('--seed', type=int, default=SyntheticSpec.seed)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    spec = SyntheticSpec(start=args.start, end=args.end or args.start, scale=args.scale, clients=args.clients,
+                         client_skew=args.client_skew, symbols=args.symbols, investors=args.investors,
+                         investor_hit_rate=args.investor_hit_rate, watched_symbols=args.watched_symbols,
+                         symbol_hit_rate=args.symbol_hit_rate, seed=args.seed)
+    write_recording(args.out, spec)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+NSE/BSE Equity Trading Calendar
+
+Tells whether a date is a trading day, so runs on weekends and exchange
+holidays can be skipped and catch-up knows which dates should have deals.
+
+- HOLIDAYS is the exchanges' published list of weekday trading holidays
+  (NSE and BSE share one equity calendar); add next year's list when the
+  exchanges publish it, or put extra dates in TRADING_HOLIDAYS_PATH
+- SPECIAL_SESSIONS are weekend/holiday dates that did trade (Muhurat and
+  special live sessions)
+- lookups go through a numpy busdaycalendar: is_trading_day() is O(1) and
+  trading_days() / next / previous are vectorized, without a per-day loop
+
+Dates after the last year in the table only know about weekends; a
+warning is logged once for them.
+"""
+
+import os
+import json
+import logging
+from datetime import date
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HOLIDAYS = [
+    # 2024
+    '2024-01-22', '2024-01-26', '2024-03-08', '2024-03-25', '2024-03-29', '2024-04-11', '2024-04-17',
+    '2024-05-01', '2024-05-20', '2024-06-17', '2024-07-17', '2024-08-15', '2024-10-02', '2024-11-01',
+    '2024-11-15', '2024-11-20', '2024-12-25',
+    # 2025
+    '2025-02-26', '2025-03-14', '2025-03-31', '2025-04-10', '2025-04-14', '2025-04-18', '2025-05-01',
+    '2025-08-15', '2025-08-27', '2025-10-02', '2025-10-21', '2025-10-22', '2025-11-05', '2025-12-25',
+    # 2026
+    '2026-01-15', '2026-01-26', '2026-03-03', '2026-03-26', '2026-03-31', '2026-04-03', '2026-04-14',
+    '2026-05-01', '2026-05-28', '2026-06-26', '2026-09-14', '2026-10-02', '2026-10-20', '2026-11-10',
+    '2026-11-24', '2026-12-25',
+]
+
+SPECIAL_SESSIONS = [
+    '2024-01-20',  # Saturday session in lieu of 22-Jan
+    '2024-03-02',  # Saturday DR-site session
+    '2024-11-01',  # Muhurat trading
+    '2025-10-21',  # Muhurat trading
+]
+
+LAST_YEAR = max(int(d[:4]) for d in HOLIDAYS)
+
+
+def load_holiday_file(path: str) -> List[str]:
+    """Extra holidays: a JSON list or one YYYY-MM-DD per line ('#' comments allowed)"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return [str(d) for d in json.loads(text)]
+    return [line.split('#', 1)[0].strip() for line in text.splitlines() if line.split('#', 1)[0].strip()]
+
+
+class TradingCalendar:
+    """Weekday calendar minus exchange holidays, plus special sessions"""
+
+    def __init__(self, holidays: Iterable = HOLIDAYS, special_sessions: Iterable = SPECIAL_SESSIONS):
+        self.holidays = np.unique(np.array(list(holidays), dtype='datetime64[D]'))
+        self.special_sessions = np.unique(np.array(list(special_sessions), dtype='datetime64[D]'))
+        self.calendar = np.busdaycalendar(holidays=self.holidays)
+        self._warned = False
+
+    def _check_covered(self, day: np.datetime64):
+        if not self._warned and day.astype(object).year > LAST_YEAR:
+            logger.warning(f"⚠️  Trading holidays are only known up to {LAST_YEAR} - "
+                           f"add them to trading_calendar.py or TRADING_HOLIDAYS_PATH")
+            self._warned = True
+
+    def is_trading_day(self, day: date) -> bool:
+        day = np.datetime64(day, 'D')
+        self._check_covered(day)
+        return bool(np.is_busday(day, busdaycal=self.calendar)) or day in self.special_sessions
+
+    def is_holiday(self, day: date) -> bool:
+        """A weekday the exchanges are closed"""
+        day = np.datetime64(day, 'D')
+        return bool(np.is_busday(day)) and not self.is_trading_day(day)
+
+    def trading_days(self, start: date, end: date) -> List[date]:
+        """Trading days in start..end, inclusive"""
+        if start > end:
+            return []
+        days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        self._check_covered(days[-1])
+        trading = np.is_busday(days, busdaycal=self.calendar) | np.isin(days, self.special_sessions)
+        return days[trading].astype(object).tolist()
+
+    def next_trading_day(self, day: date) -> date:
+        """First trading day after day"""
+        return self._roll(np.datetime64(day, 'D') + 1, 'forward')
+
+    def previous_trading_day(self, day: date) -> date:
+        """Last trading day before day"""
+        return self._roll(np.datetime64(day, 'D') - 1, 'backward')
+
+    def _roll(self, day: np.datetime64, direction: str) -> date:
+        rolled = np.busday_offset(day, 0, roll=direction, busdaycal=self.calendar)
+        # A special session between day and the rolled date comes first
+        if direction == 'forward':
+            sessions = self.special_sessions[(self.special_sessions >= day) & (self.special_sessions < rolled)]
+            rolled = sessions[0] if len(sessions) else rolled
+        else:
+            sessions = self.special_sessions[(self.special_sessions <= day) & (self.special_sessions > rolled)]
+            rolled = sessions[-1] if len(sessions) else rolled
+        self._check_covered(rolled)
+        return rolled.astype(object)
+
+
+_calendar: Optional[TradingCalendar] = None
+
+
+def get_calendar(extra_holidays_path: str = '') -> TradingCalendar:
+    """Process-wide calendar: HOLIDAYS plus the optional extra holidays file"""
+    global _calendar
+    if _calendar is None:
+        holidays = list(HOLIDAYS)
+        if extra_holidays_path:
+            try:
+                holidays += load_holiday_file(extra_holidays_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read trading holidays from {extra_holidays_path}: {e}")
+        _calendar = TradingCalendar(holidays)
+    return _calendar
+
+
+if __name__ == "__main__":
+    import sys
+    calendar = get_calendar(os.getenv('TRADING_HOLIDAYS_PATH', ''))
+    for arg in sys.argv[1:] or [date.today().isoformat()]:
+        day = date.fromisoformat(arg)
+        status = 'trading day' if calendar.is_trading_day(day) else \
+            'holiday' if calendar.is_holiday(day) else 'weekend'
+        print(f"{day}: {status} (previous {calendar.previous_trading_day(day)}, "
+              f"next {calendar.next_trading_day(day)})")
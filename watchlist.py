@@ -0,0 +1,99 @@
+"""
+Symbol Watchlists
+
+Alerts on every bulk/block deal in a watched security, whoever traded it.
+Entries come from the monitored_symbols table; each identifier may be an
+NSE symbol, a BSE scrip code, an ISIN or BSE's short scrip name:
+
+    symbol      display_name     category    priority
+    RELIANCE    Reliance         Core        3
+    500325      Reliance (BSE)   Core        3
+    INE002A01018
+
+Matching is one hash join per frame: each identifier column is mapped
+through a dict of watched identifiers, so the cost does not grow with
+the size of the watchlist. With the security master loaded, NSE rows
+carry scrip_code/isin and BSE rows carry symbol/isin, so one entry
+covers both exchanges.
+"""
+
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from deal_records import AlertBatch, DealAlert
+
+logger = logging.getLogger(__name__)
+
+# Checked in order; the first identifier that is watched wins
+ID_COLUMNS = ('symbol', 'scrip_code', 'isin', 'scrip_name')
+
+
+def _identifiers(column: pd.Series) -> pd.Series:
+    return column.astype(object).where(column.notna(), '').astype(str).str.strip().str.upper()
+
+
+def _watched(column: pd.Series, lookup: Dict[str, str]) -> pd.Series:
+    """lookup[identifier] per row; categorical columns are joined on their categories"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = _identifiers(pd.Series(column.cat.categories)).map(lookup).to_numpy(dtype=object)
+        codes = column.cat.codes.to_numpy()
+        # Appended None is where code -1 (missing) lands
+        return pd.Series(np.append(categories, None)[codes], index=column.index, dtype=object)
+    return _identifiers(column).map(lookup)
+
+
+class SymbolWatchlist:
+    """Watched identifier -> entry, matched against whole deal frames"""
+
+    def __init__(self, entries: List[Dict]):
+        self.entries: Dict[str, Dict] = {}
+        # Lower priorities first so the highest-priority entry owns a shared identifier
+        for entry in sorted(entries, key=lambda e: e.get('priority', 0)):
+            identifier = str(entry.get('symbol', '')).strip().upper()
+            if identifier:
+                self.entries[identifier] = entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def match(self, df: pd.DataFrame) -> pd.Series:
+        """Watched identifier per row (NaN where nothing is watched)"""
+        matched = pd.Series(None, index=df.index, dtype=object)
+        lookup = {identifier: identifier for identifier in self.entries}
+        for column in ID_COLUMNS:
+            if column in df.columns:
+                matched = matched.fillna(_watched(df[column], lookup))
+        return matched
+
+    def find_alerts(self, data: Dict[str, pd.DataFrame]) -> List[DealAlert]:
+        """DealAlert records (same shape as InvestorMonitor's) for every watched deal"""
+        alerts = []
+        if not self.entries:
+            return alerts
+
+        for key, df in data.items():
+            if df is None or df.empty:
+                continue
+            matched = self.match(df)
+            hits = df[matched.notna()]
+            if hits.empty:
+                continue
+            logger.info(f"  ✓ WATCHLIST: {len(hits)} {key} deals in watched securities")
+
+            entries = [self.entries[identifier] for identifier in matched[matched.notna()]]
+            names = np.array([entry.get('display_name') or identifier
+                              for entry, identifier in zip(entries, matched[matched.notna()])], dtype=object)
+            batch = AlertBatch.from_frame(
+                hits,
+                investor_category=[entry.get('category') or 'Watchlist' for entry in entries],
+                priority=[entry.get('priority') or 0 for entry in entries],
+                watchlist=names,
+            )
+            # BSE rows without a client name are labelled with the watchlist entry
+            investors = batch.columns['investor']
+            batch.columns['investor'] = np.where(investors != '', investors, names)
+            alerts.extend(batch.records())
+        return alerts